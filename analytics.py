@@ -0,0 +1,142 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from items import normalize_items
+from localtime import get_local_time
+from metrics import DEMAND_CATEGORY, MISSING_CATEGORY
+from perf import timed
+from schema import parse_dates
+
+# ---------------------------------------------------------
+# STOCK-OUT TRENDS
+# Per (category, branch, item), for "Alaabta go'an" and "alaabta Suuqa
+# leh" reports:
+#   7d / 30d    reports in the last 7 / 30 days
+#   Baseline    average week over the 8 weeks before the last 7 days
+#   Spike       the last 7 days are well above that baseline
+#   Recurring   missing in most of the last 8 weeks
+# Rows become one day x series count matrix (a single np.bincount);
+# every window is a difference of its cumulative sum, so a million rows
+# cost one grouped pass and a few array operations. TrendCache keeps
+# the result per data version (CachedStore.version) and day.
+# ---------------------------------------------------------
+
+TREND_CATEGORIES = [MISSING_CATEGORY, DEMAND_CATEGORY]
+HISTORY_DAYS = 90      # days kept in the matrix (charts); stats use the last 63
+BASELINE_WEEKS = 8
+SPIKE_RATIO = 2.0      # 7d vs baseline week (both +1 smoothed)
+SPIKE_MIN = 3          # reports in 7 days before a spike counts
+RECURRING_WEEKS = 4    # of the last BASELINE_WEEKS weeks with a stock-out
+
+WEEKS_COLUMN = f"Weeks (of {BASELINE_WEEKS})"
+TREND_COLUMNS = ["Category", "Branch", "Item", "7d", "30d", "Baseline/wk", "vs baseline",
+                 WEEKS_COLUMN, "Spike", "Recurring"]
+
+# version: (data version, day) the result was computed for; items:
+# DataFrame(TREND_COLUMNS); branches: {category: DataFrame day x branch
+# of rolling 7-day report counts}
+Trends = namedtuple("Trends", ["version", "items", "branches"])
+
+
+def _day_numbers(dates):
+    # Dates -> Mogadishu calendar day number (days since 1970), -1 for NaT
+    local = parse_dates(dates).dt.tz_localize(None)
+    days = local.to_numpy().astype("datetime64[D]").astype("int64")
+    return np.where(local.isna().to_numpy(), -1, days)
+
+
+def daily_matrix(df, item_key=None, now=None, days=HISTORY_DAYS):
+    # -> (series DataFrame(Category, Branch, Key, Item), day numbers, counts[series, day])
+    end_day = int(np.datetime64((now or get_local_time()).date(), "D").astype("int64"))
+    first_day = end_day - days + 1
+    empty = (pd.DataFrame(columns=["Category", "Branch", "Key", "Item"]),
+             np.arange(first_day, end_day + 1), np.zeros((0, days), dtype="int64"))
+    if df.empty or not {"Date", "Category", "Branch", "Item"} <= set(df.columns):
+        return empty
+    day = _day_numbers(df["Date"])
+    keep = df["Category"].isin(TREND_CATEGORIES).to_numpy() & (day >= first_day) & (day <= end_day)
+    if not keep.any(): return empty
+    rows = df[keep]
+    frame = pd.DataFrame({
+        "Category": rows["Category"].astype(object).to_numpy(),
+        "Branch": rows["Branch"].astype(object).fillna("").to_numpy(),
+        "Key": (item_key(rows["Item"]) if item_key else normalize_items(rows["Item"])).to_numpy(),
+        "Item": rows["Item"].astype(object).fillna("").astype(str).str.strip().to_numpy(),
+    })
+    frame = frame[frame["Key"] != ""]
+    series_id = frame.groupby(["Category", "Branch", "Key"], sort=False).ngroup().to_numpy()
+    n = int(series_id.max()) + 1 if len(series_id) else 0
+    counts = np.bincount(series_id * days + (day[keep][frame.index] - first_day),
+                         minlength=n * days).reshape(n, days)
+    # Label each series with its most reported spelling
+    spellings = frame.assign(_id=series_id).groupby(["_id", "Item"], sort=False).size()
+    spellings = spellings.sort_values(ascending=False, kind="stable").reset_index().drop_duplicates("_id")
+    labels = frame.assign(_id=series_id).drop_duplicates("_id").set_index("_id").sort_index()
+    labels["Item"] = spellings.set_index("_id")["Item"]
+    return labels.reset_index(drop=True), np.arange(first_day, end_day + 1), counts
+
+
+def item_trends(series, counts):
+    # daily_matrix() output -> DataFrame(TREND_COLUMNS), spikes and most reported first
+    if not len(series):
+        return pd.DataFrame(columns=TREND_COLUMNS)
+    days = counts.shape[1]
+    csum = np.concatenate([np.zeros((len(counts), 1), dtype="int64"), counts.cumsum(axis=1)], axis=1)
+
+    def last(n, skip=0):
+        return csum[:, days - skip] - csum[:, days - skip - n]
+
+    last7, last30 = last(7), last(30)
+    baseline = last(BASELINE_WEEKS * 7, skip=7) / BASELINE_WEEKS
+    ratio = (last7 + 1) / (baseline + 1)
+    weeks = (counts[:, -BASELINE_WEEKS * 7:].reshape(len(counts), BASELINE_WEEKS, 7).sum(axis=2) > 0).sum(axis=1)
+    out = pd.DataFrame({
+        "Category": series["Category"].to_numpy(),
+        "Branch": series["Branch"].to_numpy(),
+        "Item": series["Item"].to_numpy(),
+        "7d": last7,
+        "30d": last30,
+        "Baseline/wk": baseline.round(1),
+        "vs baseline": ratio.round(1),
+        WEEKS_COLUMN: weeks,
+        "Spike": (last7 >= SPIKE_MIN) & (ratio >= SPIKE_RATIO),
+        "Recurring": (series["Category"].to_numpy() == MISSING_CATEGORY) & (weeks >= RECURRING_WEEKS),
+    })
+    out = out[(last30 > 0) | (weeks > 0)]
+    return out.sort_values(["Spike", "7d", "30d"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def branch_trends(series, day_numbers, counts, window=7):
+    # -> {category: DataFrame(day x branch) of rolling `window`-day report counts}
+    index = pd.to_datetime(day_numbers, unit="D")
+    out = {}
+    for category in TREND_CATEGORIES:
+        picked = (series["Category"] == category).to_numpy()
+        daily = pd.DataFrame(counts[picked], columns=index).groupby(series["Branch"].to_numpy()[picked]).sum().T
+        out[category] = daily.rolling(window, min_periods=1).sum().astype("int64")
+    return out
+
+
+def compute_trends(df, item_key=None, now=None, version=None):
+    with timed("trends", rows=len(df)):
+        series, day_numbers, counts = daily_matrix(df, item_key, now)
+        return Trends(version, item_trends(series, counts), branch_trends(series, day_numbers, counts))
+
+
+class TrendCache:
+    # One Trends per (data version, day), shared by every session
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trends = None
+
+    def get(self, store, item_key=None, now=None):
+        snap = store.snapshot()
+        now = now or get_local_time()
+        version = (snap.version, now.strftime('%Y-%m-%d'))
+        with self._lock:
+            if self._trends is None or self._trends.version != version:
+                self._trends = compute_trends(snap.df, item_key, now, version)
+            return self._trends
@@ -1,5 +1,7 @@
+import time
 import streamlit as st
-import re
+
+RERUN_STARTED = time.perf_counter()
 
 # ---------------------------------------------------------
 # PAGE CONFIGURATION (MUST BE FIRST)
@@ -11,40 +13,26 @@ st.set_page_config(
 )
 
 # --- IMPORTS ---
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-
-# Try importing the connection; handle potential install name mismatches gracefully
-try:
-    from streamlit_gsheets import GSheetsConnection
-except ImportError:
-    st.error("⚠️ Library Error: 'st-gsheets-connection' is missing. Please add it to requirements.txt")
-    st.stop()
-
+# Only what the staff tab needs. The Sheets client and the PDF/Excel
+# engines are imported on first use (see gsheets_connection / report_engines).
 import pandas as pd
-from datetime import datetime
-import pytz 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from reportlab.lib import colors
-import io
-import random
-
-# Check for xlsxwriter availability to prevent crashes
-try:
-    import xlsxwriter
-    HAS_XLSXWRITER = True
-except ImportError:
-    HAS_XLSXWRITER = False
-
-# --- 1. SETUP TIMEZONE (Somalia) ---
-def get_local_time():
-    tz = pytz.timezone('Africa/Mogadishu') 
-    return datetime.now(tz)
-
-# --- 2. CSS: RESPONSIVE THEME (Auto Dark/Light) ---
+from storage import ID_COLUMN, VERSION_COLUMN, GSheetsStore, LocalStore, MirroredStore, StaleWriteError
+from report_cache import CachedStore
+from submit_queue import SubmissionQueue
+from report_jobs import ArtifactCache, ReportJobs, artifact_key
+from report_schedule import ReportScheduler, report_params
+from search import ReportSearchIndex
+from schema import BRANCHES, CATEGORY_LABELS
+from metrics import DEMAND_CATEGORY, MISSING_CATEGORY, MetricsRollup
+from items import ItemIndex
+from analytics import TrendCache
+from changelog import ChangeLog
+from dashboard import PAGE_SIZES, SCHEDULED_FILTERS, TIME_FILTERS, EditBatch, editor_page, filter_reports, kpis, new_report, view_summary
+from localtime import day_window, get_local_time
+from perf import recorder as perf_recorder, timed
+from functools import partial
+
+# --- 1. CSS: RESPONSIVE THEME (Auto Dark/Light) ---
 st.markdown("""
 <style>
     /* 1. Hide Default Menus */
@@ -94,305 +82,181 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- 3. DATABASE CONNECTION ---
+# --- 2. DATABASE CONNECTION ---
+# storage_backend = "local" in secrets serves everything from a SQLite file;
+# add mirror_to_sheet = true to keep Google Sheets as a copy of every write.
+# archive_after_days = N moves reports older than N days out of the hot
+# sheet/table once a day (to the "Archive" tab / reports_archive table).
+ARCHIVE_WORKSHEET = st.secrets.get("archive_worksheet", "Archive")
+
+def gsheets_connection():
+    # Try importing the connection; handle potential install name mismatches gracefully
+    try:
+        from streamlit_gsheets import GSheetsConnection
+    except ImportError:
+        st.error("⚠️ Library Error: 'st-gsheets-connection' is missing. Please add it to requirements.txt")
+        st.stop()
+    return st.connection("gsheets", type=GSheetsConnection)
+
+@st.cache_resource
+def get_store(backend):
+    if backend == "local":
+        local = LocalStore(st.secrets.get("local_db_path", "mareero.db"))
+        if not st.secrets.get("mirror_to_sheet", False):
+            return CachedStore(local)
+        conn = gsheets_connection()
+        store = MirroredStore(local, GSheetsStore(conn, st.secrets["gcp_sheet_url"], worksheet="Sheet1", archive_worksheet=ARCHIVE_WORKSHEET))
+        store.bootstrap()
+        return CachedStore(store)
+    conn = gsheets_connection()
+    # Process-wide cache: reruns only fetch rows added since the last sync
+    return CachedStore(GSheetsStore(conn, st.secrets["gcp_sheet_url"], worksheet="Sheet1", archive_worksheet=ARCHIVE_WORKSHEET))
+
 try:
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    SHEET_URL = st.secrets["gcp_sheet_url"] 
+    store = get_store(st.secrets.get("storage_backend", "gsheets"))
 except Exception as e:
     st.error(f"⚠️ Connection Error: {e}")
     st.stop()
 
-# --- 4. EXCEL ENGINE (SINGLE SHEET - COLOR CODED) ---
-def generate_excel(df):
-    output = io.BytesIO()
-
-    if HAS_XLSXWRITER:
-        # --- ADVANCED MODE ---
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            workbook = writer.book
-            
-            # --- STYLES ---
-            # 1. Pastel Colors for Branches (Row Backgrounds)
-            branch_colors = [
-                '#E3F2FD', # Blue-ish
-                '#E8F5E9', # Green-ish
-                '#FFF3E0', # Orange-ish
-                '#F3E5F5', # Purple-ish
-                '#FBE9E7', # Red-ish
-                '#E0F7FA', # Cyan-ish
-                '#FFFDE7'  # Yellow-ish
-            ]
-            
-            # 2. Text Highlights (For Categories/Duplicates)
-            duplicate_fmt = workbook.add_format({'font_color': '#9C0006', 'bold': True})
-            
-            # Category: Missing (Red Text + Bold)
-            cat_missing_fmt = workbook.add_format({'font_color': '#D32F2F', 'bold': True})
-            
-            # Category: Request (Blue Text + Bold)
-            cat_request_fmt = workbook.add_format({'font_color': '#1976D2', 'bold': True})
-
-            # ==========================================
-            # SINGLE SHEET: WARBIXIN
-            # ==========================================
-            sheet_name = 'Warbixin'
-            sheet = workbook.add_worksheet(sheet_name)
-            
-            # --- PRINT SETTINGS (A4, Landscape, Fit Width) ---
-            sheet.set_paper(9) # A4
-            sheet.set_landscape() 
-            sheet.fit_to_pages(1, 0) 
-            sheet.set_margins(left=0.5, right=0.5, top=0.5, bottom=0.5)
-            sheet.repeat_rows(1)
-            
-            if not df.empty:
-                # 1. Write Data
-                df.to_excel(writer, sheet_name=sheet_name, startrow=1, header=False, index=False)
-                
-                (max_row, max_col) = df.shape
-                
-                # 2. Create Table
-                column_settings = [{'header': column} for column in df.columns]
-                sheet.add_table(0, 0, max_row, max_col - 1, {
-                    'columns': column_settings,
-                    'style': 'TableStyleMedium9', # Standard Blue Table
-                    'name': 'MasterTable'
-                })
-                
-                cols = df.columns.tolist()
-                
-                # 3. BRANCH ROW COLORING
-                # We apply conditional formatting to the ENTIRE row range based on the Branch column
-                if 'Branch' in cols:
-                    branch_idx = cols.index('Branch')
-                    branch_letter = chr(65 + branch_idx) # e.g., 'C'
-                    
-                    # Get unique branches
-                    unique_branches = df['Branch'].unique()
-                    
-                    # Loop through branches and assign colors
-                    for i, branch in enumerate(unique_branches):
-                        # Cycle through the palette
-                        bg_color = branch_colors[i % len(branch_colors)]
-                        
-                        # Define format for this branch
-                        branch_fmt = workbook.add_format({'bg_color': bg_color, 'border': 1})
-                        
-                        # Apply to the whole table range
-                        # Formula: =$C2="BranchName" (Checks column C for every row)
-                        full_range = f"A2:{chr(65 + max_col - 1)}{max_row + 1}"
-                        sheet.conditional_format(full_range, {
-                            'type': 'formula',
-                            'criteria': f'=${branch_letter}2="{branch}"',
-                            'format': branch_fmt
-                        })
-
-                # 4. CATEGORY HIGHLIGHTING (Overwrites background with text color)
-                if 'Category' in cols:
-                    cat_idx = cols.index('Category')
-                    l = chr(65 + cat_idx)
-                    rng = f"{l}2:{l}{max_row+1}"
-                    
-                    sheet.conditional_format(rng, {'type': 'text', 'criteria': 'containing', 'value': "go'an", 'format': cat_missing_fmt})
-                    sheet.conditional_format(rng, {'type': 'text', 'criteria': 'containing', 'value': "Dadweynaha", 'format': cat_request_fmt})
-
-                # 5. DUPLICATE ITEMS
-                if 'Item' in cols:
-                    item_idx = cols.index('Item')
-                    l = chr(65 + item_idx)
-                    rng = f"{l}2:{l}{max_row+1}"
-                    sheet.conditional_format(rng, {'type': 'duplicate', 'format': duplicate_fmt})
-
-                # 6. AUTO-FIT
-                for i, col in enumerate(df.columns):
-                    max_len = max(df[col].astype(str).map(len).max(), len(str(col))) + 4
-                    sheet.set_column(i, i, max_len)
-            else:
-                sheet.write('A1', "No Data Found")
+# Staff reports go to a local outbox first; a background thread sends them
+@st.cache_resource
+def get_submit_queue(_store):
+    return SubmissionQueue(_store, st.secrets.get("outbox_path", "outbox.db")).start()
+
+submit_queue = get_submit_queue(store)
+
+# Daily rollover: runs once per process per day
+@st.cache_resource
+def rollover_for_day(day, keep_days):
+    before, _ = day_window(keep_days)
+    return store.rollover(before)
+
+if st.secrets.get("archive_after_days"):
+    try:
+        rollover_for_day(get_local_time().strftime('%Y-%m-%d'), int(st.secrets["archive_after_days"]))
+    except Exception as e:
+        st.warning(f"⚠️ Archive rollover failed: {e}")
+
+# chart_backend = "vector" draws the PDF charts with ReportLab (no matplotlib / PNG)
+CHART_BACKEND = st.secrets.get("chart_backend", "matplotlib")
+# excel_mode = "conditional" restores the formula-based highlighting
+EXCEL_MODE = st.secrets.get("excel_mode", "static")
+
+# perf_log = "perf.jsonl" appends every timing sample (compare before/after a deploy)
+perf_recorder.log_path = st.secrets.get("perf_log")
+
+# --- 3. SEARCH INDEX ---
+# Search text is kept in step with the cache, one index per process
+@st.cache_resource
+def get_search_index(_store):
+    index = ReportSearchIndex()
+    _store.subscribe(index)
+    return index
+
+search_index = get_search_index(store)
+
+# Counts per (day, branch, category) for KPIs and report summaries
+@st.cache_resource
+def get_metrics_rollup(_store):
+    rollup = MetricsRollup()
+    _store.subscribe(rollup)
+    return rollup
+
+metrics_rollup = get_metrics_rollup(store)
+
+# Item names folded + fuzzy clustered ("Sonkor" = "sonkor " = "Sokor")
+@st.cache_resource
+def get_item_index(_store):
+    index = ItemIndex()
+    _store.subscribe(index)
+    return index
+
+item_index = get_item_index(store)
+
+# Numbered changes for "changes since version X" raw exports
+@st.cache_resource
+def get_change_log(_store):
+    log = ChangeLog(st.secrets.get("changelog_path", "changes.db"))
+    _store.subscribe(log)
+    return log
+
+change_log = get_change_log(store)
+
+# Rolling 7/30-day counts, spikes and recurring shortages, per data version
+@st.cache_resource
+def get_trend_cache():
+    return TrendCache()
+
+def current_trends():
+    return get_trend_cache().get(store, item_index.cluster_keys)
+
+# pdf_trends = true adds the alerts page (spikes, recurring shortages) to PDFs
+PDF_TRENDS = st.secrets.get("pdf_trends", False)
+
+ALL_BRANCHES = "Dhammaan (All)"
+EDITOR_SORT_COLUMNS = ["Date", "Branch", "Employee", "Category", "Item", "Note"]
+
+def editor_first_page():
+    # New sort / page size: start again from page 1
+    st.session_state.editor_page = 1
+
+# --- 4. REPORT JOBS (engines live in pdf_report.py / excel_report.py) ---
+# One worker pool + disk cache per process: renders run in the background
+# and managers asking for the same view share one file.
+def report_engines():
+    # ReportLab / xlsxwriter load on the first manager view, never for staff.
+    # Plain imports (Python caches them): also called from worker threads.
+    import excel_report
+    import pdf_report
+    return pdf_report, excel_report
+
+def report_builders(pdf_summary=None, trends=None):
+    # The same builders for downloads and the scheduler
+    pdf_report, excel_report = report_engines()
+    return {
+        "pdf": partial(pdf_report.generate_pdf, chart_backend=CHART_BACKEND, summary=pdf_summary, trends=trends),
+        "excel": partial(excel_report.generate_excel, mode=EXCEL_MODE, item_key=item_index.cluster_keys),
+    }
 
+@st.cache_resource
+def get_report_jobs():
+    cache = ArtifactCache(st.secrets.get("report_cache_dir", ".report_cache"),
+                          max_files=int(st.secrets.get("report_cache_files", 256)))
+    return ReportJobs(cache)
+
+# prerender_times = ["06:00", "12:00", "17:00"] (Mogadishu time) pre-renders
+# Today / This Week for all branches and each branch; unchanged ones are skipped
+@st.cache_resource
+def get_report_scheduler(times):
+    return ReportScheduler(store, get_report_jobs(), report_builders,
+                           {label: TIME_FILTERS[label] for label in SCHEDULED_FILTERS},
+                           BRANCHES, times, trends=current_trends if PDF_TRENDS else None).start()
+
+report_scheduler = get_report_scheduler(tuple(st.secrets["prerender_times"])) if st.secrets.get("prerender_times") else None
+
+@st.fragment(run_every=1)
+def report_progress(job):
+    # Polls only this fragment; the full page reruns once the file is ready
+    st.progress(job.progress, text=f"⏳ Diyaarinta {job.kind.upper()}... {int(job.progress * 100)}%")
+    if not job.active:
+        st.rerun()
+
+def report_button(kind, df, params, builder, label, file_name, mime):
+    jobs = get_report_jobs()
+    key = artifact_key(kind, params, df)
+    job = jobs.find(key, kind)
+    if job is not None and job.active:
+        report_progress(job)
+    elif job is not None and job.status == "done":
+        st.download_button(label=f"📥 Download {label}", data=job.read, file_name=file_name, mime=mime, use_container_width=True)
     else:
-        # --- BASIC FALLBACK ---
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Warbixin')
-
-    output.seek(0)
-    return output
-
-# --- 5. PDF ENGINE ---
-def generate_pdf(df):
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    
-    # Colors
-    header_bg = colors.HexColor("#1E3A8A") # Navy Blue
-    line_color = colors.HexColor("#dcdcdc") # Grey Grid
-    
-    # --- HEADER ---
-    c.setFillColor(header_bg)
-    c.rect(0, height-100, width, 100, fill=1, stroke=0)
-    
-    c.setFillColor(colors.white)
-    c.setFont("Helvetica-Bold", 24)
-    c.drawString(40, height-50, "MAREERO SYSTEM")
-    c.setFont("Helvetica", 12)
-    c.drawString(40, height-70, " Mareero General Trading  LLC")
-    
-    # Time
-    current_time = get_local_time()
-    c.drawRightString(width-40, height-50, "OPERATIONAL REPORT")
-    c.setFont("Helvetica", 10)
-    c.drawRightString(width-40, height-65, f"Date: {current_time.strftime('%d %B %Y')}")
-    c.drawRightString(width-40, height-80, f"Time: {current_time.strftime('%I:%M %p')}")
-
-    # --- SUMMARY ---
-    y_pos = height - 140
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, y_pos, "1. KOOBITAAN (SUMMARY)")
-    
-    total = len(df)
-    missing = len(df[df['Category'] == 'Alaabta go\'an']) if not df.empty else 0
-    requests = len(df[df['Category'] == 'bahiyaha Dadweynaha']) if not df.empty else 0
-    
-    # Boxes
-    box_w, box_h = 160, 50
-    start_x = 40
-    metrics = [("Total Reports", str(total)), ("Alaabta go'an", str(missing)), ("Requests", str(requests))]
-    
-    for i, (label, value) in enumerate(metrics):
-        x = start_x + (i * 175)
-        c.setStrokeColor(colors.lightgrey)
-        c.roundRect(x, y_pos-60, box_w, box_h, 6, fill=0, stroke=1)
-        c.setFillColor(colors.black)
-        c.setFont("Helvetica-Bold", 16)
-        c.drawCentredString(x + box_w/2, y_pos-35, value)
-        c.setFillColor(colors.grey)
-        c.setFont("Helvetica", 10)
-        c.drawCentredString(x + box_w/2, y_pos-50, label)
-
-    # --- CHARTS ---
-    y_pos -= 80
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, y_pos, "2. SHAXDA XOGTA (CHARTS)")
-    
-    if not df.empty:
-        try:
-            plt.rcdefaults()
-            # Pie
-            fig1, ax1 = plt.subplots(figsize=(4, 3))
-            cat_counts = df['Category'].value_counts()
-            ax1.pie(cat_counts, labels=cat_counts.index, autopct='%1.0f%%', colors=['#ef4444', '#f59e0b', '#3b82f6'])
-            img1 = io.BytesIO()
-            plt.savefig(img1, format='png', bbox_inches='tight')
-            img1.seek(0)
-            c.drawImage(ImageReader(img1), 40, y_pos-220, width=220, height=165)
-            plt.close(fig1)
-
-            # Bar
-            fig2, ax2 = plt.subplots(figsize=(4, 3))
-            branch_counts = df['Branch'].value_counts()
-            branch_counts.plot(kind='bar', color='#1E3A8A', ax=ax2)
-            plt.xticks(rotation=45, ha='right', fontsize=8)
-            img2 = io.BytesIO()
-            plt.savefig(img2, format='png', bbox_inches='tight')
-            img2.seek(0)
-            c.drawImage(ImageReader(img2), 300, y_pos-220, width=240, height=180)
-            plt.close(fig2)
-        except:
-            pass
+        if job is not None:
+            st.error(f"❌ {label}: {job.error}")
+        if st.button(f"⚙️ Diyaari {label} (Prepare)", key=f"prepare_{kind}", use_container_width=True):
+            jobs.submit(key, kind, df, builder)
+            st.rerun()
 
-    # --- TABLE ---
-    y_pos -= 240
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, y_pos, "3. LIISKA FAAHFAAHSAN (DETAILS)")
-    
-    y_curr = y_pos - 30
-    col_widths = [80, 135, 105, 85, 110] 
-    headers = ["TYPE", "ITEM NAME", "BRANCH", "STAFF", "NOTES"]
-    
-    def draw_header(y):
-        c.setFillColor(header_bg)
-        c.rect(40, y-6, sum(col_widths), 22, fill=1, stroke=0)
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 9)
-        xp = 45
-        for i, h in enumerate(headers):
-            c.drawString(xp, y+2, h)
-            xp += col_widths[i]
-
-    draw_header(y_curr)
-    y_curr -= 22
-    c.setFont("Helvetica", 9)
-    
-    if not df.empty:
-        if 'Category' in df.columns:
-            df = df.sort_values(by=['Category'])
-
-        row_count = 0
-        for _, row in df.iterrows():
-            if row_count % 2 == 0:
-                c.setFillColor(colors.HexColor("#f1f5f9"))
-                c.rect(40, y_curr-6, sum(col_widths), 18, fill=1, stroke=0)
-            
-            cat = str(row.get('Category', ''))
-            if "go'an" in cat or "Maqan" in cat: c.setFillColor(colors.red)
-            elif 'Dadweynaha' in cat: c.setFillColor(colors.blue)
-            else: c.setFillColor(colors.black)
-            
-            vals = [
-                cat[:15],
-                str(row.get('Item', ''))[:25],
-                str(row.get('Branch', ''))[:18], 
-                str(row.get('Employee', ''))[:14],
-                str(row.get('Note', ''))[:20]
-            ]
-            
-            x_pos = 45
-            c.setLineWidth(0.5)
-            c.setStrokeColor(line_color)
-            
-            for i, val in enumerate(vals):
-                c.drawString(x_pos, y_curr, val)
-                c.line(x_pos + col_widths[i] - 5, y_curr-5, x_pos + col_widths[i] - 5, y_curr+12)
-                x_pos += col_widths[i]
-            
-            c.line(40, y_curr-6, 40+sum(col_widths), y_curr-6)
-            
-            y_curr -= 18
-            row_count += 1
-            
-            if y_curr < 60:
-                c.showPage()
-                y_curr = height - 50
-                draw_header(y_curr)
-                y_curr -= 22
-                c.setFont("Helvetica", 9)
-
-    # --- SIGNATURE ---
-    if y_curr < 80:
-        c.showPage()
-        y_curr = height - 100
-        
-    y_sig = 50
-    c.setStrokeColor(colors.black)
-    c.setLineWidth(1)
-    
-    c.line(40, y_sig, 200, y_sig)
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica", 10)
-    c.drawString(40, y_sig-15, "Manager Signature")
-    
-    c.line(350, y_sig, 510, y_sig)
-    c.drawString(350, y_sig-15, "Date & Stamp")
-
-    c.save()
-    buffer.seek(0)
-    return buffer
-
-# --- 6. APP UI ---
+# --- 5. APP UI ---
 st.markdown("<h1 style='text-align: center; color: #1E3A8A;'>🏢 Mareero General Trading LLC</h1>", unsafe_allow_html=True)
 
 tab_staff, tab_manager = st.tabs(["📝 Qeybta Shaqaalaha (Staff)", "🔐 Maamulka (Manager)"])
@@ -404,16 +268,10 @@ with tab_staff:
     with st.form("log_form", clear_on_submit=True):
         c1, c2 = st.columns(2)
         with c1:
-            branch_options = ["Head Q", "Branch 1", "Branch 3", "Branch 4", "Branch 5" , "Kaydka M.hassan"]
-            branch = st.selectbox("📍 Xulo Laanta (Select Branch)", branch_options)
+            branch = st.selectbox("📍 Xulo Laanta (Select Branch)", BRANCHES)
             employee = st.text_input("👤 Magacaaga (Your Name)")
         with c2:
-            cat_map = {
-                "Alaabta go'an (Missing)": "Alaabta go'an",
-                "alaabta Suuqa leh (High Demand)": "alaabta Suuqa leh",
-                "bahiyaha Dadweynaha (New Request)": "bahiyaha Dadweynaha"
-            }
-            category_selection = st.selectbox("📂 Nooca Warbixinta (Type)", list(cat_map.keys()))
+            category_selection = st.selectbox("📂 Nooca Warbixinta (Type)", list(CATEGORY_LABELS))
             item = st.text_input("📦 Magaca Alaabta (Item Name)")
         
         note = st.text_input("📝 Faahfaahin / Tirada (Note/Qty)")
@@ -421,31 +279,24 @@ with tab_staff:
         if st.form_submit_button("🚀 Gudbi (Submit)", use_container_width=True):
             if employee and item:
                 try:
-                    data = conn.read(spreadsheet=SHEET_URL, worksheet="Sheet1", ttl=5)
-                    if data is None: data = pd.DataFrame()
-                    data = data.dropna(how="all")
-                    
-                    real_category = cat_map[category_selection]
-                    current_local_time = get_local_time().strftime("%Y-%m-%d %H:%M")
-                    
-                    new_row = pd.DataFrame([{
-                        "Date": current_local_time,
-                        "Branch": branch,
-                        "Employee": employee,
-                        "Category": real_category,
-                        "Item": item,
-                        "Note": note
-                    }])
+                    new_row = new_report(branch, employee, category_selection, item, note)
                     
-                    updated = pd.concat([data, new_row], ignore_index=True)
-                    conn.update(spreadsheet=SHEET_URL, worksheet="Sheet1", data=updated)
-                    st.cache_data.clear()
-                    st.success(f"✅ Waa la gudbiyay! ({current_local_time})")
+                    # Saved locally right away; the sheet write happens in the background
+                    submit_queue.put([new_row])
+                    st.success(f"✅ Waa la gudbiyay! ({new_row['Date']})")
                 except Exception as e:
                     st.error(f"Error: {e}")
             else:
                 st.warning("⚠️ Fadlan buuxi Magacaaga iyo Alaabta.")
 
+    queue_counts = submit_queue.counts()
+    st.caption(f"🔄 Sugaya (Pending): {queue_counts['pending']} · ✅ La diray (Synced): {queue_counts['synced']}")
+    if submit_queue.last_error:
+        st.caption(f"⚠️ Xiriirka ayaa go'ay, waa la isku dayi doonaa (Retrying): {submit_queue.last_error}")
+
+# Script start -> staff tab drawn (shows up in the manager's Performance panel)
+perf_recorder.record("render.staff", time.perf_counter() - RERUN_STARTED)
+
 # --- MANAGER TAB ---
 with tab_manager:
     
@@ -474,21 +325,43 @@ with tab_manager:
                 st.rerun()
         
         try:
-            df = conn.read(spreadsheet=SHEET_URL, worksheet="Sheet1", ttl=5)
-            if df is None: df = pd.DataFrame()
-            df = df.dropna(how="all")
-            if not df.empty and 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            with timed("store.read") as sample:
+                df = store.read()
+                sample["rows"] = len(df)
         except:
             df = pd.DataFrame()
 
+        # --- BULK IMPORT (old paper logs, POS feeds; same as `python ingest.py`) ---
+        with st.expander("📤 Soo geli faylal (Bulk Import CSV/XLSX)"):
+            st.caption("Columns: Date, Branch, Category, Item (+ Employee, Note, ID). "
+                       "Reports already saved are skipped, so a file can be imported again safely.")
+            upload = st.file_uploader("CSV / XLSX", type=["csv", "xlsx"], key="bulk_upload")
+            dry_run = st.checkbox("Hubi oo keliya (Check only, write nothing)", key="bulk_dry_run")
+            if upload is not None and st.button("📤 Soo geli (Import)", use_container_width=True):
+                from ingest import ingest
+                status = st.empty()
+                try:
+                    result = ingest(store, upload, name=upload.name, dry_run=dry_run,
+                                    progress=lambda n: status.caption(f"⏳ {n:,} saf (rows) read..."))
+                except Exception as e:
+                    status.empty()
+                    st.error(f"⚠️ Import failed: {e}")
+                else:
+                    status.empty()
+                    verb = "la gelin lahaa (would be added)" if dry_run else "la geliyay (added)"
+                    st.success(f"✅ {result.added:,} {verb} · {result.duplicates:,} hore u jiray (duplicates) · "
+                               f"{result.rejected:,} la diiday (rejected) · {result.read:,} read")
+                    if result.errors:
+                        st.dataframe(pd.DataFrame(result.errors, columns=["Line", "Problem"]),
+                                     hide_index=True, use_container_width=True)
+                    if result.added and not dry_run:
+                        df = store.read()
+
         if not df.empty:
             st.markdown("---")
             
-            # METRICS
-            count_total = len(df)
-            count_missing = len(df[df['Category'] == 'Alaabta go\'an']) if 'Category' in df.columns else 0
-            count_new = len(df[df['Category'] == 'bahiyaha Dadweynaha']) if 'Category' in df.columns else 0
+            # METRICS (from the rollup, not a scan of every row)
+            count_total, count_missing, count_new = kpis(metrics_rollup.summary())
             
             m1, m2, m3 = st.columns(3)
             m1.metric("Wadarta (Total)", count_total)
@@ -499,126 +372,232 @@ with tab_manager:
             
             # --- SEARCH & FILTER ---
             st.subheader("🔍 Search & Filter")
-            col_search, col_filter = st.columns(2)
+            col_search, col_filter, col_branch = st.columns([2, 1, 1])
             
             with col_search:
-                search_term = st.text_input("🔍 Raadi (Search Item/Branch/Staff)...", placeholder="Type to search...")
+                search_term = st.text_input("🔍 Raadi (Search Item/Branch/Staff)...", placeholder='Type to search... e.g. branch:"Branch 3" item:sonkor')
                 
             with col_filter:
-                date_filter = st.selectbox("📅 Waqtiga (Time Filter)", ["All Time", "Today (Maanta)", "This Week (Isbuucan)"])
-            
-            filtered_df = df.copy()
-            now = get_local_time()
+                date_filter = st.selectbox("📅 Waqtiga (Time Filter)", list(TIME_FILTERS))
+
+            with col_branch:
+                branch_choice = st.selectbox("📍 Laanta (Branch)", [ALL_BRANCHES] + BRANCHES)
+                branch_filter = None if branch_choice == ALL_BRANCHES else branch_choice
             
-            if date_filter == "Today (Maanta)":
-                filtered_df = filtered_df[filtered_df['Date'].dt.date == now.date()]
-            elif date_filter == "This Week (Isbuucan)":
-                start_week = now - pd.Timedelta(days=7)
-                filtered_df = filtered_df[filtered_df['Date'] >= start_week]
-                
-            if search_term:
-                filtered_df = filtered_df[filtered_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False).any(), axis=1)]
+            filtered_df, start, end = filter_reports(store, search_index, df, TIME_FILTERS[date_filter], search_term, branch_filter)
+            pdf_summary = view_summary(metrics_rollup, filtered_df, search_term, start, end, branch_filter)
+
+            # --- TOP MISSING ITEMS (all branches, time filter only) ---
+            with st.expander("📉 Alaabta ugu badan ee go'an (Top Missing Items)"):
+                top_missing = item_index.top_items(start=start, end=end, limit=15)
+                if top_missing.empty:
+                    st.caption("Ma jiro alaab go'an (No missing items reported).")
+                else:
+                    st.dataframe(top_missing, hide_index=True, use_container_width=True)
+                    st.caption("Magacyada isku dhow waa la isku daray (similar spellings are counted as one item).")
+
+            # --- TRENDS & ALERTS (whole history; branch filter applies) ---
+            with st.expander("📈 Isbeddelka & Digniinaha (Trends & Alerts)"):
+                trends = current_trends()
+                trend_items = trends.items
+                if branch_filter:
+                    trend_items = trend_items[trend_items["Branch"] == branch_filter]
+                spikes = trend_items[trend_items["Spike"]]
+                recurring = trend_items[trend_items["Recurring"]]
+                t1, t2 = st.columns(2)
+                t1.metric("🔺 Kor u kac (Spikes, 7 days)", len(spikes))
+                t2.metric("🔁 Go'itaan soo noqnoqda (Recurring)", len(recurring))
+                trend_category = st.radio("Nooca (Type)", [MISSING_CATEGORY, DEMAND_CATEGORY], horizontal=True)
+                chart = trends.branches[trend_category]
+                if branch_filter:
+                    chart = chart[[b for b in chart.columns if b == branch_filter]]
+                if chart.empty:
+                    st.caption("Xog kuma filna (Not enough data).")
+                else:
+                    st.line_chart(chart)
+                    st.caption("Warbixinada 7-dii maalmood ee la soo dhaafay, laan kasta (reports in the last 7 days, per branch).")
+                tab_spikes, tab_recurring, tab_all = st.tabs(["🔺 Spikes", "🔁 Recurring", "📋 All"])
+                with tab_spikes:
+                    st.dataframe(spikes.drop(columns=["Spike", "Recurring"]), hide_index=True, use_container_width=True)
+                with tab_recurring:
+                    st.dataframe(recurring.drop(columns=["Spike", "Recurring"]), hide_index=True, use_container_width=True)
+                with tab_all:
+                    st.dataframe(trend_items, hide_index=True, use_container_width=True)
 
             
 
             # --- DOWNLOAD BUTTONS ---
             st.subheader("📄 Warbixinada (Reports)")
             if not filtered_df.empty:
+                pdf_report, excel_report = report_engines()
+                pdf_trends = current_trends() if PDF_TRENDS else None
+                builders = report_builders(pdf_summary, pdf_trends)
+                # Built in the background; the same day + filter + data is rendered once
+                # (Today / This Week are usually pre-rendered by the scheduler)
+                today = get_local_time().strftime('%Y-%m-%d')
+                params = report_params(today, date_filter, search_term, branch_filter,
+                                       trends=pdf_trends.version if pdf_trends else None)
+                file_tag = today + (f"_{branch_filter.replace(' ', '_')}" if branch_filter else "")
                 c1, c2 = st.columns(2)
                 with c1:
-                    st.download_button(
-                        label=f"📥 Download PDF ({len(filtered_df)} items)",
-                        data=generate_pdf(filtered_df),
-                        file_name=f"Mareero_Report_{get_local_time().strftime('%Y-%m-%d')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
+                    report_button(
+                        "pdf", filtered_df, params, builders["pdf"],
+                        label=f"PDF ({len(filtered_df)} items)",
+                        file_name=f"Mareero_Report_{file_tag}.pdf",
+                        mime="application/pdf"
                     )
                 with c2:
-                    if not HAS_XLSXWRITER:
+                    if not excel_report.HAS_XLSXWRITER:
                         st.caption("⚠️ Install 'xlsxwriter' for advanced charts. Using basic mode.")
                     
-                    st.download_button(
-                        label=f"📥 Download Excel ({len(filtered_df)} items)",
-                        data=generate_excel(filtered_df),
-                        file_name=f"Mareero_Data_{get_local_time().strftime('%Y-%m-%d')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True
+                    report_button(
+                        "excel", filtered_df, params, builders["excel"],
+                        label=f"Excel ({len(filtered_df)} items)",
+                        file_name=f"Mareero_Data_{file_tag}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
+                if report_scheduler is not None and report_scheduler.last_run is not None:
+                    st.caption(f"🕒 Diyaarin otomaatig ah (Pre-rendered): {report_scheduler.last_run.strftime('%H:%M')}"
+                               f" · {report_scheduler.last_submitted} la cusboonaysiiyay (rebuilt)"
+                               + (f" · ⚠️ {report_scheduler.last_error}" if report_scheduler.last_error else ""))
             else:
                 st.warning("⚠️ No data matches your search/filter.")
 
+            # --- RAW DATA (no formatting; built only when clicked) ---
+            with st.expander("🗃️ Xogta cayriin (Raw data: Parquet / CSV)"):
+                from raw_export import RAW_FORMATS, changes_since, export_raw
+                raw_format = st.radio("Format", list(RAW_FORMATS), horizontal=True, key="raw_format")
+                extension, raw_mime = RAW_FORMATS[raw_format]
+                stamp = get_local_time().strftime('%Y%m%d_%H%M')
+                st.download_button(
+                    f"📥 Rows shown ({len(filtered_df)})",
+                    data=lambda: export_raw(filtered_df, raw_format).getvalue(),
+                    file_name=f"Mareero_Raw_{stamp}{extension}", mime=raw_mime,
+                    disabled=filtered_df.empty, use_container_width=True,
+                )
+                log_version = change_log.version
+                since = st.number_input("Isbeddelada ka dib (Changes since version)",
+                                        min_value=0, max_value=log_version, value=0, step=1, key="raw_since")
+                # The delta is built once per click: its version (may be below
+                # log_version if rows are still syncing) names the file
+                if st.button("🔄 Diyaari isbeddelada (Prepare changes)", disabled=since >= log_version,
+                             use_container_width=True, key="raw_changes_prepare"):
+                    delta, version = changes_since(store.read(), change_log, since)
+                    st.session_state["raw_changes"] = (since, raw_format, version,
+                                                       export_raw(delta, raw_format).getvalue())
+                prepared = st.session_state.get("raw_changes")
+                if prepared and prepared[:2] == (since, raw_format):
+                    _, _, version, data = prepared
+                    st.download_button(
+                        f"📥 Changes {since} → {version}", data=data,
+                        file_name=f"Mareero_Changes_{since}_{version}{extension}", mime=raw_mime,
+                        use_container_width=True,
+                    )
+                    st.caption(f"Version-ka faylka (file version): {version}. "
+                               "Columns Change (upsert/delete) and Change No show what changed; keep this version "
+                               "and ask for changes since it next time (or: python raw_export.py --since N).")
+                else:
+                    st.caption(f"Version-ka hadda (current version): {log_version}.")
+
             st.markdown("---")
             # --- SMOOTH BATCH DELETE SECTION ---
             with st.expander("🛠️ Wax ka bedel / Tirtir (Edit/Delete)", expanded=True):
                 if not filtered_df.empty:
-                    # Prepare Data
-                    df_with_delete = filtered_df.copy()
-                    df_with_delete.insert(0, "Select", False)
-
-                    # 🔴 START FORM: This prevents the app from loading on every click
-                    with st.form("delete_form"):
-                        st.write("Select rows to edit or delete below:")
-                        
-                        edited_df = st.data_editor(
-                            df_with_delete,
-                            num_rows="fixed",
-                            hide_index=True,
-                            use_container_width=True,
-                            key="data_editor",
-                            column_config={
-                                "Select": st.column_config.CheckboxColumn("❌", width="small")
-                            }
-                        )
-                        
-                        c1, c2 = st.columns([1,1])
-                        with c1:
-                            # Button 1: Save Changes (Edits)
-                            save_btn = st.form_submit_button("💾 Kaydi Isbedelka (Save)")
-                        with c2:
-                            # Button 2: Trigger Delete Logic
-                            delete_btn = st.form_submit_button("🗑️ Diyaari Tirtiridda (Prepare Delete)")
-                    # 🔴 END FORM
+                    # Only one page goes to the browser; edits and ticks on every
+                    # page are kept (by report ID) until Save / Delete
+                    if "edit_batch" not in st.session_state:
+                        st.session_state.edit_batch = EditBatch()
+                    batch = st.session_state.edit_batch
+
+                    s1, s2, s3, s4 = st.columns([2, 2, 1, 1])
+                    with s1:
+                        sort_col = st.selectbox("↕️ Kala saar (Sort by)", EDITOR_SORT_COLUMNS, key="editor_sort", on_change=editor_first_page)
+                    with s2:
+                        sort_order = st.selectbox("Habka (Order)", ["⬇️ Ugu dambeeyay (Newest / Z-A)", "⬆️ Ugu horeeyay (Oldest / A-Z)"], key="editor_order", on_change=editor_first_page)
+                    with s3:
+                        page_size = st.selectbox("Safaf (Rows)", PAGE_SIZES, index=1, key="editor_page_size", on_change=editor_first_page)
+                    n_pages = max(1, -(-len(filtered_df) // page_size))
+                    if st.session_state.get("editor_page", 1) > n_pages:
+                        st.session_state.editor_page = n_pages
+                    with s4:
+                        page_no = st.number_input("Bogga (Page)", min_value=1, max_value=n_pages, step=1, key="editor_page")
+
+                    page_df, page, n_pages = editor_page(filtered_df, sort_col, sort_order.startswith("⬆️"), page_no - 1, page_size)
+                    st.caption(f"Bogga {page + 1} / {n_pages} · safaf {page * page_size + 1}–{page * page_size + len(page_df)} of {len(filtered_df)}")
+
+                    edited_df = st.data_editor(
+                        batch.overlay(page_df),
+                        num_rows="fixed",
+                        hide_index=True,
+                        use_container_width=True,
+                        key=batch.widget_key(page_df),
+                        column_config={
+                            "Select": st.column_config.CheckboxColumn("❌", width="small"),
+                            ID_COLUMN: None,  # hidden, but kept so edits map back to rows
+                            VERSION_COLUMN: None
+                        }
+                    )
+                    batch.absorb(page_df, edited_df)
+                    st.caption(f"✏️ La beddelay (Edited): {len(batch.edits)} · ❌ La xulay (Selected): {len(batch.deletes)} — all pages")
+
+                    c1, c2, c3 = st.columns([1, 1, 1])
+                    with c1:
+                        # Button 1: Save Changes (Edits)
+                        save_btn = st.button("💾 Kaydi Isbedelka (Save)", use_container_width=True)
+                    with c2:
+                        # Button 2: Trigger Delete Logic
+                        delete_btn = st.button("🗑️ Diyaari Tirtiridda (Prepare Delete)", use_container_width=True)
+                    with c3:
+                        if st.button("↩️ Iska daa (Discard)", use_container_width=True, disabled=not len(batch)):
+                            batch.reset()
+                            st.session_state.confirm_delete = False
+                            st.rerun()
 
                     # --- LOGIC HANDLER (Runs only after button click) ---
                     
                     # 1. Handle Save
                     if save_btn:
                         try:
-                            final_df = edited_df.drop(columns=["Select"])
-                            conn.update(spreadsheet=SHEET_URL, worksheet="Sheet1", data=final_df)
-                            st.cache_data.clear()
-                            st.success("✅ Saved Successfully!")
+                            # Only the cells that changed are written (never the whole sheet)
+                            n_updated, _ = batch.commit(store)
+                            batch.reset(keep_deletes=True)
+                            st.success(f"✅ Saved Successfully! ({n_updated} rows)")
                             st.rerun()
+                        except StaleWriteError as e:
+                            batch.reset()
+                            st.warning(f"⚠️ {len(e.ids)} saf qof kale ayaa beddelay, lama kaydin (changed by someone else, not saved). "
+                                       f"{e.applied} saved. Fadlan dib u eeg (please review).")
                         except Exception as e:
                             st.error(f"Error: {e}")
 
                     # 2. Handle Delete Request
                     if delete_btn:
-                        if edited_df["Select"].any():
+                        if batch.deletes:
                             st.session_state.confirm_delete = True
                         else:
                             st.warning("⚠️ Fadlan xulo safafka (Please select rows first).")
 
-                    # 3. Confirmation Box (Outside the form for safety)
+                    # 3. Confirmation Box
                     if st.session_state.get("confirm_delete", False):
-                        st.warning("⚠️ Ma hubtaa inaad tirtirto? (Are you sure?)")
+                        st.warning(f"⚠️ Ma hubtaa inaad tirtirto {len(batch.deletes)} saf? (Are you sure?)")
                         col_yes, col_no = st.columns(2)
                         
                         with col_yes:
                             if st.button("✅ Haa (Yes, Delete)", type="primary", use_container_width=True):
                                 try:
-                                    # Filter out selected rows
-                                    rows_to_keep = edited_df[edited_df["Select"] == False]
-                                    final_df = rows_to_keep.drop(columns=["Select"])
-                                    
-                                    # Update Google Sheet
-                                    conn.update(spreadsheet=SHEET_URL, worksheet="Sheet1", data=final_df)
+                                    # Delete selected rows by ID, keep any edits on the others
+                                    batch.commit(store, deletes=True)
                                     
                                     # Reset State
-                                    st.cache_data.clear()
                                     st.session_state.confirm_delete = False
+                                    batch.reset()
                                     st.success("✅ Deleted Successfully!")
                                     st.rerun()
+                                except StaleWriteError as e:
+                                    st.session_state.confirm_delete = False
+                                    batch.reset()
+                                    st.warning(f"⚠️ {len(e.ids)} saf qof kale ayaa beddelay, lama tirtirin (changed by someone else, not deleted). "
+                                               "Fadlan dib u eeg (please review).")
                                 except Exception as e:
                                     st.error(f"Error: {e}")
                         
@@ -629,5 +608,22 @@ with tab_manager:
                 else:
                     st.info("No data found for this filter.")
 
+            # --- PERFORMANCE (this server process, last 500 calls per operation) ---
+            with st.expander("⏱️ Performance"):
+                perf_summary = perf_recorder.summary()
+                if perf_summary.empty:
+                    st.caption("No timings yet.")
+                else:
+                    st.dataframe(perf_summary, hide_index=True, use_container_width=True)
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        st.download_button("📥 Export JSONL", data=perf_recorder.export_jsonl(),
+                                           file_name=f"mareero_perf_{get_local_time().strftime('%Y%m%d_%H%M')}.jsonl",
+                                           mime="application/x-ndjson", use_container_width=True)
+                    with c2:
+                        if st.button("🧹 Reset", use_container_width=True):
+                            perf_recorder.clear()
+                            st.rerun()
+
 
 
@@ -0,0 +1,41 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+from benchmarks.synthetic import make_reports
+from pdf_report import draw_table, generate_pdf
+
+# Usage: python benchmarks/bench_pdf.py [sizes...]   (default 1000 10000 100000)
+
+
+def bench_table(df):
+    c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+    t0 = time.perf_counter()
+    draw_table(c, df, A4[1] - 50, A4[1])
+    c.save()
+    return time.perf_counter() - t0
+
+
+def bench_full(df):
+    t0 = time.perf_counter()
+    out = generate_pdf(df)
+    return time.perf_counter() - t0, len(out.getvalue())
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'table s':>9} {'table rows/s':>13} {'full s':>8} {'pdf MB':>7}")
+    for n in sizes:
+        df = make_reports(n)
+        t_table = bench_table(df)
+        t_full, size = bench_full(df)
+        print(f"{n:>8} {t_table:>9.2f} {n / t_table:>13,.0f} {t_full:>8.2f} {size / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from benchmarks.synthetic import make_reports
+from localtime import day_window
+from report_cache import parse_reports
+from schema import local_timestamp
+
+# Usage: python benchmarks/bench_schema.py [rows]   (default 100000)
+# "before" = the old layout: object strings, naive Date parsed on the fly.
+
+TEXT_COLUMNS = ["Branch", "Employee", "Category", "Item", "Note", "ID"]
+
+
+def raw_rows(n):
+    # What the backends hand over: every cell is text
+    df = make_reports(n)
+    return df.assign(Date=df['Date'].dt.strftime("%Y-%m-%d %H:%M")).astype(object)
+
+
+def parse_old(raw):
+    df = raw.dropna(how="all")
+    return df.assign(Date=pd.to_datetime(df['Date'], errors='coerce')).astype({c: object for c in TEXT_COLUMNS})
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(n):
+    raw = raw_rows(n)
+    old, new = parse_old(raw), parse_reports(raw)
+    start, end = day_window(7, now=local_timestamp(old['Date'].max()).to_pydatetime())
+    naive_start, naive_end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+
+    cases = [
+        ("parse", lambda: parse_old(raw), lambda: parse_reports(raw)),
+        ("week filter", lambda: old[(old['Date'] >= naive_start) & (old['Date'] < naive_end)],
+                        lambda: new[(new['Date'] >= start) & (new['Date'] < end)]),
+        ("count missing", lambda: len(old[old['Category'] == "Alaabta go'an"]),
+                          lambda: int((new['Category'] == "Alaabta go'an").sum())),
+        ("branch counts", lambda: old['Branch'].value_counts(), lambda: new['Branch'].value_counts()),
+        ("copy for editor", lambda: old.copy(), lambda: new.copy(deep=False)),
+    ]
+    mb_old = old.memory_usage(deep=True).sum() / 1e6
+    mb_new = new.memory_usage(deep=True).sum() / 1e6
+    print(f"{n:,} rows")
+    print(f"{'memory MB':<16} {mb_old:>10.1f} {mb_new:>10.1f}")
+    print(f"{'(ms)':<16} {'before':>10} {'after':>10}")
+    for name, before, after in cases:
+        print(f"{name:<16} {timed(before):>10.2f} {timed(after):>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_reports
+from storage import LocalStore
+
+# Usage: python benchmarks/bench_startup.py [runs]   (default 5)
+# Cold start = a fresh Python process running the script once, the way a
+# new server process serves its first visitor. "staff" is the first
+# render (staff tab); "manager" logs in afterwards (1,000 reports), which
+# loads the reporting engines. Uses the local backend: no network involved.
+
+CHILD = r"""
+import json, sys, time
+HEAVY = ("matplotlib", "reportlab", "xlsxwriter", "streamlit_gsheets", "gspread")
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.secrets["storage_backend"] = "local"
+at.secrets["local_db_path"] = sys.argv[2]
+at.secrets["outbox_path"] = sys.argv[3]
+at.run()
+t_staff = time.perf_counter()
+assert not at.exception, at.exception
+staff_modules = sorted(m for m in HEAVY if m in sys.modules)
+at.text_input[3].input("mareero2025")
+at.button[1].click()
+at.run()
+t_manager = time.perf_counter()
+assert not at.exception, at.exception
+print(json.dumps({
+    "streamlit import": t_import - t0,
+    "staff first render": t_staff - t_import,
+    "manager login": t_manager - t_staff,
+    "staff modules": staff_modules,
+    "manager modules": sorted(m for m in HEAVY if m in sys.modules),
+}))
+"""
+
+
+def cold_start(workdir):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, os.path.join(ROOT, "app.py"),
+         os.path.join(workdir, "bench.db"), os.path.join(workdir, "outbox.db")],
+        capture_output=True, text=True, cwd=workdir, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(runs):
+    with tempfile.TemporaryDirectory() as workdir:
+        df = make_reports(1000)
+        LocalStore(os.path.join(workdir, "bench.db")).append(
+            df.assign(Date=df["Date"].dt.strftime("%Y-%m-%d %H:%M")).to_dict("records"))
+        samples = [cold_start(workdir) for _ in range(runs)]
+    for name in ("streamlit import", "staff first render", "manager login"):
+        values = [s[name] * 1000 for s in samples]
+        print(f"{name:<20} median {statistics.median(values):>8.0f} ms   min {min(values):>8.0f} ms")
+    print("heavy modules after staff render:", ", ".join(samples[-1]["staff modules"]) or "-")
+    print("heavy modules after manager login:", ", ".join(samples[-1]["manager modules"]) or "-")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
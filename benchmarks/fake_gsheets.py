@@ -0,0 +1,141 @@
+import time
+
+import pandas as pd
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range
+
+# ---------------------------------------------------------
+# FAKE GSHEETS CONNECTION (offline benchmarks)
+# Just enough of st-gsheets-connection + gspread for GSheetsStore:
+# every cell is text, like the real sheet. latency = seconds added to
+# each API call to mimic the network round trip.
+# ---------------------------------------------------------
+
+
+class FakeWorksheet:
+    def __init__(self, book, title, values, sheet_id):
+        self.spreadsheet = book
+        self.title = title
+        self.values = values  # list of rows, row 0 = header
+        self.id = sheet_id
+
+    @property
+    def col_count(self):
+        return max((len(r) for r in self.values), default=0)
+
+    def _grid(self, name):
+        g = a1_range_to_grid_range(name)
+        return (g.get("startRowIndex", 0), g.get("endRowIndex", len(self.values)),
+                g.get("startColumnIndex", 0), g.get("endColumnIndex", self.col_count))
+
+    def get(self, name):
+        self.spreadsheet.call()
+        r0, r1, c0, c1 = self._grid(name)
+        rows = [[str(v) for v in row[c0:c1]] for row in self.values[r0:r1]]
+        return [row for row in rows if any(row)]
+
+    def batch_get(self, names):
+        self.spreadsheet.call()
+        out = []
+        for name in names:
+            r0, r1, c0, c1 = self._grid(name)
+            out.append([[str(v) for v in row[c0:c1]] for row in self.values[r0:r1]])
+        return out
+
+    def row_values(self, row):
+        self.spreadsheet.call()
+        return [str(v) for v in self.values[row - 1]] if row <= len(self.values) else []
+
+    def col_values(self, col):
+        self.spreadsheet.call()
+        return [str(r[col - 1]) if col <= len(r) else "" for r in self.values]
+
+    def add_cols(self, n):
+        self.spreadsheet.call()
+
+    def _write(self, name, values):
+        r0, _, c0, _ = self._grid(name)
+        for i, row in enumerate(values):
+            while len(self.values) <= r0 + i:
+                self.values.append([])
+            target = self.values[r0 + i]
+            target.extend([""] * (c0 + len(row) - len(target)))
+            target[c0:c0 + len(row)] = [str(v) for v in row]
+
+    def update(self, name, values, value_input_option=None):
+        self.spreadsheet.call()
+        self._write(name, values)
+
+    def batch_update(self, data, value_input_option=None):
+        self.spreadsheet.call()
+        for item in data:
+            self._write(item["range"], item["values"])
+
+    def append_rows(self, values, **kwargs):
+        self.spreadsheet.call()
+        self.values.extend([str(v) for v in row] for row in values)
+
+
+class FakeSpreadsheet:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.sheets = {}
+
+    def call(self):
+        self.calls += 1
+        if self.latency: time.sleep(self.latency)
+
+    def worksheet(self, title):
+        if title not in self.sheets:
+            raise WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows=1, cols=1):
+        self.call()
+        ws = self.sheets[title] = FakeWorksheet(self, title, [], len(self.sheets))
+        return ws
+
+    def batch_update(self, body):
+        self.call()
+        by_id = {ws.id: ws for ws in self.sheets.values()}
+        for request in body["requests"]:
+            r = request["deleteDimension"]["range"]
+            del by_id[r["sheetId"]].values[r["startIndex"]:r["endIndex"]]
+
+
+class _Client:
+    def __init__(self, book):
+        self.book = book
+
+    def _select_worksheet(self, spreadsheet=None, worksheet=None):
+        return self.book.worksheet(worksheet)
+
+
+class FakeGSheetsConnection:
+    def __init__(self, frames, latency=0.0):
+        # frames: {worksheet title: DataFrame}
+        self.book = FakeSpreadsheet(latency)
+        self.client = _Client(self.book)
+        for title, df in frames.items():
+            self._put(title, df)
+
+    def _put(self, title, df):
+        text = df.astype(object).where(df.notna(), "").astype(str)
+        values = [list(map(str, df.columns))] + text.values.tolist()
+        if title in self.book.sheets:
+            self.book.sheets[title].values = values
+        else:
+            self.book.sheets[title] = FakeWorksheet(self.book, title, values, len(self.book.sheets))
+
+    def read(self, spreadsheet=None, worksheet=None, ttl=None):
+        self.book.call()
+        values = self.book.worksheet(worksheet).values
+        if not values: return pd.DataFrame()
+        header, rows = values[0], values[1:]
+        rows = [list(r) + [""] * (len(header) - len(r)) for r in rows]
+        return pd.DataFrame(rows, columns=header, dtype=object).replace("", None)
+
+    def update(self, spreadsheet=None, worksheet=None, data=None):
+        self.book.call()
+        self._put(worksheet, data)
@@ -0,0 +1,132 @@
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gsheets import FakeGSheetsConnection
+from benchmarks.synthetic import make_reports
+from analytics import compute_trends
+from dashboard import editor_page, filter_reports, kpis, new_report
+from excel_report import generate_excel
+from items import ItemIndex
+from metrics import MetricsRollup, summarize
+from pdf_report import generate_pdf
+from report_cache import CachedStore
+from search import ReportSearchIndex
+from storage import GSheetsStore
+
+# ---------------------------------------------------------
+# BENCHMARK SUITE
+# The app's data path end to end against a fake sheet (no network):
+#   python benchmarks/run.py                        1k, 10k, 100k rows
+#   python benchmarks/run.py 1000000 --skip pdf,excel
+#   python benchmarks/run.py --latency 0.3 --csv before.csv
+# Prints best-of-N milliseconds per step and size; --csv appends the
+# same numbers (plus the git commit) so runs can be compared later.
+# ---------------------------------------------------------
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+REPORT_STEPS = {"pdf", "excel"}  # slow at large sizes: run once
+
+
+def sheet_frame(n):
+    # What the sheet holds: plain text, dates as 'YYYY-MM-DD HH:MM'
+    df = make_reports(n)
+    return df.assign(Date=df["Date"].dt.strftime("%Y-%m-%d %H:%M"))
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def steps(n, latency):
+    # -> (name, callable) in run order; later steps see the earlier appends
+    conn = FakeGSheetsConnection({"Sheet1": sheet_frame(n)}, latency=latency)
+    store = CachedStore(GSheetsStore(conn, "fake", "Sheet1"), sync_every=0)
+    index, rollup, items = ReportSearchIndex(), MetricsRollup(), ItemIndex()
+    store.subscribe(index)
+    store.subscribe(rollup)
+    store.subscribe(items)
+    df = store.read()
+
+    def cold_read():
+        store.invalidate()
+        store.read()
+
+    def append_one():
+        store.append([new_report("Branch 3", "Hodan", "Alaabta go'an (Missing)", "Sonkor", "5 kg")])
+
+    return [
+        ("sheet read + parse", cold_read),
+        ("incremental sync", store.read),
+        ("append 1 report", append_one),
+        ("filter: this week", lambda: filter_reports(store, index, df, days_back=7)),
+        ("filter: today", lambda: filter_reports(store, index, df, days_back=0)),
+        ("search: word", lambda: filter_reports(store, index, df, search_term="sonkor")),
+        ("search: scoped", lambda: filter_reports(store, index, df, search_term='branch:"Branch 3" item:bariis')),
+        ("editor page (sorted)", lambda: editor_page(store.read(), "Item", True, 3, 50)),
+        ("kpis: rollup", lambda: kpis(rollup.summary())),
+        ("kpis: row scan", lambda: kpis(summarize(store.read()))),
+        ("rollup rebuild", lambda: rollup.on_reload(store.read())),
+        ("search index build", lambda: index.on_reload(store.read())),
+        ("item clusters build", lambda: ItemIndex().on_reload(store.read())),
+        ("top missing items", lambda: items.top_items(limit=15)),
+        ("trends + alerts", lambda: compute_trends(store.read(), items.cluster_keys)),
+        ("pdf", lambda: generate_pdf(store.read())),
+        ("excel", lambda: generate_excel(store.read())),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Mareero benchmarks")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake sheet API call")
+    parser.add_argument("--skip", default="", help="comma separated step prefixes, e.g. pdf,excel")
+    parser.add_argument("--csv", help="append results to this file")
+    args = parser.parse_args()
+    skip = [s.strip() for s in args.skip.split(",") if s.strip()]
+
+    results = {}  # (step, rows) -> ms
+    order = []
+    for n in args.sizes:
+        for name, fn in steps(n, args.latency):
+            if any(name.startswith(s) for s in skip): continue
+            if name not in order: order.append(name)
+            results[name, n] = best_ms(fn, 1 if name in REPORT_STEPS else args.repeat)
+            print(f"  {n:>9,} {name:<20} {results[name, n]:>10.1f} ms", file=sys.stderr)
+
+    print(f"\n{'ms (best of %d)' % args.repeat:<20}" + "".join(f"{n:>12,}" for n in args.sizes))
+    for name in order:
+        print(f"{name:<20}" + "".join(
+            f"{results[name, n]:>12.1f}" if (name, n) in results else f"{'-':>12}" for n in args.sizes))
+
+    if args.csv:
+        new_file = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file: writer.writerow(["commit", "latency", "step", "rows", "ms"])
+            commit = git_commit()
+            for (name, n), ms in results.items():
+                writer.writerow([commit, args.latency, name, n, round(ms, 3)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from schema import BRANCHES, CATEGORIES
+
+# ---------------------------------------------------------
+# SYNTHETIC REPORT HISTORY (offline benchmarks)
+# Same branch/category lists as the staff form, busier head office,
+# a few popular items (Zipf-like), and the typos staff really make.
+# ---------------------------------------------------------
+
+ITEMS = [
+    "Sonkor", "Bariis", "Baasto", "Saliid", "Caano boore", "Shaah", "Bur", "Timir",
+    "Khudaar", "Biyo", "Hilib", "Malab", "Digir", "Galley", "Saabuun", "Caano geel",
+    "Qamadi", "Basbaas", "Toon", "Yaanyo", "Basal", "Moos", "Liin", "Kalluun", "Ukun",
+]
+STAFF = ["Ali", "Faarax", "Hodan", "Maryan", "Cabdi", "Xamdi", "Yuusuf", "Ayaan"]
+UNITS = ["kg", "kartoon", "xabo", "jawaan"]
+
+BRANCH_WEIGHTS = [0.3, 0.15, 0.15, 0.15, 0.15, 0.1]  # order of schema.BRANCHES
+CATEGORY_WEIGHTS = [0.5, 0.3, 0.2]                  # order of schema.CATEGORIES
+
+
+def _item_weights():
+    w = 1 / np.arange(1, len(ITEMS) + 1)
+    return w / w.sum()
+
+
+def make_reports(n, seed=0, days=730, end=None):
+    # n reports spread over `days` days ending at `end` (default: now), oldest first
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().floor("min")
+    minutes = np.sort(rng.integers(0, 60 * 24 * days, n))
+    items = rng.choice(ITEMS, n, p=_item_weights()).astype(object)
+    typo = rng.random(n)
+    items[typo < 0.03] = [s.lower() for s in items[typo < 0.03]]
+    items[(typo >= 0.03) & (typo < 0.05)] = [s + " " for s in items[(typo >= 0.03) & (typo < 0.05)]]
+    notes = rng.integers(1, 50, n).astype(str).astype(object) + " " + rng.choice(UNITS, n)
+    notes[rng.random(n) < 0.1] = ""
+    return pd.DataFrame({
+        "Date": end - pd.Timedelta(minutes=60 * 24 * days) + pd.to_timedelta(minutes, unit="m"),
+        "Branch": rng.choice(BRANCHES, n, p=BRANCH_WEIGHTS),
+        "Employee": rng.choice(STAFF, n),
+        "Category": rng.choice(CATEGORIES, n, p=CATEGORY_WEIGHTS),
+        "Item": items,
+        "Note": notes,
+        "ID": [f"{i:012x}" for i in range(n)],
+        "Version": np.ones(n, dtype="int64"),
+    })
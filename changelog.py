@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from storage import ID_COLUMN, VERSION_COLUMN
+
+# ---------------------------------------------------------
+# CHANGE LOG
+# Numbers every change so downstream jobs can ask for "changes since
+# version X" (raw_export.py) instead of a full dump. One SQLite row per
+# report: the Version last seen, the change number (seq) of its last
+# insert / edit / delete, and a deleted flag. Each CachedStore event
+# takes the next number. seq only grows, survives restarts and is
+# shared by every process using the same file.
+#
+# A full reload compares (ID, Version) with the table, so edits made on
+# another server or straight in the sheet are picked up too.
+# ---------------------------------------------------------
+
+
+class ChangeLog:
+    # Subscribes to CachedStore (see report_cache.py)
+    def __init__(self, path="changes.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                f' "{ID_COLUMN}" TEXT PRIMARY KEY,'
+                " version INTEGER,"
+                " seq INTEGER NOT NULL,"
+                " deleted INTEGER NOT NULL DEFAULT 0,"
+                " changed_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_changes_seq ON changes (seq)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def version(self):
+        # Number of the latest change (0 = nothing recorded yet)
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        return row[0] if row else 0
+
+    def _record(self, upserts=(), deletes=()):
+        # upserts: [(id, version)], deletes: [id] -> one new change number
+        if not upserts and not deletes: return
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")  # other processes wait: numbers never repeat
+            row = db.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+            seq = (row[0] if row else 0) + 1
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (seq,))
+            db.executemany(
+                f'INSERT INTO changes ("{ID_COLUMN}", version, seq, deleted, changed_at) VALUES (?, ?, ?, 0, ?)'
+                f' ON CONFLICT("{ID_COLUMN}") DO UPDATE SET version = excluded.version, seq = excluded.seq,'
+                " deleted = 0, changed_at = excluded.changed_at",
+                [(i, v, seq, now) for i, v in upserts],
+            )
+            db.executemany(
+                f'UPDATE changes SET deleted = 1, seq = ?, changed_at = ? WHERE "{ID_COLUMN}" = ? AND deleted = 0',
+                [(seq, now, i) for i in deletes],
+            )
+
+    @staticmethod
+    def _versions(df):
+        # -> [(id, version)] of a report frame
+        if df is None or df.empty or ID_COLUMN not in df.columns: return []
+        versions = df[VERSION_COLUMN] if VERSION_COLUMN in df.columns else pd.Series(1, index=df.index)
+        return list(zip(df[ID_COLUMN].astype(str), versions.astype("int64").tolist()))
+
+    # --- LISTENER ---
+    def on_reload(self, df):
+        if ID_COLUMN not in df.columns: return
+        with self._connect() as db:
+            known = pd.read_sql_query(f'SELECT "{ID_COLUMN}", version, deleted FROM changes', db)
+        current = pd.DataFrame(self._versions(df), columns=[ID_COLUMN, "current"])
+        merged = current.merge(known, on=ID_COLUMN, how="outer")
+        changed = merged["current"].notna() & ((merged["version"] != merged["current"]) | (merged["deleted"] == 1))
+        gone = merged["current"].isna() & (merged["deleted"] == 0)
+        self._record(
+            upserts=list(zip(merged.loc[changed, ID_COLUMN], merged.loc[changed, "current"].astype("int64").tolist())),
+            deletes=merged.loc[gone, ID_COLUMN].tolist(),
+        )
+
+    def on_append(self, rows):
+        self._record(upserts=self._versions(rows))
+
+    def on_update(self, before, after):
+        self._record(upserts=self._versions(after))
+
+    def on_delete(self, rows):
+        self._record(deletes=[i for i, _ in self._versions(rows)])
+
+    # --- READS ---
+    def since(self, seq=0):
+        # -> (DataFrame(ID, seq, deleted, version) changed after `seq`, latest version);
+        # version = the report's Version as of that change
+        with self._connect() as db:
+            db.execute("BEGIN")  # one consistent read of both tables
+            row = db.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+            changes = pd.read_sql_query(
+                f'SELECT "{ID_COLUMN}", seq, deleted, version FROM changes WHERE seq > ? ORDER BY seq', db,
+                params=(int(seq),))
+        changes["deleted"] = changes["deleted"].astype(bool)
+        return changes, (row[0] if row else 0)
@@ -0,0 +1,145 @@
+import hashlib
+
+from localtime import day_window, get_local_time
+from metrics import MISSING_CATEGORY, REQUEST_CATEGORY
+from perf import timed
+from schema import CATEGORY_LABELS, set_cell
+from storage import ID_COLUMN, editor_changes, row_versions
+
+# ---------------------------------------------------------
+# DASHBOARD STEPS
+# What the Streamlit script does with the data, as plain functions
+# (no st.* calls): the app and benchmarks/run.py call the same code.
+# ---------------------------------------------------------
+
+# Time filter -> days back from today (None = everything)
+TIME_FILTERS = {"All Time": None, "Today (Maanta)": 0, "This Week (Isbuucan)": 7}
+# Windows the scheduler pre-renders (report_schedule.py)
+SCHEDULED_FILTERS = ["Today (Maanta)", "This Week (Isbuucan)"]
+
+
+def new_report(branch, employee, category_label, item, note, now=None):
+    # Staff form -> one report row (Date = Mogadishu wall time, minutes)
+    now = now or get_local_time()
+    return {
+        "Date": now.strftime("%Y-%m-%d %H:%M"),
+        "Branch": branch,
+        "Employee": employee,
+        "Category": CATEGORY_LABELS[category_label],
+        "Item": item,
+        "Note": note,
+    }
+
+
+def kpis(summary):
+    # metrics.Summary -> (total, missing, new requests) for the three cards
+    return (summary.total,
+            int(summary.categories.get(MISSING_CATEGORY, 0)),
+            int(summary.categories.get(REQUEST_CATEGORY, 0)))
+
+
+def filter_reports(store, search_index, df, days_back=None, search_term="", branch=None, now=None):
+    # Time + branch filter, then search -> (rows, start, end); start/end None = all time
+    start, end = None, None
+    if days_back is not None or branch:
+        if days_back is not None:
+            start, end = day_window(days_back, now=now)
+        with timed("filter") as sample:
+            df = store.query(start=start, end=end, branch=branch)
+            sample["rows"] = len(df)
+    if search_term:
+        with timed("search") as sample:
+            df = search_index.filter(df, search_term)
+            sample["rows"] = len(df)
+    return df, start, end
+
+
+def view_summary(rollup, df, search_term, start, end, branch=None):
+    # Rollup summary for the PDF, unless a search / branch narrowed the rows further
+    if search_term or branch: return None
+    summary = rollup.summary(start, end)
+    if summary.total != len(df):
+        return None  # a write landed in between; let the PDF count
+    return summary
+
+
+# --- EDIT/DELETE GRID ---
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def editor_page(df, sort_col="Date", ascending=False, page=0, page_size=50):
+    # -> (rows of one page, page actually shown, number of pages).
+    # Only the column is sorted; the page is taken by position, so the
+    # rest of the frame is never copied.
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(int(page), 0), n_pages - 1)
+    if sort_col in df.columns:
+        order = df[sort_col].reset_index(drop=True).sort_values(
+            ascending=ascending, kind="stable", na_position="last").index
+        positions = order[page * page_size:(page + 1) * page_size]
+    else:
+        positions = range(page * page_size, min(len(df), (page + 1) * page_size))
+    return df.iloc[positions].reset_index(drop=True), page, n_pages
+
+
+class EditBatch:
+    # Edits and delete ticks collected across pages (by report ID) and
+    # written in one go. versions = Version of each touched row when the
+    # manager first changed it, so a save over someone else's newer edit
+    # is refused (StaleWriteError).
+    def __init__(self):
+        self.edits = {}       # {id: {column: value}}
+        self.deletes = set()
+        self.versions = {}
+        self.generation = 0   # bumped on reset: the grid widget starts clean
+
+    def __len__(self):
+        return len(self.edits) + len(self.deletes)
+
+    def widget_key(self, page_df, prefix="data_editor"):
+        # The grid keeps its edits by row position, so a page whose rows
+        # changed (other sort, new report on top...) gets a fresh widget;
+        # nothing is lost, the batch holds every change by ID.
+        ids = "\x1f".join(page_df[ID_COLUMN].astype(str)) if ID_COLUMN in page_df.columns else ""
+        return f"{prefix}_{self.generation}_{hashlib.sha1(ids.encode()).hexdigest()[:12]}"
+
+    def overlay(self, page_df, select_col="Select"):
+        # The page as the manager left it: pending values and ticks applied
+        view = page_df.copy()
+        view.insert(0, select_col, view[ID_COLUMN].isin(self.deletes))
+        for row, report_id in enumerate(view[ID_COLUMN]):
+            for col, val in self.edits.get(report_id, {}).items():
+                set_cell(view, row, col, val)
+        return view
+
+    def absorb(self, page_df, edited, select_col="Select"):
+        # Folds the grid's current state for this page into the batch
+        updates, _ = editor_changes(page_df, edited.drop(columns=[select_col]))
+        selected = set(edited.loc[edited[select_col].astype(bool), ID_COLUMN])
+        page_ids = set(page_df[ID_COLUMN])
+        for report_id in page_ids - set(updates):
+            self.edits.pop(report_id, None)  # typed back to the original value
+        self.edits.update(updates)
+        self.deletes = (self.deletes - page_ids) | selected
+        seen = row_versions(page_df, set(updates) | selected) or {}
+        for report_id, version in seen.items():
+            self.versions.setdefault(report_id, version)
+        pending = set(self.edits) | self.deletes
+        self.versions = {i: v for i, v in self.versions.items() if i in pending}
+
+    def commit(self, store, deletes=False):
+        # -> (rows updated, rows deleted); edits on rows being deleted are skipped
+        skip = self.deletes if deletes else set()
+        updates = {i: c for i, c in self.edits.items() if i not in skip}
+        versions = self.versions or None
+        n_updated = store.update_by_id(updates, versions=versions) if updates else 0
+        for report_id in updates.keys() & self.versions.keys():
+            self.versions[report_id] += 1  # our own save: a kept delete tick expects the new Version
+        n_deleted = store.delete_by_id(sorted(self.deletes), versions=versions) if deletes and self.deletes else 0
+        return n_updated, n_deleted
+
+    def reset(self, keep_deletes=False):
+        self.edits = {}
+        if not keep_deletes: self.deletes = set()
+        self.versions = {i: v for i, v in self.versions.items() if i in self.deletes}
+        self.generation += 1
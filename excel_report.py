@@ -0,0 +1,283 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from items import normalize_items
+from perf import output_bytes, timed
+from storage import META_COLUMNS
+
+# Check for xlsxwriter availability to prevent crashes
+try:
+    import xlsxwriter
+    from xlsxwriter.utility import xl_col_to_name
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# ---------------------------------------------------------
+# EXCEL ENGINE (SINGLE SHEET - COLOR CODED)
+# mode="static"      : colors/highlights computed once in pandas and written
+#                      as plain cell formats, streamed with constant_memory.
+#                      Nothing for Excel to evaluate when the file opens.
+# mode="conditional" : the original formula-based conditional formats.
+# ---------------------------------------------------------
+
+SHEET_NAME = 'Warbixin'
+DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'  # same as pandas' default
+CHUNK_ROWS = 4096
+
+# 1. Pastel Colors for Branches (Row Backgrounds)
+BRANCH_COLORS = [
+    '#E3F2FD', # Blue-ish
+    '#E8F5E9', # Green-ish
+    '#FFF3E0', # Orange-ish
+    '#F3E5F5', # Purple-ish
+    '#FBE9E7', # Red-ish
+    '#E0F7FA', # Cyan-ish
+    '#FFFDE7'  # Yellow-ish
+]
+
+# 2. Text Highlights (For Categories/Duplicates)
+DUPLICATE_FONT = {'font_color': '#9C0006', 'bold': True}
+CAT_MISSING_FONT = {'font_color': '#D32F2F', 'bold': True}   # Red Text + Bold
+CAT_REQUEST_FONT = {'font_color': '#1976D2', 'bold': True}   # Blue Text + Bold
+
+# Header row for the static writer (TableStyleMedium9 blue)
+HEADER_STYLE = {'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#4F81BD', 'border': 1}
+
+# Cell "kinds" for the static writer
+PLAIN, DATE, MISSING, REQUEST, DUPLICATE = range(5)
+_KIND_FONTS = {MISSING: CAT_MISSING_FONT, REQUEST: CAT_REQUEST_FONT, DUPLICATE: DUPLICATE_FONT}
+
+
+def _print_setup(sheet):
+    # --- PRINT SETTINGS (A4, Landscape, Fit Width) ---
+    sheet.set_paper(9) # A4
+    sheet.set_landscape()
+    sheet.fit_to_pages(1, 0)
+    sheet.set_margins(left=0.5, right=0.5, top=0.5, bottom=0.5)
+    sheet.repeat_rows(1)
+
+
+def _column_widths(df):
+    # Vectorized AUTO-FIT: longest text per column (+4 padding)
+    widths = []
+    for col in df.columns:
+        longest = df[col].astype(str).fillna("").str.len().max() if len(df) else 0
+        widths.append(max(int(longest), len(str(col))) + 4)
+    return widths
+
+
+# --- STYLE PRECOMPUTATION (vectorized, once per export) ---
+def branch_color_codes(df):
+    # Palette index per row in order of first appearance, -1 = no color
+    if 'Branch' not in df.columns:
+        return pd.Series(-1, index=df.index)
+    codes, _ = pd.factorize(df['Branch'])
+    return pd.Series(codes, index=df.index).where(codes < 0, codes % len(BRANCH_COLORS))
+
+
+def category_kinds(df):
+    # Mirrors the old 'containing' rules: go'an first, then Dadweynaha (case-insensitive)
+    cat = df['Category'].astype("string")
+    kinds = pd.Series(PLAIN, index=df.index)
+    kinds[cat.str.contains("dadweynaha", case=False, regex=False).fillna(False).astype(bool)] = REQUEST
+    kinds[cat.str.contains("go'an", case=False, regex=False).fillna(False).astype(bool)] = MISSING
+    return kinds
+
+
+def duplicate_items(df, item_key=None):
+    # Same item under any spelling: case/spacing/accents folded, or the
+    # fuzzy clusters when item_key (ItemIndex.cluster_keys) is given.
+    # Blanks never count.
+    keys = item_key(df['Item']) if item_key else normalize_items(df['Item'])
+    return keys.duplicated(keep=False) & (keys != "")
+
+
+def _format_table(workbook, bg, kinds_per_column):
+    # Object array indexed [branch color + 1, kind] -> xlsxwriter format.
+    # Only combinations that actually occur are created.
+    table = np.empty((len(BRANCH_COLORS) + 1, 5), dtype=object)
+    used = set()
+    for kinds in kinds_per_column:
+        pairs = np.stack([bg + 1, np.broadcast_to(kinds, bg.shape)])
+        used.update(map(tuple, np.unique(pairs, axis=1).T.tolist()))
+    for b, kind in used:
+        props = {}
+        if b > 0:
+            props.update({'bg_color': BRANCH_COLORS[b - 1], 'border': 1})
+        if kind == DATE:
+            props['num_format'] = DATE_FORMAT
+        props.update(_KIND_FONTS.get(kind, {}))
+        table[b, kind] = workbook.add_format(props)
+    return table
+
+
+def _column_plan(df, item_key=None):
+    # -> per column: (writer name, values getter, per-row kind array or constant)
+    plan = []
+    kinds = {}
+    if 'Category' in df.columns: kinds['Category'] = category_kinds(df).to_numpy()
+    if 'Item' in df.columns: kinds['Item'] = duplicate_items(df, item_key).map({True: DUPLICATE, False: PLAIN}).to_numpy()
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            plan.append(("datetime", s, DATE))
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            plan.append(("number", s, kinds.get(col, PLAIN)))
+        else:
+            plan.append(("string", s, kinds.get(col, PLAIN)))
+    return plan
+
+
+def _write_static(output, df, progress, item_key=None):
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    sheet = workbook.add_worksheet(SHEET_NAME)
+    _print_setup(sheet)
+
+    if df.empty:
+        sheet.write('A1', "No Data Found")
+        workbook.close()
+        return
+
+    (max_row, max_col) = df.shape
+    for i, width in enumerate(_column_widths(df)):
+        sheet.set_column(i, i, width)
+
+    # Excel tables aren't available in constant_memory mode: a styled header
+    # row + autofilter gives the same look and sorting/filtering.
+    header_fmt = workbook.add_format(HEADER_STYLE)
+    for c, column in enumerate(df.columns):
+        sheet.write_string(0, c, str(column), header_fmt)
+    sheet.autofilter(0, 0, max_row, max_col - 1)
+    sheet.freeze_panes(1, 0)
+
+    bg = branch_color_codes(df).to_numpy()
+    plan = _column_plan(df, item_key)
+    formats = _format_table(workbook, bg, [kinds for _, _, kinds in plan])
+    writers = {"datetime": sheet.write_datetime, "number": sheet.write_number, "string": sheet.write_string}
+
+    for start in range(0, max_row, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, max_row)
+        columns = []
+        for kind_name, s, kinds in plan:
+            part = s.iloc[start:stop]
+            if kind_name == "datetime":
+                values = list(part.dt.to_pydatetime())
+            elif kind_name == "number":
+                values = part.tolist()
+            else:
+                values = part.astype(str).tolist()
+            row_kinds = kinds[start:stop] if np.ndim(kinds) else kinds
+            fmts = formats[bg[start:stop] + 1, row_kinds].tolist()
+            columns.append((writers[kind_name], values, fmts, part.isna().tolist()))
+        # constant_memory: each row must be complete before the next one starts
+        for i in range(stop - start):
+            r = start + i + 1
+            for c, (write, values, fmts, missing) in enumerate(columns):
+                if missing[i]:
+                    sheet.write_blank(r, c, None, fmts[i])
+                else:
+                    write(r, c, values[i], fmts[i])
+        progress(0.95 * stop / max_row)
+    workbook.close()
+
+
+def _write_conditional(output, df):
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        workbook = writer.book
+
+        duplicate_fmt = workbook.add_format(DUPLICATE_FONT)
+        cat_missing_fmt = workbook.add_format(CAT_MISSING_FONT)
+        cat_request_fmt = workbook.add_format(CAT_REQUEST_FONT)
+
+        sheet = workbook.add_worksheet(SHEET_NAME)
+        _print_setup(sheet)
+
+        if df.empty:
+            sheet.write('A1', "No Data Found")
+            return
+
+        # 1. Write Data
+        df.to_excel(writer, sheet_name=SHEET_NAME, startrow=1, header=False, index=False)
+
+        (max_row, max_col) = df.shape
+
+        # 2. Create Table
+        column_settings = [{'header': column} for column in df.columns]
+        sheet.add_table(0, 0, max_row, max_col - 1, {
+            'columns': column_settings,
+            'style': 'TableStyleMedium9', # Standard Blue Table
+            'name': 'MasterTable'
+        })
+
+        cols = df.columns.tolist()
+        last_letter = xl_col_to_name(max_col - 1)
+
+        # 3. BRANCH ROW COLORING (one formula rule per branch)
+        if 'Branch' in cols:
+            branch_letter = xl_col_to_name(cols.index('Branch'))
+            full_range = f"A2:{last_letter}{max_row + 1}"
+            for i, branch in enumerate(df['Branch'].unique()):
+                branch_fmt = workbook.add_format({'bg_color': BRANCH_COLORS[i % len(BRANCH_COLORS)], 'border': 1})
+                sheet.conditional_format(full_range, {
+                    'type': 'formula',
+                    'criteria': f'=${branch_letter}2="{branch}"',
+                    'format': branch_fmt
+                })
+
+        # 4. CATEGORY HIGHLIGHTING
+        if 'Category' in cols:
+            l = xl_col_to_name(cols.index('Category'))
+            rng = f"{l}2:{l}{max_row+1}"
+            sheet.conditional_format(rng, {'type': 'text', 'criteria': 'containing', 'value': "go'an", 'format': cat_missing_fmt})
+            sheet.conditional_format(rng, {'type': 'text', 'criteria': 'containing', 'value': "Dadweynaha", 'format': cat_request_fmt})
+
+        # 5. DUPLICATE ITEMS
+        if 'Item' in cols:
+            l = xl_col_to_name(cols.index('Item'))
+            rng = f"{l}2:{l}{max_row+1}"
+            sheet.conditional_format(rng, {'type': 'duplicate', 'format': duplicate_fmt})
+
+        # 6. AUTO-FIT
+        for i, width in enumerate(_column_widths(df)):
+            sheet.set_column(i, i, width)
+
+
+def _local_naive(df):
+    # Excel has no time zones: every writer gets the Mogadishu wall-clock time
+    tz_cols = {col: df[col].dt.tz_localize(None) for col in df.columns
+               if pd.api.types.is_datetime64_any_dtype(df[col]) and df[col].dt.tz is not None}
+    return df.assign(**tz_cols) if tz_cols else df
+
+
+def generate_excel(df, mode="static", out=None, progress=None, item_key=None):
+    # `out` may be a path or file object; progress(fraction 0..1) as in generate_pdf.
+    # item_key: Series of names -> cluster keys for the duplicate highlight (static mode)
+    with timed("excel", rows=len(df)) as sample:
+        output = _render_excel(df, mode, out, progress, item_key)
+        sample["bytes"] = output_bytes(out if out is not None else output)
+    return output
+
+
+def _render_excel(df, mode, out, progress, item_key):
+    output = out if out is not None else io.BytesIO()
+    report = progress or (lambda fraction: None)
+    df = _local_naive(df.drop(columns=META_COLUMNS, errors="ignore"))
+
+    if HAS_XLSXWRITER:
+        # --- ADVANCED MODE ---
+        if mode == "conditional":
+            _write_conditional(output, df)
+        else:
+            _write_static(output, df, report, item_key)
+    else:
+        # --- BASIC FALLBACK ---
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name=SHEET_NAME)
+
+    report(1.0)
+    if out is None:
+        output.seek(0)
+    return output
@@ -0,0 +1,251 @@
+import argparse
+import sys
+from collections import namedtuple
+from datetime import timedelta
+
+import pandas as pd
+
+from items import normalize_items
+from localtime import get_local_time
+from perf import timed
+from schema import BRANCHES, CATEGORIES, CATEGORY_LABELS, TIMEZONE
+from storage import ID_COLUMN, REPORT_COLUMNS
+
+# ---------------------------------------------------------
+# BULK IMPORT
+# Backfills (old paper logs typed into a spreadsheet) and POS stock-out
+# feeds come in as CSV / XLSX with the report columns:
+#   Date, Branch, Category, Item   (required)
+#   Employee, Note, ID             (optional; ID = the feed's own row key)
+# Files are read in chunks, so a 100k-row file never sits in memory
+# whole. Each row is checked against the staff form's choices (BRANCHES,
+# the category names or their labels). Rows already in the store, or
+# repeated in the file, are skipped. The rest go out in batches of
+# `batch_size` through store.append() (one sheet call per batch).
+#
+# If an import stops half way, the batches sent so far are kept. Running
+# the same file again only adds what is missing.
+#   python ingest.py backfill.xlsx --backend local --db mareero.db --dry-run
+# ---------------------------------------------------------
+
+REQUIRED_COLUMNS = ["Date", "Branch", "Category", "Item"]
+DEDUPE_COLUMNS = ["Date", "Branch", "Employee", "Category", "Item", "Note"]
+
+# read / added / duplicates / rejected: row counts; errors: [(line, reason)], first max_errors
+IngestResult = namedtuple("IngestResult", ["read", "added", "duplicates", "rejected", "errors"])
+
+
+def _fold(text):
+    return " ".join(str(text).casefold().split())
+
+
+# Accepted spellings -> stored value ("branch 3", "Alaabta go'an (Missing)", ...)
+BRANCH_LOOKUP = {_fold(b): b for b in BRANCHES}
+CATEGORY_LOOKUP = {**{_fold(label): cat for label, cat in CATEGORY_LABELS.items()},
+                   **{_fold(cat): cat for cat in CATEGORIES}}
+
+
+def _source_name(source, name=None):
+    return name or getattr(source, "name", None) or str(source)
+
+
+def _xlsx_chunks(source, chunksize):
+    # openpyxl read-only mode streams rows instead of building the sheet
+    from openpyxl import load_workbook
+
+    book = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = book.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        chunk = []
+        for row in rows:
+            chunk.append(row[:len(header)])
+            if len(chunk) >= chunksize:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        book.close()
+
+
+def read_chunks(source, name=None, chunksize=5000):
+    # Path or file object -> DataFrames of at most `chunksize` raw rows
+    if _source_name(source, name).lower().endswith((".xlsx", ".xlsm")):
+        return _xlsx_chunks(source, chunksize)
+    # Blank lines are kept (and skipped in validate_chunk) so error line numbers match the file
+    return pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False, skip_blank_lines=False,
+                       skipinitialspace=True, encoding_errors="replace")
+
+
+def _header_map(columns):
+    # File header -> report column, case / spacing insensitive
+    wanted = {_fold(c): c for c in REPORT_COLUMNS + [ID_COLUMN]}
+    return {col: wanted[_fold(col)] for col in columns if _fold(col) in wanted}
+
+
+def _text(values):
+    return values.astype(object).fillna("").astype(str).str.strip()
+
+
+def _local_date(value):
+    try:
+        ts = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return pd.NaT
+    return ts.tz_convert(TIMEZONE).tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def _local_dates(values):
+    # Text -> naive Mogadishu time. Plain dates are already local; a UTC
+    # offset or "Z" (POS exports) is converted, even mixed in one file.
+    try:
+        dates = pd.to_datetime(values, errors="coerce", format="mixed")
+    except ValueError:  # offsets differ between rows: one row at a time
+        return values.map(_local_date).astype("datetime64[ns]")
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+    return dates
+
+
+def validate_chunk(raw, first_line=2, now=None):
+    # -> (clean rows as the staff form writes them, [(line, reason)])
+    raw = raw.rename(columns=_header_map(raw.columns))
+    missing = [c for c in REQUIRED_COLUMNS if c not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    raw = raw.reset_index(drop=True)
+    raw = raw[raw.apply(_text).ne("").any(axis=1)]  # blank lines are not errors
+    latest = (now or get_local_time()).replace(tzinfo=None) + timedelta(days=1)
+
+    dates = _local_dates(raw["Date"])
+    branches = _text(raw["Branch"]).map(_fold).map(BRANCH_LOOKUP)
+    categories = _text(raw["Category"]).map(_fold).map(CATEGORY_LOOKUP)
+    items = _text(raw["Item"])
+
+    problems = pd.Series("", index=raw.index)
+    problems = problems.mask(items == "", "empty Item")
+    problems = problems.mask(categories.isna(), "unknown Category: " + _text(raw["Category"]))
+    problems = problems.mask(branches.isna(), "unknown Branch: " + _text(raw["Branch"]))
+    problems = problems.mask(dates > latest, "Date in the future: " + _text(raw["Date"]))
+    problems = problems.mask(dates.isna(), "bad Date: " + _text(raw["Date"]))
+    bad = problems != ""
+
+    clean = pd.DataFrame({
+        "Date": dates.dt.strftime("%Y-%m-%d %H:%M"),
+        "Branch": branches,
+        "Employee": _text(raw["Employee"]) if "Employee" in raw.columns else "",
+        "Category": categories,
+        "Item": items,
+        "Note": _text(raw["Note"]) if "Note" in raw.columns else "",
+    })
+    if ID_COLUMN in raw.columns:
+        clean[ID_COLUMN] = _text(raw[ID_COLUMN])
+    errors = [(first_line + i, problems[i]) for i in raw.index[bad]]
+    return clean[~bad], errors
+
+
+def fingerprints(df):
+    # One 64-bit hash per report: same minute, branch, staff, category,
+    # item (spelling folded) and note = same report
+    if df.empty: return pd.Series([], dtype="uint64")
+    dates = df["Date"]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        dates = dates.dt.strftime("%Y-%m-%d %H:%M")
+    key = pd.DataFrame({
+        col: dates if col == "Date"
+        else normalize_items(df[col]) if col == "Item"
+        else _text(df[col]) if col in df.columns else ""
+        for col in DEDUPE_COLUMNS
+    })
+    return pd.util.hash_pandas_object(key, index=False)
+
+
+def ingest(store, source, name=None, chunksize=5000, batch_size=2000, dry_run=False,
+           progress=None, max_errors=100, now=None):
+    # -> IngestResult. progress(rows read so far) after each chunk.
+    existing = store.read()
+    seen = set(fingerprints(existing).tolist())
+    seen_ids = set(existing[ID_COLUMN]) if ID_COLUMN in existing.columns else set()
+    del existing
+    n_lines = n_read = added = duplicates = rejected = 0
+    errors = []
+    pending = []
+
+    def flush():
+        nonlocal added, pending
+        if pending and not dry_run:
+            store.append(pending)
+        added += len(pending)
+        pending = []
+
+    with timed("ingest") as sample:
+        for raw in read_chunks(source, name, chunksize):
+            clean, bad = validate_chunk(raw, first_line=n_lines + 2, now=now)
+            n_lines += len(raw)                 # blank lines included: numbering follows the file
+            n_read += len(clean) + len(bad)
+            rejected += len(bad)
+            errors.extend(bad[:max(0, max_errors - len(errors))])
+            if not clean.empty:
+                keys = fingerprints(clean).tolist()
+                for key, row in zip(keys, clean.to_dict("records")):
+                    report_id = row.get(ID_COLUMN)
+                    if key in seen or (report_id and report_id in seen_ids):
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    if report_id: seen_ids.add(report_id)
+                    else: row.pop(ID_COLUMN, None)  # with_ids() assigns one
+                    pending.append(row)
+                    if len(pending) >= batch_size:
+                        flush()
+            if progress: progress(n_read)
+        flush()
+        sample["rows"] = added
+    return IngestResult(n_read, added, duplicates, rejected, errors)
+
+
+# --- CLI ---
+def open_store(backend, db_path=None):
+    # Same backends as the app; gsheets reads .streamlit/secrets.toml
+    from storage import GSheetsStore, LocalStore
+
+    if backend == "local":
+        return LocalStore(db_path or "mareero.db")
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+
+    conn = st.connection("gsheets", type=GSheetsConnection)
+    return GSheetsStore(conn, st.secrets["gcp_sheet_url"], worksheet="Sheet1",
+                        archive_worksheet=st.secrets.get("archive_worksheet", "Archive"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import Mareero reports from CSV / XLSX")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--backend", choices=["gsheets", "local"], default="gsheets")
+    parser.add_argument("--db", help="SQLite file for --backend local (default mareero.db)")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="validate and count, write nothing")
+    args = parser.parse_args()
+
+    store = open_store(args.backend, args.db)
+    failed = False
+    for path in args.files:
+        try:
+            result = ingest(store, path, chunksize=args.chunksize, batch_size=args.batch_size, dry_run=args.dry_run)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        for line, reason in result.errors:
+            print(f"{path}:{line}: {reason}", file=sys.stderr)
+        print(f"{path}: {result.read} read, {result.added} {'to add' if args.dry_run else 'added'}, "
+              f"{result.duplicates} duplicate(s), {result.rejected} rejected")
+        failed = failed or bool(result.rejected)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from metrics import MISSING_CATEGORY, group_counts
+from schema import local_timestamp
+
+# ---------------------------------------------------------
+# ITEM NAMES
+# Staff type item names freely: "Sonkor", "sonkor " and "Sokor" are the
+# same thing. normalize_item() folds case, spacing, punctuation and
+# accents; ItemIndex then clusters names that are one or two typos
+# apart and keeps report counts per cluster, so "top missing items"
+# counts each product once.
+#
+# Fuzzy matching uses a trigram index: a name k edits away shares all
+# but at most 3k of its trigrams, so only names sharing enough of our
+# rarest trigrams are compared (no all-pairs scan), then checked with
+# a bounded edit distance. Clusters are merged transitively.
+# ---------------------------------------------------------
+
+_NOT_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_item(name):
+    # -> folded key, "" for blanks
+    if name is None or name is pd.NA or (isinstance(name, float) and name != name):
+        return ""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_NOT_WORD.sub(" ", text.casefold()).split())
+
+
+def normalize_items(values):
+    # Vectorized: one normalize_item() call per distinct name
+    codes, uniques = pd.factorize(values)
+    keys = pd.Series([normalize_item(u) for u in uniques] + [""], dtype=object)
+    return pd.Series(keys.to_numpy()[codes], index=values.index)
+
+
+def max_edits(name):
+    # Typos tolerated for a name of this length
+    n = len(name)
+    return 0 if n < 4 else 1 if n <= 6 else 2 if n <= 12 else 3
+
+
+def trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def within_edits(a, b, k):
+    # Levenshtein distance <= k, computed on a band of width 2k+1
+    if abs(len(a) - len(b)) > k: return False
+    if a == b: return True
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        lo, hi = max(1, i - k), min(len(b), i + k)
+        cur = [i] + [k + 1] * len(b)
+        for j in range(lo, hi + 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != b[j - 1]))
+        if min(cur[max(0, lo - 1):hi + 1]) > k:
+            return False
+        prev = cur
+    return prev[len(b)] <= k
+
+
+class ItemIndex:
+    # Subscribes to CachedStore (see report_cache.py)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parent = {}                  # union-find over normalized names
+        self._postings = defaultdict(set)  # trigram -> normalized names
+        self._spellings = defaultdict(Counter)  # normalized name -> raw spellings
+        self._counts = Counter()           # (day, name, branch, category) -> reports
+
+    # --- CLUSTERS ---
+    def _find(self, name):
+        root = name
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[name] != root:  # path compression
+            self._parent[name], name = root, self._parent[name]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self._parent[max(ra, rb)] = min(ra, rb)
+
+    def _add_name(self, name):
+        if not name or name in self._parent: return
+        self._parent[name] = name
+        grams = trigrams(name)
+        k = max_edits(name)
+        if k:
+            # Of any s of our trigrams a match shares at least s - 3k
+            rarest = sorted(grams, key=lambda g: len(self._postings.get(g, ())))[:3 * k + 3]
+            need = max(1, len(rarest) - 3 * k)
+            shared = Counter()
+            for g in rarest:
+                shared.update(self._postings.get(g, ()))
+            for other, n in shared.items():
+                if n >= need and abs(len(other) - len(name)) <= k \
+                        and within_edits(name, other, min(k, max_edits(other))):
+                    self._union(name, other)
+        for g in grams:
+            self._postings[g].add(name)
+
+    def cluster_keys(self, values):
+        # Series of spellings -> cluster keys (Excel duplicate flags, trends);
+        # unseen names keep their own normalized key
+        keys = normalize_items(values)
+        with self._lock:
+            lookup = {k: self._find(k) if k in self._parent else k for k in keys.unique()}
+        return keys.map(lookup)
+
+    # --- LISTENER ---
+    def _rows(self, df):
+        # -> (Counter of (day, name, branch, category), Counter of (name, spelling))
+        if 'Item' not in df.columns or df.empty: return Counter(), Counter()
+        items = normalize_items(df['Item'])
+        spelled = pd.DataFrame({"name": items, "raw": df['Item'].astype(str).str.strip()})
+        spellings = spelled[items != ""].value_counts(sort=False)
+        return group_counts(df, items), Counter(dict(spellings.items()))
+
+    def _apply(self, added=None, removed=None, reset=False):
+        with self._lock:
+            if reset:
+                self._counts = Counter()
+                self._spellings = defaultdict(Counter)
+            for frame, sign in ((removed, -1), (added, 1)):
+                if frame is None: continue
+                counts, spellings = self._rows(frame)
+                for (item, raw), n in spellings.items():
+                    self._add_name(item)
+                    self._spellings[item][raw] += sign * n
+                if sign > 0: self._counts.update(counts)
+                else: self._counts.subtract(counts)
+            self._counts = +self._counts
+
+    def on_reload(self, df):
+        # Names (and clusters) are kept: a reload only recounts reports
+        self._apply(added=df, reset=True)
+
+    def on_append(self, rows):
+        self._apply(added=rows)
+
+    def on_update(self, before, after):
+        self._apply(added=after, removed=before)
+
+    def on_delete(self, rows):
+        self._apply(removed=rows)
+
+    # --- VIEWS ---
+    def top_items(self, category=MISSING_CATEGORY, start=None, end=None, limit=10):
+        # -> DataFrame(Item, Reports, Branches, By branch, Spellings), most reported first
+        start = local_timestamp(start) if start is not None else None
+        end = local_timestamp(end) if end is not None else None
+        with self._lock:
+            totals, branches, spellings = Counter(), defaultdict(Counter), defaultdict(Counter)
+            for (day, item, branch, cat), n in self._counts.items():
+                if not item or (category is not None and cat != category): continue
+                if (start is not None or end is not None) and day is None: continue
+                if (start is not None and day < start) or (end is not None and day >= end): continue
+                root = self._find(item)
+                totals[root] += n
+                if branch is not None: branches[root][branch] += n
+            for item, counts in self._spellings.items():
+                root = self._find(item)
+                if root in totals: spellings[root].update(+counts)
+        rows = []
+        for root, n in totals.most_common(limit):
+            names = [s for s, _ in spellings[root].most_common()]
+            rows.append({
+                "Item": names[0] if names else root,
+                "Reports": n,
+                "Branches": len(branches[root]),
+                "By branch": ", ".join(f"{b}: {c}" for b, c in branches[root].most_common()),
+                "Spellings": ", ".join(names),
+            })
+        return pd.DataFrame(rows, columns=["Item", "Reports", "Branches", "By branch", "Spellings"])
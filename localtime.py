@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from schema import TIMEZONE
+
+# --- TIMEZONE (Somalia) ---
+# Built once: pytz.timezone() does a lookup on every call
+LOCAL_TZ = pytz.timezone(TIMEZONE)
+
+
+def get_local_time():
+    return datetime.now(LOCAL_TZ)
+
+
+def day_window(days_back, now=None):
+    # [midnight `days_back` days ago, next midnight) in Mogadishu time
+    today = (now or get_local_time()).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = today + timedelta(days=1)
+    return today - timedelta(days=days_back), end
@@ -0,0 +1,114 @@
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from schema import local_timestamp
+
+# ---------------------------------------------------------
+# METRICS ROLLUP
+# Report counts per (day, branch, category), kept up to date from the
+# CachedStore events. Dashboard KPIs, time-window totals and the PDF
+# summary/charts read a few hundred groups instead of every raw row.
+# ---------------------------------------------------------
+
+MISSING_CATEGORY = "Alaabta go'an"
+DEMAND_CATEGORY = "alaabta Suuqa leh"
+REQUEST_CATEGORY = "bahiyaha Dadweynaha"
+
+# total, categories / branches = count Series sorted like value_counts()
+Summary = namedtuple("Summary", ["total", "categories", "branches"])
+
+
+def _counts(totals):
+    return pd.Series(dict(totals), dtype="int64").sort_values(ascending=False, kind="stable")
+
+
+def summarize(df):
+    # Same Summary straight from raw rows (search results, ad-hoc frames)
+    def column_counts(col):
+        if col not in df.columns: return pd.Series(dtype=int)
+        counts = df[col].value_counts()
+        return counts[counts > 0]  # categoricals also list unused categories
+    return Summary(len(df), column_counts('Category'), column_counts('Branch'))
+
+
+def group_counts(df, item=None):
+    # -> Counter {(day, branch, category): reports}, or keyed
+    # (day, item, branch, category) when an item Series is given.
+    # One groupby: only distinct groups become Python objects.
+    # Missing values become None.
+    if df.empty: return Counter()
+    blank = pd.Series(None, index=df.index, dtype=object)
+    if 'Date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Date']):
+        day = df['Date'].dt.normalize()
+    else:
+        day = blank
+    cols = {"Day": day}
+    if item is not None: cols["Item"] = item
+    cols["Branch"] = df['Branch'] if 'Branch' in df.columns else blank
+    cols["Category"] = df['Category'] if 'Category' in df.columns else blank
+    frame = pd.DataFrame(cols, index=df.index)
+    sizes = frame.groupby(list(cols), observed=True, dropna=False, sort=False).size()
+    sizes = sizes[sizes > 0]
+    # Keys built per index level (code -1 = missing), not per group
+    idx = sizes.index
+    columns = [
+        np.array([None if pd.isna(v) else v for v in level] + [None], dtype=object)[codes]
+        for level, codes in zip(idx.levels, idx.codes)
+    ]
+    return Counter(dict(zip(zip(*columns), sizes.to_numpy().tolist())))
+
+
+class MetricsRollup:
+    # Subscribes to CachedStore (see report_cache.py)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = Counter()
+
+    def on_reload(self, df):
+        groups = group_counts(df)
+        with self._lock:
+            self._groups = groups
+
+    def on_append(self, rows):
+        self._apply(added=rows)
+
+    def on_update(self, before, after):
+        self._apply(added=after, removed=before)
+
+    def on_delete(self, rows):
+        self._apply(removed=rows)
+
+    def _apply(self, added=None, removed=None):
+        with self._lock:
+            groups = self._groups.copy()
+            if removed is not None: groups.subtract(group_counts(removed))
+            if added is not None: groups.update(group_counts(added))
+            self._groups = +groups  # drops groups that reached zero
+
+    def summary(self, start=None, end=None):
+        # start/end: day-aligned [start, end) bounds; None = open ended.
+        # Reports without a valid date only count in the open-ended summary.
+        with self._lock:
+            items = list(self._groups.items())
+        if start is not None or end is not None:
+            start = local_timestamp(start) if start is not None else None
+            end = local_timestamp(end) if end is not None else None
+            items = [
+                (key, n) for key, n in items
+                if key[0] is not None
+                and (start is None or key[0] >= start)
+                and (end is None or key[0] < end)
+            ]
+        total = sum(n for _, n in items)
+        return Summary(total, _counts_by(items, 2), _counts_by(items, 1))
+
+
+def _counts_by(items, position):
+    totals = Counter()
+    for key, n in items:
+        if key[position] is not None:
+            totals[key[position]] += n
+    return _counts(totals)
@@ -0,0 +1,445 @@
+import io
+import threading
+from functools import lru_cache
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.lib import colors
+
+from analytics import BASELINE_WEEKS, WEEKS_COLUMN
+from localtime import get_local_time
+from metrics import MISSING_CATEGORY, REQUEST_CATEGORY, summarize
+from perf import output_bytes, timed
+
+# ---------------------------------------------------------
+# PDF ENGINE
+# ---------------------------------------------------------
+
+HEADER_BG = colors.HexColor("#1E3A8A")  # Navy Blue
+LINE_COLOR = colors.HexColor("#dcdcdc")  # Grey Grid
+ZEBRA = colors.HexColor("#f1f5f9")
+
+# (column, max chars, width, header)
+TABLE_COLUMNS = [
+    ("Category", 15, 80, "TYPE"),
+    ("Item", 25, 135, "ITEM NAME"),
+    ("Branch", 18, 105, "BRANCH"),
+    ("Employee", 14, 85, "STAFF"),
+    ("Note", 20, 110, "NOTES"),
+]
+COL_WIDTHS = [w for _, _, w, _ in TABLE_COLUMNS]
+TABLE_W = sum(COL_WIDTHS)
+ROW_H = 18
+BOTTOM = 60
+CHUNK_ROWS = 2048
+
+# (column, max chars, width, header) of the alerts tables (analytics.py);
+# the last column is chosen per table
+TREND_TABLE_COLUMNS = [("Branch", 16, 95, "BRANCH"), ("Item", 24, 135, "ITEM NAME"), ("Category", 16, 95, "TYPE"),
+                       ("7d", 5, 45, "7 DAYS"), ("30d", 5, 45, "30 DAYS"), ("Baseline/wk", 6, 50, "BASE/WK")]
+TREND_TABLE_ROWS = 20
+
+# "matplotlib" (PNG, original look) or "vector" (ReportLab graphics, no matplotlib at all)
+CHART_BACKEND = "matplotlib"
+PIE_COLORS = ['#ef4444', '#f59e0b', '#3b82f6']
+BAR_COLOR = '#1E3A8A'
+
+# Text colors by category: 0 black, 1 red, 2 blue
+TEXT_COLORS = [colors.black, colors.red, colors.blue]
+_FILL_OPS = ["%g %g %g rg" % (col.red, col.green, col.blue) for col in TEXT_COLORS]
+_ZEBRA_OP = "%g %g %g rg" % (ZEBRA.red, ZEBRA.green, ZEBRA.blue)
+_LINE_OP = "%g %g %g RG" % (LINE_COLOR.red, LINE_COLOR.green, LINE_COLOR.blue)
+# After the first cell, each next cell starts one column width further right
+_CELL_STEPS = [f"{w} 0 Td" for w in COL_WIDTHS[:-1]]
+
+
+def _category_color(cat):
+    if "go'an" in cat or "Maqan" in cat: return 1
+    if 'Dadweynaha' in cat: return 2
+    return 0
+
+
+def _pdf_literal(val):
+    # Plain ASCII cells are escaped by hand; anything else goes through ReportLab
+    if not val.isascii(): return None
+    return "(" + val.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj"
+
+
+# --- TABLE RENDERER ---
+def iter_table_rows(df, chunk_rows=CHUNK_ROWS):
+    # Yields (color_code, cells) per row. Strings are cut a chunk at a time
+    # with vectorized ops, so memory stays flat however long the report is.
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows]
+        cells = []
+        for col, max_chars, _, _ in TABLE_COLUMNS:
+            if col in part.columns:
+                # astype(str) keeps missing cells missing: print them blank
+                cells.append(part[col].astype(str).fillna("").str.slice(0, max_chars).tolist())
+            else:
+                cells.append([""] * len(part))
+        if 'Category' in part.columns:
+            cats = part['Category'].astype(str)
+            # One lookup per distinct category, not per row
+            lookup = {c: _category_color(c) for c in cats.unique()}
+            codes = cats.map(lookup).tolist()
+        else:
+            codes = [0] * len(part)
+        yield from zip(codes, zip(*cells))
+
+
+class _TablePage:
+    # Collects one page of rows and draws it with a handful of PDF operators:
+    # one path for all zebra stripes, one text block, one batch of grid lines.
+    # Going through textOut/drawString/rect per cell costs several times more
+    # (float formatting and width metrics on every call), so the page is
+    # written as raw operators.
+    def __init__(self, c, y_top):
+        self.c = c
+        self.y_top = y_top
+        self.zebra = []
+        self.rules = []
+        self.ops = []
+        self.slow = []
+        self.color = None
+        self.y_last = None
+
+    def add(self, y, row_no, code, cells):
+        if row_no % 2 == 0:
+            self.zebra.append(y)
+        if code != self.color:
+            self.ops.append(_FILL_OPS[code])
+            self.color = code
+        ops = [f"1 0 0 1 45 {y:.2f} Tm"]
+        x = 45
+        for i, val in enumerate(cells):
+            if i: ops.append(_CELL_STEPS[i - 1])
+            lit = _pdf_literal(val)
+            if lit is None:
+                self.slow.append((x, y, code, val))
+            elif val:
+                ops.append(lit)
+            x += COL_WIDTHS[i]
+        self.ops.append(" ".join(ops))
+        self.rules.append((40, y - 6, 40 + TABLE_W, y - 6))
+        self.y_last = y
+
+    def flush(self):
+        c = self.c
+        if self.y_last is None: return
+        # Stripes and grid are plain path operators too (q/Q keeps colors local)
+        if self.zebra:
+            rects = " ".join(f"40 {y - 6:.2f} {TABLE_W} {ROW_H} re" for y in self.zebra)
+            c.addLiteral(f"q {_ZEBRA_OP} {rects} f Q")
+        # The font (Tf) is graphics state, so setFont carries into the text block
+        c.saveState()
+        c.setFont("Helvetica", 9)
+        c.addLiteral("BT\n" + "\n".join(self.ops) + "\nET")
+        c.restoreState()
+        for x, y, code, val in self.slow:
+            c.setFillColor(TEXT_COLORS[code])
+            c.drawString(x, y, val)
+        # Column separators run the full page height instead of one per cell
+        x = 45
+        for w in COL_WIDTHS:
+            self.rules.append((x + w - 5, self.y_last - 5, x + w - 5, self.y_top + 12))
+            x += w
+        segs = " ".join(f"{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l" for x1, y1, x2, y2 in self.rules)
+        c.addLiteral(f"q 0.5 w {_LINE_OP} {segs} S Q")
+
+
+def _draw_table_header(c, y):
+    c.setFillColor(HEADER_BG)
+    c.rect(40, y - 6, TABLE_W, 22, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 9)
+    xp = 45
+    for (_, _, w, h) in TABLE_COLUMNS:
+        c.drawString(xp, y + 2, h)
+        xp += w
+
+
+def draw_table(c, df, y_curr, page_height, progress=None):
+    # Returns the y position after the last row (new pages as needed).
+    # progress(done_fraction) is called once per finished page.
+    _draw_table_header(c, y_curr)
+    y_curr -= 22
+    c.setFont("Helvetica", 9)
+    if df.empty: return y_curr
+
+    page = _TablePage(c, y_curr)
+    for row_no, (code, cells) in enumerate(iter_table_rows(df)):
+        page.add(y_curr, row_no, code, cells)
+        y_curr -= ROW_H
+        if y_curr < BOTTOM:
+            page.flush()
+            if progress: progress((row_no + 1) / len(df))
+            c.showPage()
+            y_curr = page_height - 50
+            _draw_table_header(c, y_curr)
+            y_curr -= 22
+            c.setFont("Helvetica", 9)
+            page = _TablePage(c, y_curr)
+    page.flush()
+    return y_curr
+
+
+# --- CHARTS ---
+# Charts are cached by their value_counts(), so identical aggregates
+# (the same day's report asked for again, another branch filter with the
+# same totals...) are never re-rendered.
+_MPL_LOCK = threading.Lock()  # matplotlib is not thread-safe; downloads run on worker threads
+
+
+def counts_key(series):
+    return tuple((str(k), int(v)) for k, v in series.items())
+
+
+def _figure():
+    # Imported on first use only: staff-only sessions never load matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(4, 3))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig):
+    img = io.BytesIO()
+    fig.savefig(img, format='png', bbox_inches='tight')
+    return img.getvalue()
+
+
+@lru_cache(maxsize=64)
+def pie_png(counts):
+    with _MPL_LOCK:
+        fig = _figure()
+        ax = fig.subplots()
+        ax.pie([v for _, v in counts], labels=[k for k, _ in counts], autopct='%1.0f%%', colors=PIE_COLORS)
+        return _png(fig)
+
+
+@lru_cache(maxsize=64)
+def bar_png(counts):
+    with _MPL_LOCK:
+        fig = _figure()
+        ax = fig.subplots()
+        labels = [k for k, _ in counts]
+        ax.bar(range(len(counts)), [v for _, v in counts], width=0.5, color=BAR_COLOR)
+        ax.set_xticks(range(len(counts)))
+        ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+        ax.set_xlabel('Branch')
+        return _png(fig)
+
+
+@lru_cache(maxsize=64)
+def pie_drawing(counts):
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.piecharts import Pie
+    d = Drawing(220, 165)
+    pie = Pie()
+    pie.x, pie.y, pie.width, pie.height = 50, 25, 115, 115
+    total = sum(v for _, v in counts) or 1
+    pie.data = [v for _, v in counts]
+    pie.labels = [f"{k} ({v * 100 / total:.0f}%)" for k, v in counts]
+    pie.sideLabels = True
+    pie.startAngle, pie.direction = 0, 'anticlockwise'  # same layout as matplotlib
+    pie.slices.strokeColor = colors.white
+    pie.slices.fontName = 'Helvetica'
+    pie.slices.fontSize = 7
+    for i in range(len(counts)):
+        pie.slices[i].fillColor = colors.HexColor(PIE_COLORS[i % len(PIE_COLORS)])
+    d.add(pie)
+    return d
+
+
+@lru_cache(maxsize=64)
+def bar_drawing(counts):
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    d = Drawing(240, 180)
+    bar = VerticalBarChart()
+    bar.x, bar.y, bar.width, bar.height = 30, 55, 200, 115
+    bar.data = [[v for _, v in counts]]
+    bar.bars[0].fillColor = colors.HexColor(BAR_COLOR)
+    bar.valueAxis.valueMin = 0
+    bar.valueAxis.labels.fontName = 'Helvetica'
+    bar.valueAxis.labels.fontSize = 7
+    bar.categoryAxis.categoryNames = [k for k, _ in counts]
+    bar.categoryAxis.labels.angle = 45
+    bar.categoryAxis.labels.boxAnchor = 'ne'
+    bar.categoryAxis.labels.fontName = 'Helvetica'
+    bar.categoryAxis.labels.fontSize = 7
+    d.add(bar)
+    return d
+
+
+def draw_charts(c, summary, y_pos, backend=None):
+    cat_counts = counts_key(summary.categories)
+    branch_counts = counts_key(summary.branches)
+    if (backend or CHART_BACKEND) == "vector":
+        from reportlab.graphics import renderPDF
+        renderPDF.draw(pie_drawing(cat_counts), c, 40, y_pos-220)
+        renderPDF.draw(bar_drawing(branch_counts), c, 300, y_pos-220)
+    else:
+        c.drawImage(ImageReader(io.BytesIO(pie_png(cat_counts))), 40, y_pos-220, width=220, height=165)
+        c.drawImage(ImageReader(io.BytesIO(bar_png(branch_counts))), 300, y_pos-220, width=240, height=180)
+
+
+# --- ALERTS (optional last section) ---
+def _draw_trend_table(c, title, rows, last_col, last_header, y):
+    columns = TREND_TABLE_COLUMNS + [(last_col, 6, 50, last_header)]
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(40, y, title)
+    y -= 20
+    c.setFillColor(HEADER_BG)
+    c.rect(40, y - 6, sum(w for _, _, w, _ in columns), 20, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 8)
+    xp = 45
+    for _, _, w, header in columns:
+        c.drawString(xp, y, header)
+        xp += w
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 8)
+    if rows.empty:
+        y -= ROW_H
+        c.drawString(45, y, "-")
+    for values in rows.head(TREND_TABLE_ROWS)[[col for col, _, _, _ in columns]].itertuples(index=False):
+        y -= ROW_H - 4
+        xp = 45
+        for value, (_, chars, w, _) in zip(values, columns):
+            c.drawString(xp, y, str(value)[:chars])
+            xp += w
+    return y - 30
+
+
+def draw_trends(c, trends, page_height):
+    # Spikes and recurring shortages (analytics.Trends) on a page of their own
+    c.showPage()
+    y = page_height - 60
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y, "4. DIGNIINO (ALERTS)")
+    items = trends.items
+    y = _draw_trend_table(c, "Kor u kac (Spikes: last 7 days vs baseline)",
+                          items[items["Spike"]], "vs baseline", "x BASE", y - 30)
+    return _draw_trend_table(c, "Go'itaan soo noqnoqda (Recurring shortages)",
+                             items[items["Recurring"]].sort_values([WEEKS_COLUMN, "30d"], ascending=False, kind="stable"),
+                             WEEKS_COLUMN, f"WEEKS/{BASELINE_WEEKS}", y)
+
+
+# --- FULL REPORT ---
+def generate_pdf(df, out=None, chart_backend=None, progress=None, summary=None, trends=None):
+    # `out` may be a path or file object (e.g. a file on disk); default is in-memory.
+    # progress(fraction 0..1) is for background jobs (report_jobs.py).
+    # summary: metrics.Summary of df from the rollup; computed from df if missing.
+    # trends: analytics.Trends -> adds the alerts page
+    with timed("pdf", rows=len(df)) as sample:
+        buffer = _render_pdf(df, out, chart_backend, progress, summary, trends)
+        sample["bytes"] = output_bytes(out if out is not None else buffer)
+    return buffer
+
+
+def _render_pdf(df, out, chart_backend, progress, summary, trends=None):
+    summary = summary or summarize(df)
+    report = progress or (lambda fraction: None)
+    buffer = out if out is not None else io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # --- HEADER ---
+    c.setFillColor(HEADER_BG)
+    c.rect(0, height-100, width, 100, fill=1, stroke=0)
+
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 24)
+    c.drawString(40, height-50, "MAREERO SYSTEM")
+    c.setFont("Helvetica", 12)
+    c.drawString(40, height-70, " Mareero General Trading  LLC")
+
+    # Time
+    current_time = get_local_time()
+    c.drawRightString(width-40, height-50, "OPERATIONAL REPORT")
+    c.setFont("Helvetica", 10)
+    c.drawRightString(width-40, height-65, f"Date: {current_time.strftime('%d %B %Y')}")
+    c.drawRightString(width-40, height-80, f"Time: {current_time.strftime('%I:%M %p')}")
+
+    # --- SUMMARY ---
+    y_pos = height - 140
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y_pos, "1. KOOBITAAN (SUMMARY)")
+
+    total = summary.total
+    missing = int(summary.categories.get(MISSING_CATEGORY, 0))
+    requests = int(summary.categories.get(REQUEST_CATEGORY, 0))
+
+    # Boxes
+    box_w, box_h = 160, 50
+    start_x = 40
+    metrics = [("Total Reports", str(total)), ("Alaabta go'an", str(missing)), ("Requests", str(requests))]
+
+    for i, (label, value) in enumerate(metrics):
+        x = start_x + (i * 175)
+        c.setStrokeColor(colors.lightgrey)
+        c.roundRect(x, y_pos-60, box_w, box_h, 6, fill=0, stroke=1)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 16)
+        c.drawCentredString(x + box_w/2, y_pos-35, value)
+        c.setFillColor(colors.grey)
+        c.setFont("Helvetica", 10)
+        c.drawCentredString(x + box_w/2, y_pos-50, label)
+
+    # --- CHARTS ---
+    y_pos -= 80
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y_pos, "2. SHAXDA XOGTA (CHARTS)")
+
+    if not df.empty:
+        try:
+            with timed("pdf.charts"):
+                draw_charts(c, summary, y_pos, backend=chart_backend)
+        except Exception:
+            pass
+    report(0.1)
+
+    # --- TABLE ---
+    y_pos -= 240
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y_pos, "3. LIISKA FAAHFAAHSAN (DETAILS)")
+
+    if not df.empty and 'Category' in df.columns:
+        df = df.sort_values(by=['Category'])
+    with timed("pdf.table", rows=len(df)):
+        y_curr = draw_table(c, df, y_pos - 30, height, progress=lambda f: report(0.1 + 0.85 * f))
+
+    if trends is not None:
+        y_curr = draw_trends(c, trends, height)
+
+    # --- SIGNATURE ---
+    if y_curr < 80:
+        c.showPage()
+        y_curr = height - 100
+
+    y_sig = 50
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+
+    c.line(40, y_sig, 200, y_sig)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 10)
+    c.drawString(40, y_sig-15, "Manager Signature")
+
+    c.line(350, y_sig, 510, y_sig)
+    c.drawString(350, y_sig-15, "Date & Stamp")
+
+    c.save()
+    report(1.0)
+    if out is None:
+        buffer.seek(0)
+    return buffer
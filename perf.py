@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# ---------------------------------------------------------
+# PERFORMANCE TIMINGS
+# Hot paths (sheet reads/writes, filter/search, PDF chart/table phases,
+# Excel) record latency, rows and bytes into a rolling window per
+# operation. The manager "Performance" panel shows p50/p95; with a log
+# path every sample is also appended as one JSON line, so numbers from
+# before and after a deployment can be compared.
+# ---------------------------------------------------------
+
+
+def frame_bytes(df):
+    # Shallow size (no per-string scan): cheap enough for every call
+    return int(df.memory_usage(index=False).sum()) if df is not None else 0
+
+
+def output_bytes(out):
+    # Size of a finished report: a path on disk or a file object
+    if isinstance(out, (str, os.PathLike)):
+        return os.path.getsize(out)
+    return out.getbuffer().nbytes if hasattr(out, "getbuffer") else out.tell()
+
+
+def _percentile(values, q):
+    # Nearest rank on sorted values
+    if not values: return None
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+class PerfRecorder:
+    def __init__(self, window=500, log_path=None):
+        self.window = window          # samples kept per operation
+        self.log_path = log_path      # JSON lines file (None = memory only)
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, name, seconds, rows=None, nbytes=None):
+        sample = {"ts": round(time.time(), 3), "op": name, "ms": round(seconds * 1000, 3),
+                  "rows": rows, "bytes": nbytes}
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+            self._samples[name].append(sample)
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a") as f:
+                        f.write(json.dumps(sample) + "\n")
+                except OSError:
+                    pass  # timings must never break the app
+
+    @contextmanager
+    def timed(self, name, rows=None, nbytes=None):
+        # with timed("pdf") as sample: ...; sample["rows"] = n  (sizes once known)
+        sample = {"rows": rows, "bytes": nbytes}
+        t0 = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            self.record(name, time.perf_counter() - t0, sample["rows"], sample["bytes"])
+
+    def samples(self):
+        with self._lock:
+            return [s for samples in self._samples.values() for s in samples]
+
+    def summary(self):
+        # -> one row per operation: calls in window, p50/p95/max ms, last rows/bytes
+        with self._lock:
+            items = [(name, list(samples)) for name, samples in sorted(self._samples.items())]
+        rows = []
+        for name, samples in items:
+            ms = sorted(s["ms"] for s in samples)
+            rows.append({
+                "Operation": name, "Calls": len(ms),
+                "p50 ms": _percentile(ms, 50), "p95 ms": _percentile(ms, 95), "Max ms": ms[-1],
+                "Rows": samples[-1]["rows"], "Bytes": samples[-1]["bytes"],
+            })
+        columns = ["Operation", "Calls", "p50 ms", "p95 ms", "Max ms", "Rows", "Bytes"]
+        return pd.DataFrame(rows, columns=columns).astype({"Rows": "Int64", "Bytes": "Int64"})
+
+    def export_jsonl(self):
+        return "".join(json.dumps(s) + "\n" for s in sorted(self.samples(), key=lambda s: s["ts"]))
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+
+
+# One recorder per process, shared by every module and session
+recorder = PerfRecorder()
+timed = recorder.timed
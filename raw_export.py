@@ -0,0 +1,138 @@
+import argparse
+import io
+import sys
+
+import pandas as pd
+
+from perf import output_bytes, timed
+from storage import ID_COLUMN, META_COLUMNS, REPORT_COLUMNS, VERSION_COLUMN
+
+# ---------------------------------------------------------
+# RAW DATA EXPORT
+# The rows themselves for the accounting team's own tools, with no
+# styling pass:
+#   parquet  typed columns (timestamps, categories), zstd compressed
+#   csv      plain text, Date as "YYYY-MM-DD HH:MM" like the sheet
+# Both are written in chunks of CHUNK_ROWS rows (Parquet row groups).
+# changes_since() builds the delta export from ChangeLog: the rows
+# inserted or edited after version X, plus one "delete" row per removed
+# report. Downstream jobs keep the version they got and ask again.
+#   python raw_export.py out.parquet --since 1520 --backend local
+# ---------------------------------------------------------
+
+try:
+    import pyarrow  # noqa: F401  (ships with streamlit)
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+# format -> (extension, mime)
+RAW_FORMATS = {"csv": (".csv", "text/csv")}
+if HAS_PARQUET:
+    RAW_FORMATS = {"parquet": (".parquet", "application/vnd.apache.parquet"), **RAW_FORMATS}
+CHUNK_ROWS = 50_000
+CHANGE_COLUMN = "Change"   # "upsert" / "delete" in delta exports
+SEQ_COLUMN = "Change No"   # ChangeLog number of the row's last change
+
+
+def raw_frame(df):
+    # Report columns in a fixed order, nothing else (no grid / search helpers)
+    extra = [c for c in (CHANGE_COLUMN, SEQ_COLUMN) if c in df.columns]
+    return df[[c for c in extra + META_COLUMNS + REPORT_COLUMNS if c in df.columns]]
+
+
+def write_parquet(df, out, chunk_rows=CHUNK_ROWS, compression="zstd"):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(out, schema, compression=compression) as writer:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema,
+                                                    preserve_index=False))
+
+
+def write_csv(df, out, chunk_rows=CHUNK_ROWS):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if "Date" in chunk.columns and pd.api.types.is_datetime64_any_dtype(chunk["Date"]):
+            chunk = chunk.assign(Date=chunk["Date"].dt.strftime("%Y-%m-%d %H:%M"))
+        chunk.to_csv(text, index=False, header=start == 0)
+    text.flush()
+    text.detach()  # leave `out` open for the caller
+
+
+def export_raw(df, fmt="parquet", out=None):
+    # -> `out` (a binary file object) or a new BytesIO, rewound
+    buffer = out if out is not None else io.BytesIO()
+    frame = raw_frame(df)
+    with timed(f"export.{fmt}", rows=len(frame)) as sample:
+        if fmt == "parquet":
+            write_parquet(frame, buffer)
+        elif fmt == "csv":
+            write_csv(frame, buffer)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        sample["bytes"] = output_bytes(buffer)
+    if out is None:
+        buffer.seek(0)
+    return buffer
+
+
+def changes_since(df, change_log, since=0):
+    # -> (rows changed after version `since` with Change / Change No columns, latest version)
+    changes, version = change_log.since(since)
+    live = changes[~changes["deleted"]]
+    seq = live.set_index(ID_COLUMN)["seq"]
+    upserts = df[df[ID_COLUMN].isin(seq.index)] if ID_COLUMN in df.columns else df.iloc[:0]
+    upserts = upserts.assign(**{CHANGE_COLUMN: "upsert", SEQ_COLUMN: upserts[ID_COLUMN].map(seq).to_numpy()})
+    gone = changes[changes["deleted"]]
+    deletes = pd.DataFrame({ID_COLUMN: gone[ID_COLUMN].to_numpy(), CHANGE_COLUMN: "delete",
+                            SEQ_COLUMN: gone["seq"].to_numpy()})
+    delta = pd.concat([upserts, deletes], ignore_index=True) if not deletes.empty else upserts
+    # Another process may have logged changes this frame has not synced yet
+    # (a new row, or an edit: the frame's Version is below the logged one).
+    # Stop just before the first of them, so the next pull includes it.
+    behind = ~seq.index.isin(upserts[ID_COLUMN])
+    if VERSION_COLUMN in upserts.columns:
+        logged = live.set_index(ID_COLUMN)["version"]
+        frame_versions = pd.to_numeric(upserts.set_index(ID_COLUMN)[VERSION_COLUMN], errors="coerce")
+        older = frame_versions[frame_versions < logged.reindex(frame_versions.index)].index
+        behind |= seq.index.isin(older)
+    if behind.any():
+        version = int(seq[behind].min()) - 1
+        delta = delta[delta[SEQ_COLUMN] <= version]
+    return delta.sort_values(SEQ_COLUMN, kind="stable").reset_index(drop=True), version
+
+
+# --- CLI ---
+def main():
+    from changelog import ChangeLog
+    from ingest import open_store
+    from report_cache import parse_reports
+
+    parser = argparse.ArgumentParser(description="Export Mareero reports as Parquet / CSV")
+    parser.add_argument("out", help="file to write; the extension picks the format (.parquet / .csv)")
+    parser.add_argument("--since", type=int, help="only changes after this version (see the printed version)")
+    parser.add_argument("--backend", choices=["gsheets", "local"], default="gsheets")
+    parser.add_argument("--db", help="SQLite file for --backend local (default mareero.db)")
+    parser.add_argument("--changelog", default="changes.db", help="the app's change log file")
+    args = parser.parse_args()
+
+    fmt = "csv" if args.out.lower().endswith(".csv") else "parquet"
+    if fmt not in RAW_FORMATS:
+        sys.exit("Parquet needs pyarrow (pip install pyarrow), or write a .csv")
+    df = parse_reports(open_store(args.backend, args.db).read())
+    change_log = ChangeLog(args.changelog)
+    change_log.on_reload(df)  # picks up anything the app has not seen yet
+    version = change_log.version
+    if args.since is not None:
+        df, version = changes_since(df, change_log, args.since)
+    with open(args.out, "wb") as f:
+        export_raw(df, fmt, out=f)
+    print(f"{args.out}: {len(df)} row(s), version {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from schema import apply_schema, concat_reports, local_timestamp, parse_dates, set_cell
+from storage import (ID_COLUMN, REPORT_COLUMNS, VERSION_COLUMN, ReportStore, StaleWriteError, filter_frame,
+                     new_rows, with_ids)
+
+# ---------------------------------------------------------
+# INCREMENTAL SYNC CACHE
+# One parsed DataFrame per server process. A rerun only asks the
+# backend for rows past the high-water mark (len of the cache), and
+# this app's own writes are applied in place instead of clearing
+# st.cache_data for everyone. The frame is archive rows followed by hot
+# rows; periodic full reloads only re-read the hot partition.
+#
+# All writes from this process go through one lock, so two sessions on the
+# same server never interleave their sheet calls. Conflicts with other
+# servers are caught by the store's version check (StaleWriteError).
+#
+# Derived indexes (search, rollups, ...) subscribe() and get told
+# exactly which rows changed:
+#   on_reload(df), on_append(rows), on_update(before, after), on_delete(rows)
+#
+# The table every session sees is a Snapshot: never changed in place. A
+# sync or write builds the next frame and publishes it in one reference
+# swap with a new version number, so readers never see half a write.
+# Sessions get zero-copy views (copy-on-write: a session that modifies
+# its view copies only what it touches), and filtered views are shared
+# per version, so N managers on "This Week" hold one copy, not N.
+#
+# Date-bounded queries use a DateIndex (row positions sorted by Date):
+# two binary searches find the range, so "Today" costs the rows of today,
+# not a scan of the whole history. Appends of new reports (dated now)
+# extend it; other writes rebuild it on the next query.
+# ---------------------------------------------------------
+
+# version: bumps on every publish; n_archive: leading rows from the archive
+Snapshot = namedtuple("Snapshot", ["version", "df", "n_archive"])
+# order: positions of the dated rows, oldest first; values: their Date as int64 ns (UTC)
+DateIndex = namedtuple("DateIndex", ["version", "order", "values"])
+
+
+def parse_reports(df):
+    # Raw backend rows -> typed frame (see schema.py)
+    df = df.dropna(how="all")
+    if not df.empty:
+        df = apply_schema(df)
+    return df.reset_index(drop=True)
+
+
+def _date_values(dates):
+    # -> (int64 ns per row, mask of rows with a date)
+    dates = parse_dates(dates).dt.tz_convert(None)
+    return dates.to_numpy("datetime64[ns]").astype("int64"), dates.notna().to_numpy()
+
+
+def build_date_index(df, version=None):
+    values, dated = _date_values(df["Date"])
+    order = np.flatnonzero(dated)
+    order = order[np.argsort(values[order], kind="stable")]
+    return DateIndex(version, order, values[order])
+
+
+class CachedStore(ReportStore):
+    def __init__(self, store, sync_every=5, full_reload_every=300, archive_reload_every=3600, max_views=32):
+        self.store = store
+        self.sync_every = sync_every                # seconds between tail fetches
+        self.full_reload_every = full_reload_every  # catches edits made outside this server
+        self.archive_reload_every = archive_reload_every
+        self._lock = threading.RLock()        # guards the published snapshot
+        self._write_lock = threading.Lock()   # serializes backend writes
+        self._snap = None
+        self._version = 0
+        self._views = OrderedDict()  # query args -> filtered frame of the current snapshot
+        self._dates = None           # DateIndex of the current snapshot (built on first query)
+        self.max_views = max_views
+        self._last_sync = 0.0
+        self._last_full = 0.0
+        self._last_archive = 0.0
+        self._listeners = []
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            if self._snap is not None:
+                listener.on_reload(self._snap.df)
+
+    def _notify(self, event, *frames):
+        for listener in self._listeners:
+            getattr(listener, event)(*frames)
+
+    def _publish(self, df, n_archive=None, dates=None):
+        # Called with _lock held; the only place the snapshot changes.
+        # dates: DateIndex of df when the caller can derive it cheaply
+        if n_archive is None: n_archive = self._snap.n_archive
+        self._version += 1
+        self._snap = Snapshot(self._version, df, n_archive)
+        self._dates = dates._replace(version=self._version) if dates is not None else None
+        self._views.clear()
+
+    def _appended_dates(self, new_rows):
+        # DateIndex after appending new_rows, if they sort after every
+        # known date (the usual case: reports are dated when submitted)
+        idx, snap = self._dates, self._snap
+        if idx is None or idx.version != snap.version or "Date" not in new_rows.columns: return None
+        values, dated = _date_values(new_rows["Date"])
+        order = np.flatnonzero(dated)
+        order = order[np.argsort(values[order], kind="stable")]
+        if len(order) and len(idx.values) and values[order[0]] < idx.values[-1]: return None
+        return DateIndex(None, np.concatenate([idx.order, len(snap.df) + order]),
+                         np.concatenate([idx.values, values[order]]))
+
+    # --- READS ---
+    def _full_reload(self):
+        now = time.monotonic()
+        hot = parse_reports(self.store.read_hot(ttl=0))
+        archive = None
+        snap = self._snap
+        if snap is not None and ID_COLUMN in snap.df.columns and ID_COLUMN in hot.columns \
+                and now - self._last_archive <= self.archive_reload_every:
+            # Old rows rarely change: keep them, unless hot rows went missing
+            # (another server may have archived them)
+            if snap.df[ID_COLUMN].iloc[snap.n_archive:].isin(hot[ID_COLUMN]).all():
+                archive = snap.df.iloc[:snap.n_archive]
+        if archive is None:
+            archive = parse_reports(self.store.read_archive())
+            self._last_archive = now
+        if ID_COLUMN in archive.columns and ID_COLUMN in hot.columns:
+            # A row in both (re-dated, half-finished rollover) counts as hot
+            archive = archive[~archive[ID_COLUMN].isin(hot[ID_COLUMN])]
+        self._publish(concat_reports([archive, hot]) if not archive.empty else hot, len(archive))
+        self._last_sync = self._last_full = now
+        self._notify("on_reload", self._snap.df)
+
+    def _sync_tail(self):
+        df = self._snap.df
+        n_hot = len(df) - self._snap.n_archive
+        if n_hot == 0:
+            return self._full_reload()
+        # Re-read the last known row too: if its ID moved, rows were
+        # inserted/deleted behind our back and a full reload is safer.
+        tail = self.store.read_since(n_hot - 1)
+        if tail.empty or ID_COLUMN not in tail.columns or tail[ID_COLUMN].iloc[0] != df[ID_COLUMN].iloc[-1]:
+            return self._full_reload()
+        new_rows = parse_reports(tail.iloc[1:])
+        if not new_rows.empty:
+            self._publish(concat_reports([df, new_rows]), dates=self._appended_dates(new_rows))
+            self._notify("on_append", new_rows)
+        self._last_sync = time.monotonic()
+
+    def snapshot(self, ttl=None):
+        # -> the current Snapshot, synced with the backend first if due
+        with self._lock:
+            now = time.monotonic()
+            snap = self._snap
+            if snap is None or ID_COLUMN not in snap.df.columns or now - self._last_full > self.full_reload_every:
+                self._full_reload()
+            elif now - self._last_sync > (self.sync_every if ttl is None else ttl):
+                self._sync_tail()
+            return self._snap
+
+    @property
+    def version(self):
+        return self._version
+
+    def read(self, ttl=None):
+        # Zero-copy view of the shared frame; edits to it stay in the caller's copy
+        return self.snapshot(ttl).df.copy(deep=False)
+
+    def read_since(self, offset):
+        return self.read().iloc[offset:]
+
+    def query(self, start=None, end=None, branch=None, category=None):
+        # Answered from the cached frame, no backend round trip. Each filter
+        # is computed once per snapshot version and shared by all sessions.
+        snap = self.snapshot()
+        args = (start, end, branch, category)
+        with self._lock:
+            rows = self._views.get(args) if self._snap is snap else None
+            if rows is not None:
+                self._views.move_to_end(args)
+        if rows is None:
+            rows = self._filter(snap, start, end, branch, category)
+            with self._lock:
+                if self._snap is snap:  # not if a write published meanwhile
+                    self._views[args] = rows
+                    while len(self._views) > self.max_views:
+                        self._views.popitem(last=False)
+        return rows.copy(deep=False)
+
+    def _date_index(self, snap):
+        idx = self._dates
+        if idx is None or idx.version != snap.version:
+            idx = build_date_index(snap.df, snap.version)
+            with self._lock:
+                if self._snap is snap:
+                    self._dates = idx
+        return idx
+
+    def _filter(self, snap, start, end, branch, category):
+        df = snap.df
+        if (start is None and end is None) or df.empty or not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+            return filter_frame(df, start, end, branch, category)
+        # Binary search the sorted dates, then filter just that slice
+        idx = self._date_index(snap)
+        lo = np.searchsorted(idx.values, local_timestamp(start).value) if start is not None else 0
+        hi = np.searchsorted(idx.values, local_timestamp(end).value) if end is not None else len(idx.values)
+        pos = np.sort(idx.order[lo:max(lo, hi)])
+        if len(pos) and pos[-1] - pos[0] + 1 == len(pos):
+            rows = df.iloc[pos[0]:pos[-1] + 1]  # rows stored in date order: a zero-copy slice
+        else:
+            rows = df.take(pos)
+        return filter_frame(rows, branch=branch, category=category)
+
+    def rollover(self, before):
+        with self._write_lock:
+            count = self.store.rollover(before)
+        if count:
+            self.invalidate()
+        return count
+
+    def invalidate(self):
+        with self._lock:
+            self._snap = None
+            self._dates = None
+            self._views.clear()
+
+    # --- WRITES (write-through, then patch the cached frame) ---
+    def append(self, rows):
+        rows = with_ids(rows)
+        with self._write_lock:
+            count = self.store.append(rows)
+        with self._lock:
+            if self._snap is not None and ID_COLUMN in self._snap.df.columns:
+                ids = self._snap.df[ID_COLUMN]
+                rows = new_rows(rows, ids[ids.isin([r[ID_COLUMN] for r in rows])])  # a re-sent batch is already here
+            if self._snap is not None and rows:
+                added = parse_reports(pd.DataFrame(rows))
+                self._publish(concat_reports([self._snap.df, added]), dates=self._appended_dates(added))
+                self._notify("on_append", added)
+        return count
+
+    def existing_ids(self, ids):
+        return self.store.existing_ids(ids)
+
+    def _write(self, method, *args):
+        with self._write_lock:
+            try:
+                return getattr(self.store, method)(*args)
+            except StaleWriteError:
+                self.invalidate()  # someone else changed these rows: show their version
+                raise
+
+    def update_by_id(self, updates, versions=None):
+        count = self._write("update_by_id", updates, versions)
+        with self._lock:
+            if self._snap is not None and updates:
+                df = self._snap.df.copy(deep=False)
+                pos = pd.Series(df.index, index=df[ID_COLUMN])
+                touched = [pos[i] for i in updates if i in pos.index]
+                before = df.loc[touched].copy()
+                # Fresh copies of just the edited columns: the published frame stays untouched
+                edited = {c for changes in updates.values() for c in changes if c in REPORT_COLUMNS} | {VERSION_COLUMN}
+                for col in edited & set(df.columns):
+                    df[col] = df[col].copy()
+                for report_id, changes in updates.items():
+                    if report_id not in pos.index: continue
+                    changes = {c: v for c, v in changes.items() if c in REPORT_COLUMNS and c in df.columns}
+                    for col, val in changes.items():
+                        set_cell(df, pos[report_id], col, val)
+                    if changes and VERSION_COLUMN in df.columns:
+                        df.at[pos[report_id], VERSION_COLUMN] += 1
+                dates = self._dates if "Date" not in edited else None  # rows kept their positions
+                self._publish(df, dates=dates if dates is not None and dates.version == self._snap.version else None)
+                if touched:
+                    self._notify("on_update", before, df.loc[touched])
+        return count
+
+    def delete_by_id(self, ids, versions=None):
+        ids = list(ids)
+        count = self._write("delete_by_id", ids, versions)
+        with self._lock:
+            snap = self._snap
+            if snap is not None and ids:
+                gone = snap.df[ID_COLUMN].isin(ids)
+                deleted = snap.df[gone]
+                self._publish(snap.df[~gone].reset_index(drop=True),
+                              snap.n_archive - int(gone.iloc[:snap.n_archive].sum()))
+                if not deleted.empty:
+                    self._notify("on_delete", deleted)
+        return count
+
+    def replace(self, df):
+        with self._write_lock:
+            self.store.replace(df)
+        self.invalidate()
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# ---------------------------------------------------------
+# BACKGROUND REPORT JOBS
+# PDF/Excel builds run on a small thread pool instead of the Streamlit
+# script thread. Finished files land in a bounded on-disk cache keyed by
+# (report type, filter params, content hash of the filtered frame), so
+# every manager asking for the same view shares one render - across
+# sessions, reruns and even server restarts.
+# ---------------------------------------------------------
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+EXTENSIONS = {"pdf": ".pdf", "excel": ".xlsx"}
+
+
+def frame_digest(df):
+    # Data version of a view: changes whenever any of its cells change
+    h = hashlib.sha1()
+    h.update("|".join(map(str, df.columns)).encode())
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def artifact_key(kind, params, df):
+    h = hashlib.sha1()
+    h.update(json.dumps([kind, params], sort_keys=True, default=str).encode())
+    h.update(frame_digest(df).encode())
+    return f"{kind}-{h.hexdigest()[:20]}"
+
+
+class ArtifactCache:
+    # Plain files in one directory; least recently used go first once
+    # either limit is exceeded. A hit refreshes the file's mtime.
+    def __init__(self, directory, max_files=64, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, kind):
+        return os.path.join(self.directory, key + EXTENSIONS.get(kind, ""))
+
+    def get(self, key, kind):
+        path = self.path(key, kind)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def new_temp(self, kind):
+        fd, tmp = tempfile.mkstemp(suffix=".part", dir=self.directory)
+        os.close(fd)
+        return tmp
+
+    def put(self, tmp, key, kind):
+        # Atomic: readers never see a half-written report
+        path = self.path(key, kind)
+        os.replace(tmp, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+            files.sort(reverse=True)
+            total = 0
+            for i, (_, size, path) in enumerate(files):
+                total += size
+                if i >= self.max_files or total > self.max_bytes:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+
+class ReportJob:
+    def __init__(self, key, kind, status=QUEUED, path=None):
+        self.key = key
+        self.kind = kind
+        self.status = status
+        self.progress = 1.0 if status == DONE else 0.0
+        self.path = path
+        self.error = None
+        self.submitted = time.time()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def set_progress(self, fraction):
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class ReportJobs:
+    def __init__(self, cache, max_workers=2):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def find(self, key, kind):
+        # Running/finished job for this key, or a finished file on disk
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and (job.active or (job.status == DONE and self.cache.get(key, kind))):
+                return job
+            path = self.cache.get(key, kind)
+            if path is None:
+                return job if job is not None and job.status == FAILED else None
+            job = self._jobs[key] = ReportJob(key, kind, status=DONE, path=path)
+            return job
+
+    def submit(self, key, kind, df, builder):
+        # builder(df, out=path, progress=callback); same key = same job
+        job = self.find(key, kind)
+        if job is not None and job.status != FAILED:
+            return job
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or not job.active:
+                self._forget_finished()
+                job = self._jobs[key] = ReportJob(key, kind)
+                self._pool.submit(self._run, job, df, builder)
+        return job
+
+    def _forget_finished(self, keep=256):
+        # Finished jobs are found again through the disk cache
+        if len(self._jobs) > keep:
+            self._jobs = {k: j for k, j in self._jobs.items() if j.active}
+
+    def _run(self, job, df, builder):
+        job.status = RUNNING
+        tmp = self.cache.new_temp(job.kind)
+        try:
+            builder(df, out=tmp, progress=job.set_progress)
+            job.path = self.cache.put(tmp, job.key, job.kind)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
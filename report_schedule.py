@@ -0,0 +1,111 @@
+import threading
+from datetime import datetime, timedelta
+
+from localtime import LOCAL_TZ, day_window, get_local_time
+from perf import timed
+from report_jobs import FAILED, artifact_key
+
+# ---------------------------------------------------------
+# SCHEDULED REPORTS
+# At set Mogadishu times a background thread pre-renders the Today /
+# This Week PDF and Excel for all branches and for every branch. They go
+# through ReportJobs, so they land in the same artifact cache as the
+# download buttons, under the same key (report type, params, content
+# hash). A manager's download is then a file read. A report whose rows
+# did not change since the last render already has its artifact and is
+# skipped.
+# ---------------------------------------------------------
+
+
+def report_params(day, time_filter, search="", branch=None, trends=None):
+    # The one place artifact params are built: downloads and the scheduler must agree.
+    # trends: analytics.Trends.version when the PDF has the alerts page (it
+    # depends on the whole history, not just the report's rows)
+    return {"day": day, "time_filter": time_filter, "search": search, "branch": branch, "trends": trends}
+
+
+def parse_times(times):
+    # ["06:00", "13:30"] -> sorted [(6, 0), (13, 30)]
+    return sorted({tuple(int(p) for p in str(t).split(":", 1)) for t in times})
+
+
+class ReportScheduler:
+    # windows: {time filter label: days back}; builders(trends=...): {kind: builder},
+    # called on the worker thread so the report engines load lazily.
+    # trends(): analytics.Trends for the alerts page, None = no alerts page.
+    def __init__(self, store, jobs, builders, windows, branches, times=("06:00",), trends=None):
+        self.store = store
+        self.jobs = jobs
+        self.builders = builders
+        self.windows = windows
+        self.branches = [None] + list(branches)  # None = all branches
+        self.times = parse_times(times)
+        self.trends = trends
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.last_submitted = 0
+        self.last_error = None
+
+    def next_run(self, now):
+        # First scheduled time after `now` (tz-aware, local)
+        for day in (0, 1):
+            base = (now + timedelta(days=day)).replace(second=0, microsecond=0)
+            for hour, minute in self.times:
+                at = LOCAL_TZ.localize(datetime(base.year, base.month, base.day, hour, minute))
+                if at > now:
+                    return at
+        return now + timedelta(days=1)
+
+    def targets(self, now=None, trends_version=None):
+        # -> [(kind, params, rows)] for every window x branch that has reports
+        now = now or get_local_time()
+        day = now.strftime('%Y-%m-%d')
+        out = []
+        for label, days_back in self.windows.items():
+            start, end = day_window(days_back, now=now)
+            for branch in self.branches:
+                df = self.store.query(start=start, end=end, branch=branch)
+                if df.empty: continue
+                params = report_params(day, label, branch=branch, trends=trends_version)
+                out.extend((kind, params, df) for kind in ("pdf", "excel"))
+        return out
+
+    def run_once(self, now=None):
+        # -> number of reports sent to render (unchanged ones are skipped)
+        with timed("prerender") as sample:
+            trends = self.trends() if self.trends else None
+            builders = self.builders(trends=trends)
+            submitted = 0
+            for kind, params, df in self.targets(now, trends.version if trends else None):
+                key = artifact_key(kind, params, df)
+                job = self.jobs.find(key, kind)
+                if job is None or job.status == FAILED:
+                    self.jobs.submit(key, kind, df, builders[kind])
+                    submitted += 1
+            sample["rows"] = submitted
+        self.last_run = get_local_time()
+        self.last_submitted = submitted
+        return submitted
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="report-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        due = get_local_time()  # catch up once at start (files on disk are reused)
+        while not self._stop.is_set():
+            if get_local_time() >= due:
+                try:
+                    self.run_once()
+                    self.last_error = None
+                except Exception as e:  # never let the scheduler die
+                    self.last_error = str(e)
+                due = self.next_run(get_local_time())
+            # Short naps: survives clock jumps and sleep/resume
+            self._stop.wait(min(60.0, max(1.0, (due - get_local_time()).total_seconds())))
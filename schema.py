@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------
+# REPORT SCHEMA
+# One typed layout for every in-memory report frame:
+#   Date                 -> datetime64[ns, Africa/Mogadishu], parsed once
+#   Branch, Category     -> category (the fixed lists below + any legacy values)
+#   Version              -> int64 (optimistic locking, see storage.py)
+#   other text columns   -> Arrow-backed strings
+# Storage still holds plain "YYYY-MM-DD HH:MM" text in local time.
+# ---------------------------------------------------------
+
+TIMEZONE = "Africa/Mogadishu"
+VERSION_COLUMN = "Version"
+DATE_DTYPE = f"datetime64[ns, {TIMEZONE}]"
+
+try:
+    import pyarrow  # noqa: F401  (ships with streamlit)
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# Staff form choices (and the category order used everywhere)
+BRANCHES = ["Head Q", "Branch 1", "Branch 3", "Branch 4", "Branch 5", "Kaydka M.hassan"]
+CATEGORY_LABELS = {
+    "Alaabta go'an (Missing)": "Alaabta go'an",
+    "alaabta Suuqa leh (High Demand)": "alaabta Suuqa leh",
+    "bahiyaha Dadweynaha (New Request)": "bahiyaha Dadweynaha",
+}
+CATEGORIES = list(CATEGORY_LABELS.values())
+VOCABULARY = {"Branch": BRANCHES, "Category": CATEGORIES}
+
+
+def local_timestamp(value):
+    # Naive values are Mogadishu wall time (that's how reports are written)
+    ts = pd.Timestamp(value)
+    if ts is pd.NaT: return ts
+    return ts.tz_localize(TIMEZONE) if ts.tzinfo is None else ts.tz_convert(TIMEZONE)
+
+
+def parse_dates(values):
+    dates = values if pd.api.types.is_datetime64_any_dtype(values) else pd.to_datetime(values, errors='coerce')
+    dates = dates.dt.tz_localize(TIMEZONE) if dates.dt.tz is None else dates.dt.tz_convert(TIMEZONE)
+    return dates.astype(DATE_DTYPE)
+
+
+def as_category(values, vocabulary):
+    # factorize + from_codes is ~2x faster than astype('category') on text
+    codes, uniques = pd.factorize(values.astype(STRING_DTYPE))
+    categories = list(vocabulary) + sorted(set(uniques) - set(vocabulary))
+    position = {c: i for i, c in enumerate(categories)}
+    lookup = np.array([position[u] for u in uniques] + [-1])  # code -1 (missing) stays -1
+    return pd.Series(pd.Categorical.from_codes(lookup[codes], categories=categories), index=values.index)
+
+
+def apply_schema(df):
+    typed = {}
+    for col in df.columns:
+        s = df[col]
+        if col == 'Date':
+            typed[col] = parse_dates(s)
+        elif col == VERSION_COLUMN:
+            typed[col] = pd.to_numeric(s, errors='coerce').fillna(1).astype("int64")
+        elif col in VOCABULARY:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                typed[col] = as_category(s, VOCABULARY[col])
+        elif not (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s)):
+            typed[col] = s.astype(STRING_DTYPE)
+    return df.assign(**typed) if typed else df
+
+
+def concat_reports(frames):
+    # pd.concat turns categoricals with different categories into object
+    # columns, so line the categories up first (changes only on a new branch)
+    frames = [f for f in frames if len(f.columns)]
+    if not frames: return pd.DataFrame()
+    if len(frames) == 1: return frames[0].reset_index(drop=True)
+    for col in VOCABULARY:
+        parts = [f[col] for f in frames if col in f.columns]
+        if len(parts) < len(frames) or not all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            continue
+        categories = list(dict.fromkeys(c for p in parts for c in p.cat.categories))
+        frames = [
+            f if list(f[col].cat.categories) == categories
+            else f.assign(**{col: f[col].cat.set_categories(categories)})
+            for f in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def set_cell(df, row, col, value):
+    # df.at[] with the schema's rules (new category values are added first)
+    if col == 'Date':
+        value = local_timestamp(pd.to_datetime(value, errors='coerce'))
+    elif isinstance(df[col].dtype, pd.CategoricalDtype) and not pd.isna(value) \
+            and value not in df[col].cat.categories:
+        df[col] = df[col].cat.add_categories([value])
+    df.at[row, col] = value
@@ -0,0 +1,134 @@
+import re
+import threading
+
+import pandas as pd
+
+from storage import ID_COLUMN
+
+# ---------------------------------------------------------
+# SEARCH ENGINE
+# Keeps a lower-cased text column per report (built once, updated as
+# rows arrive) so a keystroke is one vectorized substring scan instead
+# of astype(str) + a Python lambda per row.
+#
+# Query syntax:
+#   sonkor                      -> anywhere in the row (old behaviour)
+#   branch:"Branch 3" item:sugar -> field-scoped, all terms must match
+# ---------------------------------------------------------
+
+SEARCH_FIELDS = {
+    "date": "Date",
+    "branch": "Branch",
+    "laan": "Branch",
+    "staff": "Employee",
+    "employee": "Employee",
+    "type": "Category",
+    "category": "Category",
+    "item": "Item",
+    "alaab": "Item",
+    "note": "Note",
+}
+SEARCH_COLUMNS = ["Date", "Branch", "Employee", "Category", "Item", "Note"]
+SEP = "\x1f"  # keeps a term from matching across two columns
+
+# An unclosed quote runs to the end of the query: branch:"Branch 3 -> Branch = "branch 3"
+_TOKEN = re.compile(r'(?:(\w+):)?(?:"([^"]*)(?:"|$)|(\S+))')
+
+
+def parse_query(query):
+    # -> list of (column or None, lower-cased term)
+    terms, scoped = [], False
+    for field, quoted, bare in _TOKEN.findall(query):
+        value = (quoted or bare).strip().lower()
+        col = SEARCH_FIELDS.get(field.lower()) if field else None
+        if field and col is None:
+            value = f"{field.lower()}:{value}"
+        if col: scoped = True
+        if value: terms.append((col, value))
+    if not scoped:
+        # Plain text keeps the old "substring anywhere" meaning, spaces included
+        text = query.strip().lower()
+        return [(None, text)] if text else []
+    return terms
+
+
+def _lower_text(col):
+    if pd.api.types.is_datetime64_any_dtype(col):
+        col = col.dt.strftime("%Y-%m-%d %H:%M")
+    return col.astype("string").fillna("").str.lower()
+
+
+def build_text(df):
+    # -> (haystack, {column: lower-cased column}) indexed like df
+    fields = {c: _lower_text(df[c]) for c in SEARCH_COLUMNS if c in df.columns}
+    if not fields:
+        return pd.Series("", index=df.index, dtype="string"), fields
+    parts = list(fields.values())
+    haystack = parts[0].str.cat(parts[1:], sep=SEP) if len(parts) > 1 else parts[0]
+    return haystack, fields
+
+
+def _match(haystack, fields, terms):
+    mask = pd.Series(True, index=haystack.index)
+    for col, term in terms:
+        target = fields.get(col, haystack) if col else haystack
+        mask &= target.str.contains(term, regex=False).fillna(False).astype(bool)
+    return mask
+
+
+def search_frame(df, query):
+    # One-off search without an index (small frames, benchmarks)
+    terms = parse_query(query)
+    if not terms or df.empty: return df
+    haystack, fields = build_text(df)
+    return df[_match(haystack, fields, terms)]
+
+
+class ReportSearchIndex:
+    # Subscribes to CachedStore; text columns are keyed by report ID
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._text = pd.DataFrame()
+
+    def _build(self, df):
+        if df.empty or ID_COLUMN not in df.columns:
+            return pd.DataFrame()
+        haystack, fields = build_text(df)
+        text = pd.DataFrame(fields).assign(_all=haystack)
+        text.index = df[ID_COLUMN].values
+        return text
+
+    def on_reload(self, df):
+        text = self._build(df)
+        with self._lock:
+            self._text = text
+
+    def on_append(self, rows):
+        text = self._build(rows)
+        with self._lock:
+            self._text = pd.concat([self._text, text]) if not self._text.empty else text
+
+    def on_update(self, before, after):
+        text = self._build(after)
+        with self._lock:
+            kept = self._text[~self._text.index.isin(text.index)]
+            self._text = pd.concat([kept, text])
+
+    def on_delete(self, rows):
+        with self._lock:
+            self._text = self._text[~self._text.index.isin(rows[ID_COLUMN])]
+
+    def matching_ids(self, query):
+        terms = parse_query(query)
+        with self._lock:
+            text = self._text
+        if not terms or text.empty:
+            return text.index
+        fields = {c: text[c] for c in text.columns if c != "_all"}
+        return text.index[_match(text["_all"], fields, terms).values]
+
+    def filter(self, df, query):
+        if not parse_query(query) or df.empty: return df
+        if ID_COLUMN not in df.columns or self._text.empty:
+            return search_frame(df, query)
+        return df[df[ID_COLUMN].isin(self.matching_ids(query))]
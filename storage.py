@@ -0,0 +1,643 @@
+import sqlite3
+import threading
+import uuid
+import warnings
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from perf import frame_bytes, timed
+from schema import VERSION_COLUMN, local_timestamp, parse_dates
+
+# ---------------------------------------------------------
+# STORAGE LAYER
+# Every backend implements ReportStore:
+#   read()                 -> DataFrame of all reports (with ID column)
+#   append(rows)           -> writes ONLY the new rows (no read/rewrite)
+#   update_by_id(updates)  -> {id: {column: value}} targeted cell updates
+#   delete_by_id(ids)      -> removes just those rows
+#       Both take versions={id: Version the caller saw}. Each write bumps the
+#       row's Version; rows changed since are skipped -> StaleWriteError.
+#   query(...)             -> date/branch/category filtered read
+#   read_since(offset)     -> only hot rows after the first `offset` (incremental sync)
+#   replace(df)            -> full overwrite (migrations only)
+#
+# Partitioned backends keep recent reports in a small "hot" partition and
+# move older ones to an archive with rollover(before). read() still sees
+# both; read_hot() / read_archive() let the cache re-read only what moves.
+# ---------------------------------------------------------
+
+ID_COLUMN = "ID"
+REPORT_COLUMNS = ["Date", "Branch", "Employee", "Category", "Item", "Note"]
+META_COLUMNS = [ID_COLUMN, VERSION_COLUMN]
+
+
+class StaleWriteError(Exception):
+    # Raised after the rest of the batch was written
+    def __init__(self, ids, applied=0):
+        super().__init__(f"{len(ids)} report(s) were changed by someone else in the meantime")
+        self.ids = list(ids)
+        self.applied = applied
+
+
+def new_report_id():
+    # Starts with a letter: the sheet (USER_ENTERED) would turn "012345678901"
+    # or "123e45678901" into a number, and _locate could never match it again
+    return "r" + uuid.uuid4().hex[:12]
+
+
+def _clean(val):
+    if val is None or (pd.api.types.is_scalar(val) and pd.isna(val)):
+        return ""
+    if isinstance(val, pd.Timestamp):
+        return val.strftime("%Y-%m-%d %H:%M")
+    return str(val)
+
+
+def _row_values(row, header):
+    # Order a report dict by the sheet/table header, blanks for missing keys
+    return [_clean(row.get(col, "")) for col in header]
+
+
+def with_ids(rows):
+    # New reports get an ID and start at Version 1
+    return [dict(r, **{ID_COLUMN: r.get(ID_COLUMN) or new_report_id(), VERSION_COLUMN: r.get(VERSION_COLUMN) or 1})
+            for r in rows]
+
+
+def new_rows(rows, known=()):
+    # Drops rows whose ID is in `known` (already stored) or repeated in the batch
+    seen, out = set(known), []
+    for r in rows:
+        if r[ID_COLUMN] in seen: continue
+        seen.add(r[ID_COLUMN])
+        out.append(r)
+    return out
+
+
+def _as_version(val):
+    try:
+        return int(float(val))
+    except (TypeError, ValueError):
+        return 1  # rows written before versions existed
+
+
+def _is_stale(versions, report_id, current):
+    return versions is not None and report_id in versions and current != int(versions[report_id])
+
+
+def row_versions(df, ids):
+    # {id: Version} as the caller saw them, for update_by_id / delete_by_id
+    if VERSION_COLUMN not in df.columns: return None
+    ids = set(ids)
+    return {i: int(v) for i, v in zip(df[ID_COLUMN], df[VERSION_COLUMN]) if i in ids}
+
+
+def _combine(archive, hot):
+    # Archive first, then hot; a row copied but not yet removed by an
+    # interrupted rollover shows up once (the hot copy wins)
+    if archive.empty: return hot
+    df = pd.concat([archive, hot], ignore_index=True)
+    if ID_COLUMN in df.columns:
+        df = df.drop_duplicates(subset=[ID_COLUMN], keep="last").reset_index(drop=True)
+    return df
+
+
+def filter_frame(df, start=None, end=None, branch=None, category=None):
+    # Pandas fallback for backends without a native query engine
+    if df.empty: return df
+    mask = pd.Series(True, index=df.index)
+    if start is not None or end is not None:
+        dates = parse_dates(df["Date"])
+        if start is not None: mask &= dates >= local_timestamp(start)
+        if end is not None: mask &= dates < local_timestamp(end)
+    if branch: mask &= df["Branch"] == branch
+    if category: mask &= df["Category"] == category
+    return df[mask]
+
+
+class ReportStore(ABC):
+    @abstractmethod
+    def read(self, ttl=None): ...
+
+    @abstractmethod
+    def append(self, rows): ...
+
+    @abstractmethod
+    def update_by_id(self, updates, versions=None): ...
+
+    @abstractmethod
+    def delete_by_id(self, ids, versions=None): ...
+
+    @abstractmethod
+    def replace(self, df): ...
+
+    def query(self, start=None, end=None, branch=None, category=None):
+        return filter_frame(self.read(), start, end, branch, category)
+
+    def existing_ids(self, ids):
+        # -> the subset of `ids` already stored (outbox retries check before re-sending)
+        df = self.read()
+        if ID_COLUMN not in df.columns: return set()
+        return set(df.loc[df[ID_COLUMN].isin(list(ids)), ID_COLUMN])
+
+    def read_since(self, offset):
+        return self.read_hot(ttl=0).iloc[offset:]
+
+    # --- PARTITIONS (unpartitioned backends keep everything hot) ---
+    def read_hot(self, ttl=None):
+        return self.read(ttl)
+
+    def read_archive(self):
+        return pd.DataFrame()
+
+    def rollover(self, before):
+        # Moves reports dated before `before` out of the hot partition -> count moved
+        return 0
+
+
+# --- 1. GOOGLE SHEETS BACKEND ---
+class GSheetsStore(ReportStore):
+    # archive_worksheet: tab that rollover() moves old rows to (None = no archive)
+    def __init__(self, conn, spreadsheet, worksheet="Sheet1", archive_worksheet=None):
+        self.conn = conn
+        self.spreadsheet = spreadsheet
+        self.worksheet = worksheet
+        self.archive = GSheetsStore(conn, spreadsheet, archive_worksheet) if archive_worksheet else None
+        self._header = None
+
+    def _ws(self):
+        # Raw gspread worksheet (service-account client only; public sheets are read-only anyway)
+        return self.conn.client._select_worksheet(spreadsheet=self.spreadsheet, worksheet=self.worksheet)
+
+    def read(self, ttl=5):
+        return _combine(self.read_archive(ttl), self.read_hot(ttl))
+
+    def read_hot(self, ttl=5):
+        with timed("sheets.read") as sample:
+            df = self.conn.read(spreadsheet=self.spreadsheet, worksheet=self.worksheet, ttl=ttl)
+            if df is None: df = pd.DataFrame()
+            sample["rows"], sample["bytes"] = len(df), frame_bytes(df)
+        df = df.dropna(how="all")
+        if not df.empty and not set(META_COLUMNS) <= set(df.columns) and self._header is None:
+            # Legacy sheet without IDs / versions: migrate once, then re-read
+            try:
+                self.header()
+            except Exception as e:
+                warnings.warn(f"Could not add report IDs to the sheet: {e}")
+                return df
+            return self.read_hot(ttl=0)
+        return df
+
+    def read_archive(self, ttl=5):
+        return self._in_archive("read_hot", ttl) if self.archive else pd.DataFrame()
+
+    def _in_archive(self, method, *args):
+        # The archive tab only exists after the first rollover
+        from gspread.exceptions import WorksheetNotFound
+        try:
+            return getattr(self.archive, method)(*args)
+        except WorksheetNotFound:
+            return pd.DataFrame() if method == "read_hot" else 0
+
+    def rollover(self, before):
+        if self.archive is None: return 0
+        hot = self.read_hot(ttl=0)
+        if hot.empty or ID_COLUMN not in hot.columns: return 0
+        old = hot[(parse_dates(hot["Date"]) < local_timestamp(before)).fillna(False)]
+        if old.empty: return 0
+        self._ensure_archive()
+        # Copy first, then delete: an interruption leaves a duplicate, never a gap
+        self.archive.append(old.to_dict("records"))
+        return self.delete_by_id(old[ID_COLUMN].tolist())
+
+    def _ensure_archive(self):
+        from gspread.exceptions import WorksheetNotFound
+        book = self._ws().spreadsheet
+        try:
+            book.worksheet(self.archive.worksheet)
+        except WorksheetNotFound:
+            header = self.header()
+            ws = book.add_worksheet(title=self.archive.worksheet, rows=1, cols=len(header))
+            ws.update("A1", [header], value_input_option="USER_ENTERED")
+
+    def header(self):
+        if self._header is None:
+            ws = self._ws()
+            header = [h for h in ws.row_values(1) if h]
+            if not header:
+                # Empty sheet: write the header once so appends line up
+                header = REPORT_COLUMNS + META_COLUMNS
+                ws.update("A1", [header], value_input_option="USER_ENTERED")
+            else:
+                if ID_COLUMN not in header:
+                    header = self._add_column(ws, header, ID_COLUMN, new_report_id)
+                if VERSION_COLUMN not in header:
+                    header = self._add_column(ws, header, VERSION_COLUMN, lambda: 1)
+            self._header = header
+        return self._header
+
+    def _add_column(self, ws, header, name, make_value):
+        # One-off migration: older sheets have no ID / Version column, fill one in
+        from gspread.utils import rowcol_to_a1
+        header = header + [name]
+        col = len(header)
+        n_rows = len(ws.col_values(1))
+        if ws.col_count < col: ws.add_cols(col - ws.col_count)
+        values = [[name]] + [[make_value()] for _ in range(max(n_rows - 1, 0))]
+        ws.update(rowcol_to_a1(1, col), values, value_input_option="USER_ENTERED")
+        return header
+
+    def _locate(self, ws, ids):
+        # -> {id: (sheet row, current Version)}; both columns in one API call
+        from gspread.utils import rowcol_to_a1
+        header = self.header()
+        id_col, version_col = (rowcol_to_a1(1, header.index(c) + 1)[:-1] for c in META_COLUMNS)
+        id_cells, version_cells = ws.batch_get([f"{id_col}2:{id_col}", f"{version_col}2:{version_col}"])
+        wanted, found = set(ids), {}
+        for i, cell in enumerate(id_cells):
+            if cell and cell[0] in wanted:
+                version = version_cells[i] if i < len(version_cells) else []
+                found[cell[0]] = (i + 2, _as_version(version[0] if version else None))
+        return found
+
+    def _archive_write(self, method, arg, versions):
+        # Same write on the archive tab -> (count, stale ids); stale is None
+        # when there is no archive tab yet (the rows exist nowhere)
+        from gspread.exceptions import WorksheetNotFound
+        try:
+            return getattr(self.archive, method)(arg, versions), []
+        except WorksheetNotFound:
+            return 0, None
+        except StaleWriteError as e:
+            return e.applied, e.ids
+
+    def read_since(self, offset):
+        # Fetches just the tail of the sheet: rows offset+2 .. end (row 1 is the header)
+        from gspread.utils import rowcol_to_a1
+        header = self.header()
+        last_col = rowcol_to_a1(1, len(header))[:-1]
+        with timed("sheets.read_tail") as sample:
+            values = self._ws().get(f"A{offset + 2}:{last_col}")
+            sample["rows"] = len(values)
+        values = [list(v) + [""] * (len(header) - len(v)) for v in values]
+        df = pd.DataFrame(values, columns=header).replace("", None)
+        return df.dropna(how="all")
+
+    def append(self, rows):
+        if not rows: return 0
+        header = self.header()
+        values = [_row_values(r, header) for r in new_rows(with_ids(rows))]
+        # One API call, one new row per report - cost does not grow with the sheet
+        with timed("sheets.append", rows=len(values)):
+            self._ws().append_rows(
+                values,
+                value_input_option="USER_ENTERED",
+                insert_data_option="INSERT_ROWS",
+                table_range="A1",
+            )
+        return len(values)
+
+    def existing_ids(self, ids):
+        # Reads the ID column: only used for retried outbox batches, which land in the hot tab
+        return set(self._locate(self._ws(), ids)) if ids else set()
+
+    def update_by_id(self, updates, versions=None):
+        if not updates: return 0
+        from gspread.utils import rowcol_to_a1
+        ws = self._ws()
+        header = self.header()
+        found = self._locate(ws, updates.keys())
+        version_col = header.index(VERSION_COLUMN) + 1
+        data, count, stale = [], 0, []
+        for report_id, changes in updates.items():
+            if report_id not in found: continue
+            row, version = found[report_id]
+            if _is_stale(versions, report_id, version):
+                stale.append(report_id); continue
+            cells = [(c, v) for c, v in changes.items() if c in header and c not in META_COLUMNS]
+            if not cells: continue
+            for col, val in cells:
+                data.append({"range": rowcol_to_a1(row, header.index(col) + 1), "values": [[_clean(val)]]})
+            data.append({"range": rowcol_to_a1(row, version_col), "values": [[version + 1]]})
+            count += 1
+        if data:
+            with timed("sheets.update", rows=count):
+                ws.batch_update(data, value_input_option="USER_ENTERED")
+        missing = {i: c for i, c in updates.items() if i not in found}
+        archived_stale = None
+        if missing and self.archive:
+            n, archived_stale = self._archive_write("update_by_id", missing, versions)
+            count += n
+        if archived_stale is not None:
+            stale += archived_stale
+        elif missing and versions:
+            stale += [i for i in missing if i in versions]  # deleted by someone else
+        if stale:
+            raise StaleWriteError(stale, applied=count)
+        return count
+
+    def delete_by_id(self, ids, versions=None):
+        ids = list(ids)
+        if not ids: return 0
+        ws = self._ws()
+        found = self._locate(ws, ids)
+        stale = [i for i in found if _is_stale(versions, i, found[i][1])]
+        count = 0
+        archived = [i for i in ids if i not in found]
+        if archived and self.archive:
+            count, stale_archived = self._archive_write("delete_by_id", archived, versions)
+            stale += stale_archived or []
+        rows = sorted((found[i][0] for i in found if i not in stale), reverse=True)
+        if rows:
+            # Bottom-up so earlier deletes don't shift later row numbers; one API call
+            requests = [{
+                "deleteDimension": {
+                    "range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}
+                }
+            } for r in rows]
+            with timed("sheets.delete", rows=len(rows)):
+                ws.spreadsheet.batch_update({"requests": requests})
+            count += len(rows)
+        if stale:
+            raise StaleWriteError(stale, applied=count)
+        return count
+
+    def replace(self, df):
+        if ID_COLUMN not in df.columns:
+            df = df.assign(**{ID_COLUMN: [new_report_id() for _ in range(len(df))]})
+        with timed("sheets.replace", rows=len(df), nbytes=frame_bytes(df)):
+            self.conn.update(spreadsheet=self.spreadsheet, worksheet=self.worksheet, data=df)
+        self._header = [str(c) for c in df.columns]
+
+
+# --- 2. LOCAL BACKEND (SQLite) ---
+HOT_TABLE = "reports"
+ARCHIVE_TABLE = "reports_archive"
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class LocalStore(ReportStore):
+    # Two tables with the same layout: `reports` (hot) and `reports_archive`.
+    # meta.hot_since = last rollover cutoff; no archived row is dated after it.
+    def __init__(self, path="mareero.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            cols = ", ".join(f'"{c}" TEXT' for c in REPORT_COLUMNS)
+            for table in (HOT_TABLE, ARCHIVE_TABLE):
+                db.execute(f'CREATE TABLE IF NOT EXISTS {table} ("{ID_COLUMN}" TEXT, {cols})')
+                existing = [r[1] for r in db.execute(f"PRAGMA table_info({table})")]
+                if ID_COLUMN not in existing:
+                    # Databases created before IDs existed
+                    db.execute(f'ALTER TABLE {table} ADD COLUMN "{ID_COLUMN}" TEXT')
+                if VERSION_COLUMN not in existing:
+                    db.execute(f'ALTER TABLE {table} ADD COLUMN "{VERSION_COLUMN}" INTEGER NOT NULL DEFAULT 1')
+                db.execute(f"UPDATE {table} SET \"{ID_COLUMN}\" = 'r' || lower(hex(randomblob(6)))"
+                           f' WHERE "{ID_COLUMN}" IS NULL')
+                db.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_id ON {table} ("{ID_COLUMN}")')
+                db.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} ("Date")')
+                db.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_branch ON {table} ("Branch", "Date")')
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _select(self, where="", params=(), limit="", tables=(ARCHIVE_TABLE, HOT_TABLE)):
+        cols = ", ".join(f'"{c}"' for c in REPORT_COLUMNS + META_COLUMNS)
+        with timed("sqlite.read") as sample, self._connect() as db:
+            parts = [pd.read_sql_query(f"SELECT {cols} FROM {t} {where} ORDER BY rowid {limit}", db, params=params)
+                     for t in tables]
+            df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+            df = df.dropna(how="all", subset=REPORT_COLUMNS)
+            sample["rows"], sample["bytes"] = len(df), frame_bytes(df)
+        return df
+
+    def hot_since(self):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = 'hot_since'").fetchone()
+        return row[0] if row else None
+
+    def read(self, ttl=None):
+        return self._select()
+
+    def read_hot(self, ttl=None):
+        return self._select(tables=(HOT_TABLE,))
+
+    def read_archive(self):
+        return self._select(tables=(ARCHIVE_TABLE,))
+
+    def read_since(self, offset):
+        return self._select(limit=f"LIMIT -1 OFFSET {int(offset)}", tables=(HOT_TABLE,))
+
+    def query(self, start=None, end=None, branch=None, category=None):
+        # Dates are stored as 'YYYY-MM-DD HH:MM' text, so string ranges hit the Date index
+        clauses, params = [], []
+        if start is not None:
+            start = local_timestamp(start).strftime(DATE_FORMAT)
+            clauses.append('"Date" >= ?'); params.append(start)
+        if end is not None:
+            clauses.append('"Date" < ?'); params.append(local_timestamp(end).strftime(DATE_FORMAT))
+        if branch:
+            clauses.append('"Branch" = ?'); params.append(branch)
+        if category:
+            clauses.append('"Category" = ?'); params.append(category)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        # Pushdown: a range starting after the last rollover never touches the archive
+        hot_since = self.hot_since()
+        tables = (HOT_TABLE,) if start is not None and hot_since and start >= hot_since else (ARCHIVE_TABLE, HOT_TABLE)
+        return self._select(where, params, tables=tables)
+
+    def _insert(self, db, rows, table=HOT_TABLE):
+        cols = REPORT_COLUMNS + META_COLUMNS
+        names = ", ".join(f'"{c}"' for c in cols)
+        marks = ", ".join("?" for _ in cols)
+        db.executemany(f"INSERT INTO {table} ({names}) VALUES ({marks})", [_row_values(r, cols) for r in rows])
+
+    def _move(self, db, source, target, where, params):
+        names = ", ".join(f'"{c}"' for c in REPORT_COLUMNS + META_COLUMNS)
+        db.execute(f"INSERT INTO {target} ({names}) SELECT {names} FROM {source} WHERE {where} ORDER BY rowid", params)
+        return db.execute(f"DELETE FROM {source} WHERE {where}", params).rowcount
+
+    def rollover(self, before):
+        cutoff = local_timestamp(before).strftime(DATE_FORMAT)
+        with self._lock, self._connect() as db:
+            # Blank dates sort before any cutoff but stay hot
+            moved = self._move(db, HOT_TABLE, ARCHIVE_TABLE, '"Date" < ? AND length("Date") > 0', (cutoff,))
+            db.execute("INSERT INTO meta (key, value) VALUES ('hot_since', ?) "
+                       "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)", (cutoff,))
+        return moved
+
+    def append(self, rows):
+        if not rows: return 0
+        rows = with_ids(rows)
+        with self._lock, self._connect() as db:
+            rows = new_rows(rows, [r[ID_COLUMN] for r in rows if self._exists(db, r[ID_COLUMN])])
+            self._insert(db, rows)
+        return len(rows)
+
+    def existing_ids(self, ids):
+        with self._connect() as db:
+            return {i for i in ids if self._exists(db, i)}
+
+    def _where_version(self, report_id, versions):
+        # Compare-and-set: with a known version the row only matches if nobody wrote it since
+        if versions is not None and report_id in versions:
+            return f'"{ID_COLUMN}" = ? AND "{VERSION_COLUMN}" = ?', [report_id, int(versions[report_id])]
+        return f'"{ID_COLUMN}" = ?', [report_id]
+
+    def _exists(self, db, report_id):
+        return any(db.execute(f'SELECT 1 FROM {t} WHERE "{ID_COLUMN}" = ?', (report_id,)).fetchone()
+                   for t in (HOT_TABLE, ARCHIVE_TABLE))
+
+    def update_by_id(self, updates, versions=None):
+        count, stale = 0, []
+        with self._lock, self._connect() as db:
+            for report_id, changes in updates.items():
+                changes = {c: v for c, v in changes.items() if c in REPORT_COLUMNS}
+                if not changes: continue
+                sets = ", ".join(f'"{c}" = ?' for c in changes) + f', "{VERSION_COLUMN}" = "{VERSION_COLUMN}" + 1'
+                where, params = self._where_version(report_id, versions)
+                hit = sum(db.execute(f'UPDATE {table} SET {sets} WHERE {where}',
+                                     [_clean(v) for v in changes.values()] + params).rowcount
+                          for table in (HOT_TABLE, ARCHIVE_TABLE))
+                count += hit
+                if not hit and versions is not None and report_id in versions:
+                    stale.append(report_id)  # edited or deleted by someone else
+            # An archived report re-dated past the cutoff goes back to the hot table
+            row = db.execute("SELECT value FROM meta WHERE key = 'hot_since'").fetchone()
+            if row:
+                self._move(db, ARCHIVE_TABLE, HOT_TABLE, '"Date" >= ?', (row[0],))
+        if stale:
+            raise StaleWriteError(stale, applied=count)
+        return count
+
+    def delete_by_id(self, ids, versions=None):
+        ids = list(ids)
+        if not ids: return 0
+        count, stale = 0, []
+        with self._lock, self._connect() as db:
+            for report_id in ids:
+                where, params = self._where_version(report_id, versions)
+                hit = sum(db.execute(f'DELETE FROM {table} WHERE {where}', params).rowcount
+                          for table in (HOT_TABLE, ARCHIVE_TABLE))
+                count += hit
+                if not hit and self._exists(db, report_id):
+                    stale.append(report_id)  # still there, but changed since the caller saw it
+        if stale:
+            raise StaleWriteError(stale, applied=count)
+        return count
+
+    def replace(self, df):
+        rows = with_ids(df.to_dict("records"))
+        with self._lock, self._connect() as db:
+            for table in (HOT_TABLE, ARCHIVE_TABLE):
+                db.execute(f"DELETE FROM {table}")
+            db.execute("DELETE FROM meta WHERE key = 'hot_since'")
+            self._insert(db, rows)
+
+
+# --- 3. MIRRORED STORE (local primary, sheet copy) ---
+class MirroredStore(ReportStore):
+    # Reads come from the fast primary; every write is repeated on the mirror.
+    # A mirror failure never loses the report - it is already in the primary.
+    def __init__(self, primary, mirror):
+        self.primary = primary
+        self.mirror = mirror
+
+    def bootstrap(self):
+        # First start on an empty local DB: pull the existing history down once
+        if self.primary.read().empty:
+            self.mirror.header()  # makes sure sheet rows carry IDs before copying
+            history = self.mirror.read(ttl=0)
+            if not history.empty:
+                self.primary.replace(history)
+
+    def _mirror(self, method, *args):
+        try:
+            getattr(self.mirror, method)(*args)
+        except Exception as e:
+            warnings.warn(f"Mirror {method} failed: {e}")
+
+    def read(self, ttl=None):
+        return self.primary.read()
+
+    def query(self, start=None, end=None, branch=None, category=None):
+        return self.primary.query(start, end, branch, category)
+
+    def read_since(self, offset):
+        return self.primary.read_since(offset)
+
+    def read_hot(self, ttl=None):
+        return self.primary.read_hot()
+
+    def read_archive(self):
+        return self.primary.read_archive()
+
+    def rollover(self, before):
+        count = self.primary.rollover(before)
+        self._mirror("rollover", before)
+        return count
+
+    def append(self, rows):
+        # Only rows the primary did not have yet reach the mirror (no duplicates on retries)
+        rows = with_ids(rows)
+        rows = new_rows(rows, self.primary.existing_ids([r[ID_COLUMN] for r in rows]))
+        count = self.primary.append(rows)
+        self._mirror("append", rows)
+        return count
+
+    def existing_ids(self, ids):
+        return self.primary.existing_ids(ids)
+
+    def update_by_id(self, updates, versions=None):
+        # The primary decides what is stale; the mirror just follows it
+        try:
+            count = self.primary.update_by_id(updates, versions)
+        except StaleWriteError as e:
+            self._mirror("update_by_id", {i: c for i, c in updates.items() if i not in e.ids})
+            raise
+        self._mirror("update_by_id", updates)
+        return count
+
+    def delete_by_id(self, ids, versions=None):
+        ids = list(ids)
+        try:
+            count = self.primary.delete_by_id(ids, versions)
+        except StaleWriteError as e:
+            self._mirror("delete_by_id", [i for i in ids if i not in e.ids])
+            raise
+        self._mirror("delete_by_id", ids)
+        return count
+
+    def replace(self, df):
+        self.primary.replace(df)
+        self._mirror("replace", self.primary.read())
+
+
+# --- 4. EDITOR DIFF -> DELTA WRITES ---
+def editor_changes(original, edited, select_col="Select"):
+    # Turns the data_editor result into ({id: {col: new}}, [ids to delete]).
+    # Only rows the manager actually touched are written back.
+    before = original.set_index(ID_COLUMN)
+    after = edited.set_index(ID_COLUMN)
+    deletes = after.index[after[select_col].astype(bool)].tolist() if select_col in after.columns else []
+
+    cols = [c for c in REPORT_COLUMNS if c in after.columns and c in before.columns]
+    a = after[cols]
+    b = before.loc[a.index, cols]
+    if 'Date' in cols:
+        # The editor may hand back naive timestamps for the tz-aware column
+        a = a.assign(Date=parse_dates(a['Date']))
+        b = b.assign(Date=parse_dates(b['Date']))
+    # Compared as plain objects: categoricals with different categories can't be
+    a, b = a.astype(object), b.astype(object)
+    same = (a == b).fillna(False).astype(bool) | (a.isna() & b.isna())
+    changed = ~same
+
+    updates = {}
+    for report_id in changed.index[changed.any(axis=1)]:
+        if report_id in deletes: continue
+        row = changed.loc[report_id]
+        updates[report_id] = {c: a.at[report_id, c] for c in row.index[row]}
+    return updates, deletes
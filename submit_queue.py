@@ -0,0 +1,148 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+from storage import ID_COLUMN, with_ids
+
+# ---------------------------------------------------------
+# STAFF SUBMISSION QUEUE (OUTBOX)
+# "Gudbi" only writes the report to a local SQLite (WAL) file and returns.
+# A background flusher sends pending reports to the real store in batches
+# (a burst of submissions = one append call) and retries with backoff when
+# the connection drops. Nothing is lost on a crash or restart: pending rows
+# are still in the file and go out on the next flush.
+# ---------------------------------------------------------
+
+PENDING, SENDING, SYNCED = "pending", "sending", "synced"
+
+
+class SubmissionQueue:
+    def __init__(self, store, path="outbox.db", batch_size=200, linger=0.5,
+                 retry_base=2.0, retry_max=300.0, lease=300, keep_synced_days=7):
+        self.store = store
+        self.path = path
+        self.batch_size = batch_size
+        self.linger = linger              # seconds to wait for more rows before sending
+        self.retry_base = retry_base      # first retry delay, doubled per failure
+        self.retry_max = retry_max
+        self.lease = lease                # a 'sending' batch older than this is retried
+        self.keep_synced_days = keep_synced_days
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failures = 0
+        self.last_error = None
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                f' "{ID_COLUMN}" TEXT UNIQUE,'
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " queued_at REAL NOT NULL,"
+                " claimed_at REAL,"
+                " synced_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, seq)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # --- PRODUCER (Streamlit script thread) ---
+    def put(self, rows):
+        # Durable once this returns -> the IDs of the queued reports
+        rows = with_ids(rows)
+        now = time.time()
+        with self._connect() as db:
+            db.executemany(
+                f'INSERT OR IGNORE INTO outbox ("{ID_COLUMN}", payload, queued_at) VALUES (?, ?, ?)',
+                [(r[ID_COLUMN], json.dumps(r, default=str), now) for r in rows],
+            )
+        self._wake.set()
+        return [r[ID_COLUMN] for r in rows]
+
+    def counts(self):
+        # -> {"pending": n, "synced": n}; reports being sent count as pending
+        with self._connect() as db:
+            rows = dict(db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {"pending": rows.get(PENDING, 0) + rows.get(SENDING, 0), "synced": rows.get(SYNCED, 0)}
+
+    # --- FLUSHER (background thread) ---
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._failures:
+                self._stop.wait(self._retry_delay())  # backing off: new rows wait too
+            else:
+                self._wake.wait(timeout=5.0)  # also picks up rows queued by another server
+                time.sleep(self.linger)       # let a burst of submissions pile up
+            self._wake.clear()
+            try:
+                while not self._stop.is_set() and self.flush() == self.batch_size:
+                    pass  # backlog: keep going without waiting
+            except Exception as e:  # e.g. outbox locked; never let the flusher die
+                self._failures += 1
+                self.last_error = str(e)
+
+    def _retry_delay(self):
+        delay = min(self.retry_max, self.retry_base * 2 ** (self._failures - 1))
+        return delay * random.uniform(0.5, 1.0)  # jitter: servers don't retry in lockstep
+
+    def _claim(self):
+        # Marks one batch as 'sending' so a second server sharing the file skips it
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            batch = db.execute(
+                "SELECT seq, payload, attempts FROM outbox"
+                " WHERE status = ? OR (status = ? AND claimed_at < ?)"
+                " ORDER BY seq LIMIT ?",
+                (PENDING, SENDING, now - self.lease, self.batch_size),
+            ).fetchall()
+            db.executemany("UPDATE outbox SET status = ?, claimed_at = ?, attempts = attempts + 1 WHERE seq = ?",
+                           [(SENDING, now, seq) for seq, _, _ in batch])
+        return batch
+
+    def flush(self):
+        # Sends one batch -> number of reports written (0 on failure / nothing to do)
+        batch = self._claim()
+        if not batch: return 0
+        seqs = [seq for seq, _, _ in batch]
+        rows = [json.loads(payload) for _, payload, _ in batch]
+        retried = [r[ID_COLUMN] for r, (_, _, attempts) in zip(rows, batch) if attempts]
+        try:
+            if retried:
+                # Sent before but never marked synced (crash, timeout, lease
+                # expired): skip the reports that did reach the store. First
+                # attempts skip this check, so a send stays one append call.
+                known = self.store.existing_ids(retried)
+                rows = [r for r in rows if r[ID_COLUMN] not in known]
+            if rows:
+                self.store.append(rows)
+        except Exception as e:
+            self._failures += 1
+            self.last_error = str(e)
+            with self._connect() as db:
+                db.executemany("UPDATE outbox SET status = ?, claimed_at = NULL WHERE seq = ?", [(PENDING, seq) for seq in seqs])
+            return 0
+        self._failures = 0
+        self.last_error = None
+        with self._connect() as db:
+            now = time.time()
+            db.executemany("UPDATE outbox SET status = ?, synced_at = ? WHERE seq = ?", [(SYNCED, now, seq) for seq in seqs])
+            db.execute("DELETE FROM outbox WHERE status = ? AND synced_at < ?",
+                       (SYNCED, now - self.keep_synced_days * 86400))
+        return len(batch)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import LocalStore  # noqa: E402
+
+
+@pytest.fixture
+def report():
+    # report(item, **columns) -> one staff form submission
+    def make(item, **kw):
+        return dict({"Date": "2026-10-01 09:00", "Branch": "Branch 1", "Employee": "Ali",
+                     "Category": "Alaabta go'an", "Item": item, "Note": ""}, **kw)
+    return make
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    return LocalStore(str(tmp_path / "mareero.db"))
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from analytics import WEEKS_COLUMN, TrendCache, compute_trends
+from localtime import LOCAL_TZ
+from metrics import DEMAND_CATEGORY
+from report_cache import CachedStore, parse_reports
+
+NOW = LOCAL_TZ.localize(pd.Timestamp("2026-10-17 12:00").to_pydatetime())
+
+
+def days_ago(n, hour=9):
+    return (pd.Timestamp("2026-10-17") - pd.Timedelta(days=n, hours=-hour)).strftime("%Y-%m-%d %H:%M")
+
+
+@pytest.fixture
+def reports(report):
+    rows = [report("Sonkor", Date=days_ago(d)) for d in (0, 1, 2, 6)]          # new this week
+    rows += [report("Bariis", Date=days_ago(7 * w + 1)) for w in range(9)]     # every week
+    rows += [report("Caano", Date=days_ago(7 * w + 1), Category=DEMAND_CATEGORY) for w in range(5)]
+    rows += [report("Shaah", Date=days_ago(20)), report("Shaah", Date=days_ago(120))]
+    rows += [report("Saliid", Date=days_ago(1), Category="bahiyaha Dadweynaha")]
+    return parse_reports(pd.DataFrame(rows))
+
+
+def by_item(trends):
+    return trends.items.set_index("Item")
+
+
+def test_windows_and_rules(reports):
+    items = by_item(compute_trends(reports, now=NOW))
+    assert sorted(items.index) == ["Bariis", "Caano", "Shaah", "Sonkor"]
+    assert items.loc["Sonkor", ["7d", "30d", "Baseline/wk", "Spike", "Recurring"]].tolist() == [4, 4, 0.0, True, False]
+    assert items.loc["Bariis", ["7d", "30d", "Baseline/wk", WEEKS_COLUMN]].tolist() == [1, 5, 1.0, 8]
+    assert items.loc["Bariis", ["Spike", "Recurring"]].tolist() == [False, True]
+    # Demand reports are trended but never "recurring" stock-outs
+    assert items.loc["Caano", [WEEKS_COLUMN, "Recurring"]].tolist() == [5, False]
+    assert items.loc["Shaah", ["7d", "30d", WEEKS_COLUMN]].tolist() == [0, 1, 1]
+    assert compute_trends(reports, now=NOW).items["Item"].iloc[0] == "Sonkor"  # spikes first
+
+
+def test_a_busy_baseline_is_not_a_spike(report):
+    rows = [report("Sonkor", Date=days_ago(d)) for d in range(4)]
+    rows += [report("Sonkor", Date=days_ago(7 + d)) for d in range(0, 56, 3)]
+    row = by_item(compute_trends(parse_reports(pd.DataFrame(rows)), now=NOW)).loc["Sonkor"]
+    assert (row["7d"], row["Spike"]) == (4, False)
+
+
+def test_spellings_share_a_trend_and_branches_roll_up(report):
+    rows = [report("Sonkor", Date=days_ago(1)), report("sonkor ", Date=days_ago(2)),
+            report("Sonkor", Date=days_ago(2), Branch="Branch 3")]
+    trends = compute_trends(parse_reports(pd.DataFrame(rows)), now=NOW)
+    assert trends.items[["Branch", "7d"]].values.tolist() == [["Branch 1", 2], ["Branch 3", 1]]
+    weekly = trends.branches["Alaabta go'an"]
+    assert weekly.iloc[-1].to_dict() == {"Branch 1": 2, "Branch 3": 1}
+
+
+def test_no_reports_no_trends():
+    trends = compute_trends(pd.DataFrame(), now=NOW)
+    assert trends.items.empty
+
+
+def test_cache_recomputes_per_version_and_day(local_store, report):
+    local_store.append([report("Sonkor", Date=days_ago(1))])
+    store = CachedStore(local_store, sync_every=0)
+    cache = TrendCache()
+    first = cache.get(store, now=NOW)
+    assert cache.get(store, now=NOW) is first
+    assert cache.get(store, now=NOW + pd.Timedelta(days=1)) is not first
+    store.append([report("Bariis", Date=days_ago(0))])
+    assert sorted(cache.get(store, now=NOW).items["Item"]) == ["Bariis", "Sonkor"]
@@ -0,0 +1,70 @@
+import pytest
+
+from changelog import ChangeLog
+from raw_export import CHANGE_COLUMN, SEQ_COLUMN, changes_since
+from report_cache import CachedStore
+from storage import ID_COLUMN
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ChangeLog(str(tmp_path / "changes.db"))
+
+
+@pytest.fixture
+def cache(local_store, log, report):
+    local_store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2")])
+    cache = CachedStore(local_store, sync_every=0)
+    cache.read()
+    cache.subscribe(log)
+    return cache
+
+
+def delta(cache, log, since):
+    df, version = changes_since(cache.read(), log, since)
+    return list(zip(df[ID_COLUMN], df[CHANGE_COLUMN], df[SEQ_COLUMN])), version
+
+
+def test_each_write_takes_the_next_number(cache, log, report):
+    assert log.version == 1  # the initial load
+    cache.append([report("Caano", ID="a3")])
+    cache.update_by_id({"a1": {"Note": "x"}})
+    cache.delete_by_id(["a2"])
+    assert log.version == 4
+    assert delta(cache, log, 1) == ([("a3", "upsert", 2), ("a1", "upsert", 3), ("a2", "delete", 4)], 4)
+    assert delta(cache, log, 3) == ([("a2", "delete", 4)], 4)
+    assert delta(cache, log, 4) == ([], 4)
+
+
+def test_reload_picks_up_edits_made_elsewhere(cache, log):
+    cache.store.update_by_id({"a2": {"Note": "from another server"}})
+    cache.store.delete_by_id(["a1"])
+    cache.invalidate()
+    assert delta(cache, log, 1) == ([("a2", "upsert", 2), ("a1", "delete", 2)], 2)
+
+
+def test_rows_not_synced_yet_hold_the_version_back(cache, log, report):
+    # Another process logged a3 but this frame has not seen it yet
+    stale_frame = cache.snapshot().df
+    other = CachedStore(cache.store)
+    other.read()
+    other.subscribe(ChangeLog(log.path))
+    other.append([report("Caano", ID="a3")])
+    assert log.version == 2
+    df, version = changes_since(stale_frame, log, 0)
+    assert version == 1
+    assert sorted(df[ID_COLUMN]) == ["a1", "a2"]
+
+
+def test_edits_not_synced_yet_hold_the_version_back(cache, log):
+    # Two servers share one change log; B edits a1, A has not reloaded yet
+    other = CachedStore(cache.store)
+    other.read()
+    other.subscribe(ChangeLog(log.path))
+    other.update_by_id({"a1": {"Item": "Bariis Basmati"}})
+    assert log.version == 2
+    df, version = changes_since(cache.snapshot().df, log, 1)
+    assert (version, df.empty) == (1, True)  # never the old a1 labelled as version 2
+    cache.invalidate()
+    assert delta(cache, log, 1) == ([("a1", "upsert", 2)], 2)
+    assert cache.read().set_index(ID_COLUMN).at["a1", "Item"] == "Bariis Basmati"
@@ -0,0 +1,73 @@
+import pytest
+
+from dashboard import EditBatch
+from report_cache import CachedStore
+from storage import ID_COLUMN, VERSION_COLUMN, StaleWriteError, editor_changes
+
+
+@pytest.fixture
+def store(local_store, report):
+    store = CachedStore(local_store)
+    store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2"), report("Caano", ID="a3")])
+    return store
+
+
+def grid(page, edits=None, ticked=()):
+    # The data_editor result for `page`: edited cells and Select ticks
+    edited = page.copy()
+    edited.insert(0, "Select", edited[ID_COLUMN].isin(ticked))
+    for report_id, changes in (edits or {}).items():
+        row = edited.index[edited[ID_COLUMN] == report_id][0]
+        for col, val in changes.items():
+            edited.at[row, col] = val
+    return edited
+
+
+def by_id(store):
+    return store.read().set_index(ID_COLUMN)
+
+
+def test_editor_changes_only_touched_cells(store):
+    df = store.read()
+    edited = grid(df, {"a1": {"Item": "Bariis Basmati"}, "a2": {"Note": ""}}, ticked={"a3"})
+    edited["Date"] = edited["Date"].dt.tz_localize(None)  # the grid hands back naive times
+    updates, deletes = editor_changes(df, edited)
+    assert updates == {"a1": {"Item": "Bariis Basmati"}}
+    assert deletes == ["a3"]
+
+
+def test_batch_keeps_changes_across_pages(store):
+    df = store.read()
+    batch = EditBatch()
+    batch.absorb(df.iloc[:2], grid(df.iloc[:2], {"a1": {"Item": "Bariis Basmati"}}))
+    batch.absorb(df.iloc[2:], grid(df.iloc[2:], ticked={"a3"}))
+    assert batch.edits == {"a1": {"Item": "Bariis Basmati"}} and batch.deletes == {"a3"}
+
+    # Typing the original value back drops the edit
+    batch.absorb(df.iloc[:2], grid(df.iloc[:2], {"a1": {"Item": "Bariis"}}))
+    assert batch.edits == {} and len(batch) == 1
+
+
+def test_save_then_delete_same_row(store):
+    # Edited and ticked: "Save" writes the edit, the tick stays, and the
+    # later "Yes, Delete" must not trip over the Version our save bumped
+    df = store.read()
+    batch = EditBatch()
+    batch.absorb(df, grid(df, {"a1": {"Note": "check"}}, ticked={"a1"}))
+    assert batch.commit(store) == (1, 0)
+    batch.reset(keep_deletes=True)
+    assert by_id(store).at["a1", VERSION_COLUMN] == 2
+
+    assert batch.commit(store, deletes=True) == (0, 1)
+    assert "a1" not in by_id(store).index
+
+
+def test_stale_edit_is_refused(store):
+    df = store.read()
+    batch = EditBatch()
+    batch.absorb(df, grid(df, {"a2": {"Item": "Sonkor Cad"}}))
+    store.update_by_id({"a2": {"Item": "Sonkor Bunni"}})  # another manager saved first
+    with pytest.raises(StaleWriteError) as err:
+        batch.commit(store)
+    assert err.value.ids == ["a2"]
+    assert by_id(store).at["a2", "Item"] == "Sonkor Bunni"
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+import excel_report
+from benchmarks.synthetic import make_reports
+from report_cache import parse_reports
+
+
+@pytest.fixture
+def reports():
+    df = parse_reports(make_reports(50, seed=1))
+    assert df["Date"].dt.tz is not None
+    return df
+
+
+@pytest.mark.parametrize("mode", ["static", "conditional"])
+def test_excel_writes_tz_aware_dates(reports, mode):
+    out = excel_report.generate_excel(reports, mode=mode)
+    assert out.getbuffer().nbytes > 0
+
+
+def test_openpyxl_fallback_writes_local_time(reports, monkeypatch):
+    monkeypatch.setattr(excel_report, "HAS_XLSXWRITER", False)
+    back = pd.read_excel(excel_report.generate_excel(reports))
+    assert back["Date"].tolist() == reports["Date"].dt.tz_localize(None).dt.floor("min").tolist()
@@ -0,0 +1,61 @@
+import io
+
+import pandas as pd
+
+from ingest import ingest, validate_chunk
+from schema import TIMEZONE
+from storage import ID_COLUMN
+
+NOW = pd.Timestamp("2026-10-17 12:00", tz=TIMEZONE).to_pydatetime()
+
+
+def csv(text):
+    return io.BytesIO(text.encode())
+
+
+def test_rows_are_normalized_like_the_staff_form():
+    raw = pd.DataFrame({"date": ["2026-10-01 09:00"], " BRANCH ": ["branch 1"],
+                        "Category": ["alaabta go'an"], "Item": [" Bariis "]})
+    clean, errors = validate_chunk(raw, now=NOW)
+    assert errors == []
+    row = clean.iloc[0]
+    assert (row["Date"], row["Branch"], row["Item"]) == ("2026-10-01 09:00", "Branch 1", "Bariis")
+    assert row["Category"] == "Alaabta go'an"
+
+
+def test_bad_rows_are_reported_by_file_line(local_store):
+    source = csv("Date,Branch,Category,Item\n"
+                 "2026-10-01 09:00,Branch 1,Alaabta go'an,Bariis\n"
+                 "\n"
+                 "not a date,Branch 1,Alaabta go'an,Sonkor\n"
+                 "\n"
+                 "2026-10-01 09:00,Branch 99,Alaabta go'an,Caano\n"
+                 "2099-01-01 09:00,Branch 1,Alaabta go'an,Shaah\n"
+                 "2026-10-01 09:00,Branch 1,Alaabta go'an,\n")
+    result = ingest(local_store, source, name="feed.csv", chunksize=2, now=NOW)
+    assert (result.read, result.added, result.rejected) == (5, 1, 4)
+    assert [line for line, _ in result.errors] == [4, 6, 7, 8]
+    assert result.errors[0][1] == "bad Date: not a date"
+    assert result.errors[1][1] == "unknown Branch: Branch 99"
+
+
+def test_utc_offsets_are_converted_to_local_time(local_store):
+    source = csv("Date,Branch,Category,Item\n"
+                 "2026-10-01 09:00,Branch 1,Alaabta go'an,Bariis\n"
+                 "2026-10-01T06:30:00Z,Branch 1,Alaabta go'an,Sonkor\n"
+                 "2026-10-01T10:00:00+04:00,Branch 1,Alaabta go'an,Caano\n")
+    result = ingest(local_store, source, name="pos.csv", now=NOW)
+    assert (result.added, result.rejected) == (3, 0)
+    assert local_store.read()["Date"].tolist() == ["2026-10-01 09:00", "2026-10-01 09:30", "2026-10-01 09:00"]
+
+
+def test_import_again_only_adds_what_is_missing(local_store):
+    text = ("Date,Branch,Category,Item,ID\n"
+            "2026-10-01 09:00,Branch 1,Alaabta go'an,Bariis,pos-1\n"
+            "2026-10-01 09:05,Branch 1,Alaabta go'an,bariis ,pos-1\n"
+            "2026-10-01 09:00,Branch 1,Alaabta go'an,BARIIS,\n")
+    first = ingest(local_store, csv(text), name="pos.csv", now=NOW)
+    assert (first.added, first.duplicates) == (1, 2)
+    second = ingest(local_store, csv(text), name="pos.csv", now=NOW)
+    assert (second.added, second.duplicates) == (0, 3)
+    assert local_store.read()[ID_COLUMN].tolist() == ["pos-1"]
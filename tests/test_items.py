@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from items import ItemIndex, normalize_item, normalize_items, within_edits
+from report_cache import parse_reports
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("  Sonkor ", "sonkor"),
+    ("SONKOR-Cad", "sonkor cad"),
+    ("Café", "cafe"),
+    (None, ""),
+    (float("nan"), ""),
+])
+def test_normalize_item(raw, key):
+    assert normalize_item(raw) == key
+
+
+def test_normalize_items_keeps_the_index():
+    values = pd.Series(["Sonkor", None, "sonkor "], index=[7, 8, 9])
+    assert normalize_items(values).to_dict() == {7: "sonkor", 8: "", 9: "sonkor"}
+
+
+@pytest.mark.parametrize("a, b, k, ok", [
+    ("sonkor", "sokor", 1, True),
+    ("sonkor", "sonkro", 1, False),   # a swap is two edits
+    ("sonkor", "sonkro", 2, True),
+    ("bariis", "caano", 2, False),
+    ("abc", "abcdef", 2, False),
+])
+def test_within_edits(a, b, k, ok):
+    assert within_edits(a, b, k) is ok
+
+
+@pytest.fixture
+def reports(report):
+    return parse_reports(pd.DataFrame([
+        report("Sonkor", ID="a1"),
+        report("sonkor ", ID="a2", Branch="Branch 3"),
+        report("Sokor", ID="a3"),
+        report("Bariis", ID="a4"),
+        report("Sonkor", ID="a5", Category="alaabta Suuqa leh"),
+        report("Oil", ID="a6"),
+        report("Oli", ID="a7"),  # short names need an exact match
+    ]))
+
+
+def test_typos_share_one_cluster(reports):
+    index = ItemIndex()
+    index.on_reload(reports)
+    keys = index.cluster_keys(pd.Series(["SONKOR", "sokor", "Bariis", "Oil", "Oli", "Unseen"]))
+    assert keys[0] == keys[1] != keys[2]
+    assert keys[3] != keys[4]
+    assert keys[5] == "unseen"
+
+
+def test_clusters_merge_transitively():
+    index = ItemIndex()
+    names = ["bariiscadaan", "bariisxydaxz", "bariisxadaxn"]  # the ends are 4 edits apart
+    assert not within_edits(names[0], names[1], 2)
+    for name in names:  # the middle spelling arrives last and joins both
+        index._add_name(name)
+    assert set(index.cluster_keys(pd.Series(names))) == {"bariiscadaan"}
+
+
+def test_top_items_counts_each_product_once(reports):
+    index = ItemIndex()
+    index.on_reload(reports)
+    top = index.top_items(limit=2)
+    first = top.iloc[0]
+    assert (first["Item"], first["Reports"], first["Branches"]) == ("Sonkor", 3, 2)
+    assert first["By branch"] == "Branch 1: 2, Branch 3: 1"
+    assert set(first["Spellings"].split(", ")) == {"Sonkor", "sonkor", "Sokor"}
+    assert index.top_items(category="alaabta Suuqa leh")["Reports"].tolist() == [1]
+    day = pd.Timestamp("2026-10-02")
+    assert index.top_items(start=day).empty
+
+
+def test_updates_and_deletes_move_the_counts(reports):
+    index = ItemIndex()
+    index.on_reload(reports)
+    before = reports[reports["ID"] == "a4"]
+    index.on_update(before, before.assign(Item="Sonkor"))
+    index.on_delete(reports[reports["ID"] == "a1"])
+    top = index.top_items(limit=1).iloc[0]
+    assert (top["Item"], top["Reports"]) == ("Sonkor", 3)
+    assert "Bariis" not in index.top_items()["Item"].tolist()
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from metrics import MetricsRollup, summarize
+from report_cache import parse_reports
+
+
+@pytest.fixture
+def reports(report):
+    return parse_reports(pd.DataFrame([
+        report("Sonkor", ID="a1", Date="2026-10-01 09:00"),
+        report("Bariis", ID="a2", Date="2026-10-01 17:00", Branch="Branch 3"),
+        report("Caano", ID="a3", Date="2026-10-02 08:00", Category="bahiyaha Dadweynaha"),
+        report("Shaah", ID="a4", Date=""),
+    ]))
+
+
+def same(summary, expected):
+    assert summary.total == expected.total
+    assert summary.categories.to_dict() == expected.categories.to_dict()
+    assert summary.branches.to_dict() == expected.branches.to_dict()
+
+
+def test_summary_matches_a_row_scan(reports):
+    rollup = MetricsRollup()
+    rollup.on_reload(reports)
+    same(rollup.summary(), summarize(reports))
+    day = pd.Timestamp("2026-10-01")
+    same(rollup.summary(day, day + pd.Timedelta(days=1)), summarize(reports.iloc[:2]))
+    # Undated reports only count when the window is open ended
+    assert rollup.summary(start=day).total == 3
+
+
+def test_incremental_events_match_a_rebuild(reports):
+    rollup = MetricsRollup()
+    rollup.on_reload(reports.iloc[:2])
+    rollup.on_append(reports.iloc[2:])
+    same(rollup.summary(), summarize(reports))
+
+    before = reports.iloc[[1]]
+    after = before.assign(Branch=pd.Categorical(["Branch 1"], categories=before["Branch"].cat.categories),
+                          Category=pd.Categorical(["alaabta Suuqa leh"], categories=before["Category"].cat.categories))
+    rollup.on_update(before, after)
+    edited = pd.concat([reports.iloc[[0]], after, reports.iloc[2:]])
+    same(rollup.summary(), summarize(edited))
+
+    rollup.on_delete(reports.iloc[[0]])
+    same(rollup.summary(), summarize(edited.iloc[1:]))
+    assert "Branch 3" not in rollup.summary().branches  # groups that reach zero are dropped
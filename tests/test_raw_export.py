@@ -0,0 +1,49 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.synthetic import make_reports
+from raw_export import export_raw, raw_frame, write_csv, write_parquet
+from report_cache import parse_reports
+from storage import ID_COLUMN, META_COLUMNS, REPORT_COLUMNS
+
+
+@pytest.fixture
+def reports():
+    df = parse_reports(make_reports(120, seed=3))
+    return df.assign(Search="helper column")  # grid / search helpers are not exported
+
+
+def test_parquet_keeps_types_and_rows(reports):
+    table = pq.read_table(export_raw(reports, "parquet"))
+    assert table.column_names == META_COLUMNS + REPORT_COLUMNS
+    back = table.to_pandas()
+    assert back[ID_COLUMN].tolist() == reports[ID_COLUMN].tolist()
+    assert str(back["Date"].dt.tz) == "Africa/Mogadishu"
+    assert back["Date"].tolist() == reports["Date"].tolist()
+
+
+def test_parquet_row_groups_follow_the_chunk_size(reports):
+    out = io.BytesIO()
+    write_parquet(raw_frame(reports), out, chunk_rows=50)
+    out.seek(0)
+    assert pq.ParquetFile(out).metadata.num_row_groups == 3
+
+
+def test_csv_writes_sheet_style_dates_in_chunks(reports):
+    out = io.BytesIO()
+    write_csv(raw_frame(reports), out, chunk_rows=50)
+    text = out.getvalue().decode()
+    back = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+    assert list(back.columns) == META_COLUMNS + REPORT_COLUMNS
+    assert len(back) == len(reports)
+    assert back["Date"].tolist() == reports["Date"].dt.strftime("%Y-%m-%d %H:%M").tolist()
+    assert text.count("Date,") == 1  # one header, not one per chunk
+
+
+def test_empty_frame_and_unknown_format(reports):
+    assert pq.read_table(export_raw(reports.iloc[:0], "parquet")).num_rows == 0
+    with pytest.raises(ValueError):
+        export_raw(reports, "xml")
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from report_cache import CachedStore
+from storage import ID_COLUMN, VERSION_COLUMN, filter_frame
+
+
+class Events:
+    # Records what CachedStore tells its listeners
+    def __init__(self):
+        self.log = []
+
+    def on_reload(self, df):
+        self.log.append(("reload", sorted(df[ID_COLUMN])))
+
+    def on_append(self, rows):
+        self.log.append(("append", rows[ID_COLUMN].tolist()))
+
+    def on_update(self, before, after):
+        self.log.append(("update", after[ID_COLUMN].tolist()))
+
+    def on_delete(self, rows):
+        self.log.append(("delete", rows[ID_COLUMN].tolist()))
+
+
+@pytest.fixture
+def cache(local_store, report):
+    local_store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2")])
+    return CachedStore(local_store, sync_every=0)
+
+
+def ids(cache):
+    return cache.read()[ID_COLUMN].tolist()
+
+
+def test_tail_sync_fetches_only_new_rows(cache, report):
+    events = Events()
+    cache.subscribe(events)
+    assert ids(cache) == ["a1", "a2"]
+    cache.store.append([report("Caano", ID="a3")])  # written by another server
+    assert ids(cache) == ["a1", "a2", "a3"]
+    assert events.log == [("reload", ["a1", "a2"]), ("append", ["a3"])]
+
+
+def test_rows_removed_behind_our_back_force_a_full_reload(cache, report):
+    events = Events()
+    cache.subscribe(events)
+    cache.read()
+    cache.store.delete_by_id(["a2"])
+    cache.store.append([report("Caano", ID="a3")])
+    assert ids(cache) == ["a1", "a3"]
+    assert events.log[-1] == ("reload", ["a1", "a3"])
+
+
+def test_own_writes_patch_the_frame(cache, report):
+    cache.read()
+    events = Events()
+    cache.subscribe(events)
+    cache.append([report("Caano", ID="a3")])
+    cache.update_by_id({"a1": {"Item": "Bariis Basmati"}}, versions={"a1": 1})
+    cache.delete_by_id(["a2"])
+    df = cache.read().set_index(ID_COLUMN)
+    assert df.index.tolist() == ["a1", "a3"]
+    assert (df.at["a1", "Item"], df.at["a1", VERSION_COLUMN]) == ("Bariis Basmati", 2)
+    assert [e for e, _ in events.log] == ["reload", "append", "update", "delete"]
+
+
+def test_rollover_keeps_every_row_and_counts_the_archive(cache, report):
+    cache.store.append([report("Caano", ID="old", Date="2026-08-01 09:00")])
+    assert cache.rollover(pd.Timestamp("2026-09-01")) == 1
+    snap = cache.snapshot()
+    assert snap.n_archive == 1
+    assert snap.df[ID_COLUMN].tolist() == ["old", "a1", "a2"]
+    # Tail sync after the rollover still sees only the hot rows as new
+    cache.store.append([report("Shaah", ID="a4")])
+    assert ids(cache) == ["old", "a1", "a2", "a4"]
+
+
+def test_query_is_shared_per_version(cache, report):
+    day = pd.Timestamp("2026-10-01")
+    first = cache.query(start=day, branch="Branch 1")
+    assert first[ID_COLUMN].tolist() == ["a1", "a2"]
+    assert len(cache._views) == 1
+    cache.query(start=day, branch="Branch 1")
+    assert len(cache._views) == 1
+    cache.append([report("Caano", ID="a3", Branch="Branch 3")])
+    assert cache.query(start=day, branch="Branch 1")[ID_COLUMN].tolist() == ["a1", "a2"]
+    assert cache.query(start=day, end=day + pd.Timedelta(days=1))[ID_COLUMN].tolist() == ["a1", "a2", "a3"]
+
+
+def test_published_snapshot_is_never_changed(cache):
+    old = cache.snapshot()
+    items = old.df["Item"].tolist()
+    cache.update_by_id({"a1": {"Item": "Bariis Basmati"}})
+    new = cache.snapshot()
+    assert new.version > old.version
+    assert old.df["Item"].tolist() == items
+    assert old.df[VERSION_COLUMN].tolist() == [1, 1]
+    assert new.df.set_index(ID_COLUMN).at["a1", "Item"] == "Bariis Basmati"
+
+
+def test_session_edits_stay_in_the_session(cache):
+    view = cache.read()
+    view.loc[0, "Item"] = "changed here only"
+    assert cache.read().loc[0, "Item"] == "Bariis"
+
+
+def test_append_does_not_duplicate_rows(cache, report):
+    cache.read()
+    cache.append([report("Caano", ID="a3")])
+    cache.append([report("Caano", ID="a3")])
+    assert ids(cache) == ["a1", "a2", "a3"]
+
+
+def test_date_range_queries_match_a_full_scan(local_store, report):
+    rng = np.random.default_rng(7)
+    days = pd.date_range("2026-09-01", periods=40, freq="D")
+    local_store.append([report(f"item {i}", ID=f"r{i}", Branch=["Branch 1", "Branch 3"][i % 2],
+                               Date=(days[rng.integers(40)] + pd.Timedelta(minutes=int(rng.integers(1440))))
+                               .strftime("%Y-%m-%d %H:%M") if i % 17 else "")
+                        for i in range(300)])
+    cache = CachedStore(local_store, sync_every=0)
+
+    def check():
+        df = cache.read()
+        for _ in range(5):
+            start, end = sorted(rng.choice(days, 2))
+            for args in [(start, end, None), (start, None, "Branch 3"), (None, end, None), (start, start, None)]:
+                got = cache.query(*args)
+                assert got[ID_COLUMN].tolist() == filter_frame(df, *args)[ID_COLUMN].tolist()
+
+    check()
+    cache.append([report("new", ID="n1", Date="2026-10-20 08:00")])   # extends the index
+    check()
+    cache.append([report("late", ID="n2", Date="2026-09-03 08:00")])  # out of order: rebuilt
+    check()
+    cache.update_by_id({"r5": {"Date": "2026-09-20 10:00"}, "r6": {"Item": "x"}})
+    check()
+    cache.delete_by_id(["r7", "n1"])
+    check()
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from report_jobs import DONE, FAILED, ArtifactCache, ReportJobs, artifact_key
+
+
+def wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.active and time.time() < deadline:
+        time.sleep(0.01)
+    assert not job.active
+    return job
+
+
+class Builder:
+    # Writes `body` once released; counts the builds
+    def __init__(self, body=b"report", fail=False):
+        self.body = body
+        self.fail = fail
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, df, out, progress):
+        self.calls += 1
+        self.release.wait(5)
+        progress(0.5)
+        if self.fail:
+            raise ValueError("no rows")
+        with open(out, "wb") as f:
+            f.write(self.body)
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return ReportJobs(ArtifactCache(str(tmp_path / "cache")))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"Item": ["Bariis", "Sonkor"], "Branch": ["Branch 1", "Branch 3"]})
+
+
+def test_key_follows_kind_params_and_cells(frame):
+    key = artifact_key("pdf", {"range": "Today"}, frame)
+    assert key == artifact_key("pdf", {"range": "Today"}, frame.copy())
+    assert key != artifact_key("excel", {"range": "Today"}, frame)
+    assert key != artifact_key("pdf", {"range": "This Week"}, frame)
+    assert key != artifact_key("pdf", {"range": "Today"}, frame.assign(Item=["Bariis", "Caano"]))
+
+
+def test_same_view_is_built_once(jobs, frame):
+    build = Builder()
+    first = jobs.submit("pdf-1", "pdf", frame, build)
+    assert jobs.submit("pdf-1", "pdf", frame, build) is first
+    build.release.set()
+    assert wait(first).status == DONE
+    assert (first.progress, first.read()) == (1.0, b"report")
+    assert jobs.submit("pdf-1", "pdf", frame, build) is first
+    assert build.calls == 1
+
+
+def test_finished_files_survive_a_restart(jobs, frame):
+    build = Builder()
+    build.release.set()
+    wait(jobs.submit("pdf-1", "pdf", frame, build))
+    again = ReportJobs(jobs.cache).find("pdf-1", "pdf")
+    assert (again.status, again.read()) == (DONE, b"report")
+
+
+def test_failed_build_reports_and_can_retry(jobs, frame):
+    bad = Builder(fail=True)
+    bad.release.set()
+    job = wait(jobs.submit("pdf-1", "pdf", frame, bad))
+    assert (job.status, job.error) == (FAILED, "no rows")
+    assert jobs.find("pdf-1", "pdf") is job
+    assert os.listdir(jobs.cache.directory) == []  # no half-written files left
+    good = Builder()
+    good.release.set()
+    assert wait(jobs.submit("pdf-1", "pdf", frame, good)).status == DONE
+
+
+def test_cache_drops_least_recently_used(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_files=2)
+    for i, key in enumerate(["a", "b"]):
+        tmp = cache.new_temp("pdf")
+        with open(tmp, "wb") as f:
+            f.write(b"x")
+        cache.put(tmp, key, "pdf")
+        os.utime(cache.path(key, "pdf"), (i, i))
+    assert cache.get("a", "pdf")  # a hit counts as a use
+    tmp = cache.new_temp("pdf")
+    cache.put(tmp, "c", "pdf")
+    assert (cache.get("a", "pdf") is not None, cache.get("b", "pdf"), cache.get("c", "pdf") is not None) \
+        == (True, None, True)
+
+
+def test_cache_limits_total_size(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=10)
+    for key in ["a", "b"]:
+        tmp = cache.new_temp("excel")
+        with open(tmp, "wb") as f:
+            f.write(b"123456")
+        cache.put(tmp, key, "excel")
+        time.sleep(0.01)
+    assert sorted(os.listdir(tmp_path)) == ["b.xlsx"]
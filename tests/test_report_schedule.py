@@ -0,0 +1,62 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from localtime import LOCAL_TZ
+from report_cache import CachedStore
+from report_jobs import ArtifactCache, ReportJobs
+from report_schedule import ReportScheduler, parse_times
+
+NOW = LOCAL_TZ.localize(datetime(2026, 10, 17, 12, 0))
+
+
+def write(df, out, progress):
+    with open(out, "w") as f:
+        f.write(f"{len(df)} rows")
+
+
+def builders(trends=None):
+    return {"pdf": write, "excel": write}
+
+
+@pytest.fixture
+def scheduler(local_store, report, tmp_path):
+    local_store.append([report("Bariis", ID="a1", Date="2026-10-17 08:00"),
+                        report("Sonkor", ID="a2", Date="2026-10-14 08:00", Branch="Branch 3")])
+    jobs = ReportJobs(ArtifactCache(str(tmp_path / "cache")))
+    return ReportScheduler(CachedStore(local_store, sync_every=0), jobs, builders,
+                           {"Today": 0, "This Week": 6}, ["Branch 1", "Branch 3"], times=["13:30", "06:00"])
+
+
+def settle(jobs, timeout=5):
+    deadline = time.time() + timeout
+    while any(j.active for j in jobs._jobs.values()) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_parse_times():
+    assert parse_times(["13:30", "6:00", "06:00"]) == [(6, 0), (13, 30)]
+
+
+def test_next_run_is_later_today_or_tomorrow(scheduler):
+    assert scheduler.next_run(NOW) == LOCAL_TZ.localize(datetime(2026, 10, 17, 13, 30))
+    assert scheduler.next_run(NOW.replace(hour=14)) == LOCAL_TZ.localize(datetime(2026, 10, 18, 6, 0))
+
+
+def test_targets_skip_empty_views(scheduler):
+    views = {(params["time_filter"], params["branch"]) for _, params, _ in scheduler.targets(NOW)}
+    # Today has nothing for Branch 3
+    assert views == {("Today", None), ("Today", "Branch 1"),
+                     ("This Week", None), ("This Week", "Branch 1"), ("This Week", "Branch 3")}
+
+
+def test_unchanged_reports_are_not_rebuilt(scheduler, report):
+    assert scheduler.run_once(NOW) == 10
+    assert scheduler.last_submitted == 10
+    settle(scheduler.jobs)
+    assert scheduler.run_once(NOW) == 0
+    scheduler.store.append([report("Caano", ID="a3", Date="2026-10-16 08:00", Branch="Branch 3")])
+    # This Week for all branches and for Branch 3, PDF and Excel
+    assert scheduler.run_once(NOW) == 4
+    assert scheduler.last_run is not None
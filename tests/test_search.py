@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from report_cache import parse_reports
+from search import ReportSearchIndex, parse_query, search_frame
+from storage import ID_COLUMN
+
+
+@pytest.mark.parametrize("query, terms", [
+    ("", []),
+    ("  Sonkor Cad ", [(None, "sonkor cad")]),                    # plain text: one substring
+    ('branch:"Branch 3" item:sugar', [("Branch", "branch 3"), ("Item", "sugar")]),
+    ('branch:"Branch 3', [("Branch", "branch 3")]),               # unclosed quote
+    ('laan:"Head Q" bariis', [("Branch", "head q"), (None, "bariis")]),
+    ("item:sugar price:10", [("Item", "sugar"), (None, "price:10")]),  # unknown field: plain term
+    ('item:""', []),
+])
+def test_parse_query(query, terms):
+    assert parse_query(query) == terms
+
+
+@pytest.fixture
+def reports(report):
+    return parse_reports(pd.DataFrame([
+        report("Sonkor", ID="a1", Branch="Branch 3", Note="sugar 50kg"),
+        report("Bariis", ID="a2", Branch="Head Q"),
+        report("Sonkor Cad", ID="a3", Branch="Branch 1", Employee="Hodan"),
+    ]))
+
+
+def ids(df):
+    return df[ID_COLUMN].tolist()
+
+
+def test_search_frame_scopes_terms_to_their_column(reports):
+    assert ids(search_frame(reports, "sonkor")) == ["a1", "a3"]
+    assert ids(search_frame(reports, 'branch:"branch 3"')) == ["a1"]
+    assert ids(search_frame(reports, "item:sugar")) == []
+    assert ids(search_frame(reports, "sugar")) == ["a1"]
+    assert ids(search_frame(reports, "staff:hodan sonkor")) == ["a3"]
+    assert ids(search_frame(reports, "date:2026-10-01")) == ["a1", "a2", "a3"]
+    # A term never matches across two columns
+    assert ids(search_frame(reports, "sonkor branch")) == []
+
+
+def test_index_follows_appends_updates_and_deletes(reports):
+    index = ReportSearchIndex()
+    index.on_reload(reports.iloc[:2])
+    index.on_append(reports.iloc[2:])
+    assert ids(index.filter(reports, "sonkor")) == ["a1", "a3"]
+
+    before = reports[reports[ID_COLUMN] == "a2"]
+    after = before.assign(Item="Sonkor Bunni")
+    index.on_update(before, after)
+    assert sorted(index.matching_ids("item:sonkor")) == ["a1", "a2", "a3"]
+    assert list(index.matching_ids("bariis")) == []
+
+    index.on_delete(reports[reports[ID_COLUMN] == "a1"])
+    assert sorted(index.matching_ids("sonkor")) == ["a2", "a3"]
+
+
+def test_index_matches_a_plain_scan(reports):
+    index = ReportSearchIndex()
+    index.on_reload(reports)
+    for query in ["sonkor", "branch:head", 'laan:"branch 1" item:cad', "zzz", "item:"]:
+        assert ids(index.filter(reports, query)) == ids(search_frame(reports, query))
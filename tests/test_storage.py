@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from benchmarks.fake_gsheets import FakeGSheetsConnection
+from storage import (ID_COLUMN, META_COLUMNS, REPORT_COLUMNS, VERSION_COLUMN, GSheetsStore, LocalStore,
+                     StaleWriteError, new_report_id)
+
+
+def sheet_store(rows=(), archive=True):
+    frame = pd.DataFrame(list(rows), columns=REPORT_COLUMNS + META_COLUMNS)
+    return GSheetsStore(FakeGSheetsConnection({"Sheet1": frame}), "sheet-url", worksheet="Sheet1",
+                        archive_worksheet="Archive" if archive else None)
+
+
+@pytest.fixture(params=["local", "gsheets"])
+def store(request, tmp_path):
+    return LocalStore(str(tmp_path / "mareero.db")) if request.param == "local" else sheet_store()
+
+
+def by_id(store):
+    df = store.read()
+    return df.set_index(df[ID_COLUMN].astype(str))
+
+
+def test_existing_ids_and_repeats_in_a_batch(store, report):
+    assert store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2"), report("Sonkor", ID="a2")]) == 2
+    assert store.existing_ids(["a2", "zz"]) == {"a2"}
+    assert sorted(store.read()[ID_COLUMN]) == ["a1", "a2"]
+
+
+def test_local_append_is_idempotent_by_id(local_store, report):
+    rows = [report("Bariis", ID="a1"), report("Sonkor", ID="a2")]
+    assert local_store.append(rows) == 2
+    assert local_store.append(rows + [report("Caano", ID="a3")]) == 1
+    assert sorted(local_store.read()[ID_COLUMN]) == ["a1", "a2", "a3"]
+
+
+def test_sheet_append_is_one_call_however_long_the_sheet(report):
+    store = sheet_store([report(f"item {i}", ID=f"old{i}", Version=1) for i in range(500)])
+    store.header()
+    book = store.conn.book
+    before = book.calls
+    store.append([report("Bariis", ID="a1")])
+    assert book.calls - before == 1
+
+
+# --- VERSIONED WRITES (compare-and-set) ---
+def test_update_bumps_version(store, report):
+    store.append([report("Bariis", ID="a1")])
+    assert store.update_by_id({"a1": {"Item": "Bariis Basmati"}}, versions={"a1": 1}) == 1
+    row = by_id(store).loc["a1"]
+    assert row["Item"] == "Bariis Basmati"
+    assert int(row[VERSION_COLUMN]) == 2
+
+
+def test_stale_update_is_refused_and_the_rest_applied(store, report):
+    store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2")])
+    store.update_by_id({"a1": {"Note": "first"}})  # another manager, version 1 -> 2
+    with pytest.raises(StaleWriteError) as err:
+        store.update_by_id({"a1": {"Note": "second"}, "a2": {"Note": "ok"}}, versions={"a1": 1, "a2": 1})
+    assert (err.value.ids, err.value.applied) == (["a1"], 1)
+    rows = by_id(store)
+    assert (rows.at["a1", "Note"], rows.at["a2", "Note"]) == ("first", "ok")
+
+
+def test_update_of_deleted_row_is_stale(store, report):
+    store.append([report("Bariis", ID="a1")])
+    store.delete_by_id(["a1"])
+    with pytest.raises(StaleWriteError) as err:
+        store.update_by_id({"a1": {"Note": "late"}}, versions={"a1": 1})
+    assert err.value.ids == ["a1"]
+
+
+def test_stale_delete_keeps_the_row(store, report):
+    store.append([report("Bariis", ID="a1"), report("Sonkor", ID="a2")])
+    store.update_by_id({"a1": {"Note": "edited"}})
+    with pytest.raises(StaleWriteError) as err:
+        store.delete_by_id(["a1", "a2"], versions={"a1": 1, "a2": 1})
+    assert (err.value.ids, err.value.applied) == (["a1"], 1)
+    assert by_id(store).index.tolist() == ["a1"]
+
+
+def test_writes_without_versions_always_apply(store, report):
+    store.append([report("Bariis", ID="a1")])
+    store.update_by_id({"a1": {"Note": "x"}})
+    assert store.update_by_id({"a1": {"Note": "y"}}) == 1
+    assert store.delete_by_id(["a1"]) == 1
+    assert store.read().empty
+
+
+# --- ROLLOVER ---
+def test_rollover_moves_old_rows_to_the_archive(store, report):
+    store.append([report("Bariis", ID="old", Date="2026-08-01 09:00"),
+                  report("Sonkor", ID="new", Date="2026-10-01 09:00")])
+    assert store.rollover(pd.Timestamp("2026-09-01")) == 1
+    assert store.read_hot()[ID_COLUMN].tolist() == ["new"]
+    assert sorted(store.read()[ID_COLUMN]) == ["new", "old"]
+    # Archived rows can still be edited (and stay versioned)
+    store.update_by_id({"old": {"Note": "late fix"}}, versions={"old": 1})
+    assert by_id(store).at["old", "Note"] == "late fix"
+
+
+def test_local_query_pushdown(local_store, report):
+    local_store.append([report("Bariis", ID="old", Date="2026-08-01 09:00"),
+                        report("Sonkor", ID="b3", Date="2026-10-01 09:00", Branch="Branch 3"),
+                        report("Caano", ID="b1", Date="2026-10-02 09:00")])
+    local_store.rollover(pd.Timestamp("2026-09-01"))
+    assert local_store.query(start=pd.Timestamp("2026-09-15"))[ID_COLUMN].tolist() == ["b3", "b1"]
+    assert local_store.query(start=pd.Timestamp("2026-07-01"), end=pd.Timestamp("2026-10-02"))[ID_COLUMN].tolist() \
+        == ["old", "b3"]
+    assert local_store.query(branch="Branch 3")[ID_COLUMN].tolist() == ["b3"]
+
+
+def test_new_ids_stay_text_in_the_sheet():
+    # USER_ENTERED parses "012345678901" / "12e345678901" as numbers
+    for _ in range(1000):
+        assert pd.isna(pd.to_numeric(new_report_id(), errors="coerce"))
@@ -0,0 +1,71 @@
+import json
+
+import pandas as pd
+
+from benchmarks.fake_gsheets import FakeGSheetsConnection
+from storage import ID_COLUMN, META_COLUMNS, REPORT_COLUMNS, GSheetsStore
+from submit_queue import SubmissionQueue
+
+
+def test_flush_sends_pending_reports(local_store, tmp_path, report):
+    queue = SubmissionQueue(local_store, path=str(tmp_path / "outbox.db"))
+    ids = queue.put([report("Bariis"), report("Sonkor")])
+    assert queue.counts() == {"pending": 2, "synced": 0}
+    assert queue.flush() == 2
+    assert queue.flush() == 0
+    assert sorted(local_store.read()["ID"]) == sorted(ids)
+    assert queue.counts() == {"pending": 0, "synced": 2}
+
+
+def test_resent_batch_after_crash_does_not_block_queue(local_store, tmp_path, report):
+    # The process died after store.append() but before marking the batch
+    # synced: with the lease expired the same batch goes out again
+    queue = SubmissionQueue(local_store, path=str(tmp_path / "outbox.db"), lease=0)
+    ids = queue.put([report("Bariis"), report("Sonkor")])
+    batch = queue._claim()
+    local_store.append([json.loads(payload) for _, payload, _ in batch])
+
+    assert queue.flush() == 2
+    assert queue.last_error is None
+    assert sorted(local_store.read()["ID"]) == sorted(ids)  # written once
+
+    later = queue.put([report("Caano")])
+    assert queue.flush() == 1
+    assert queue.counts() == {"pending": 0, "synced": 3}
+    assert later[0] in set(local_store.read()["ID"])
+
+
+def test_failed_append_is_retried(local_store, tmp_path, report):
+    class Flaky:
+        calls = 0
+
+        def append(self, rows):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("offline")
+            return local_store.append(rows)
+
+        def existing_ids(self, ids):
+            return local_store.existing_ids(ids)
+
+    queue = SubmissionQueue(Flaky(), path=str(tmp_path / "outbox.db"))
+    queue.put([report("Bariis")])
+    assert queue.flush() == 0
+    assert queue.last_error == "offline"
+    assert queue.counts() == {"pending": 1, "synced": 0}
+    assert queue.flush() == 1
+    assert len(local_store.read()) == 1
+
+
+def test_resent_batch_reaches_the_sheet_once(tmp_path, report):
+    frame = pd.DataFrame(columns=REPORT_COLUMNS + META_COLUMNS)
+    store = GSheetsStore(FakeGSheetsConnection({"Sheet1": frame}), "sheet-url")
+    queue = SubmissionQueue(store, path=str(tmp_path / "outbox.db"), lease=0)
+    ids = queue.put([report("Bariis"), report("Sonkor")])
+    store.append([json.loads(payload) for _, payload, _ in queue._claim()])  # then the process died
+
+    assert queue.flush() == 2
+    assert sorted(store.read()[ID_COLUMN]) == sorted(ids)
+    queue.put([report("Caano")])
+    assert queue.flush() == 1
+    assert len(store.read()) == 3